@@ -1,38 +1,108 @@
+import time
+_RUN_START = time.perf_counter() # Awal script run ini (untuk instrumentasi import & first paint)
 import streamlit as st
 import pandas as pd
-import random
-import time
-from datetime import date
+from datetime import date, timedelta
 from modules.database_manager import DatabaseManager
-from modules.ai_predictor import ProcurementAI
-from modules.email_service import send_quotation_email_simulation
+from modules.email_service import EmailDispatcher, iter_customer_digests, smtp_config_from_env
+from modules.quotation_pdf import quote_record, get_quotation_pdf, render_quotation_pdfs
+from modules.pricing import calculate_financials, calculate_financials_bulk
+from modules.perf import recorder, RunProfiler
+from modules.workflow_service import WorkflowError, WorkflowService
+
+_IMPORT_MS = (time.perf_counter() - _RUN_START) * 1000
 
 # ================= INIT SYSTEM =================
 st.set_page_config(page_title="AMI - Komatsu", layout="wide", page_icon="🚜")
 
-if 'db' not in st.session_state:
-    st.session_state.db = DatabaseManager()
-    st.session_state.db.populate_dummy_data()
+# Metrik startup per proses: import, init resource & first paint per halaman (cold = run pertama di proses)
+@st.cache_resource
+def get_startup_metrics():
+    return {"imports_ms": round(_IMPORT_MS, 1), "resources_ms": {}, "pages": {}}
+
+startup = get_startup_metrics()
+
+def timed_resource(name, init):
+    t0 = time.perf_counter()
+    resource = init()
+    startup["resources_ms"][name] = round((time.perf_counter() - t0) * 1000, 1)
+    return resource
+
+# DatabaseManager (pool koneksi WAL) dipakai bersama oleh semua session; schema & seed 1x per proses
+@st.cache_resource
+def get_database():
+    def init():
+        database = DatabaseManager()
+        database.populate_dummy_data()
+        return database
+    return timed_resource("database", init)
+
+# Model AI dipakai bersama oleh semua session (1x load per proses, bukan per user).
+# Import sklearn (~1 s) & load model ditunda sampai halaman Cost & Procurement pertama kali butuh.
+@st.cache_resource
+def get_procurement_ai():
+    from modules.ai_predictor import ProcurementAI
+    return timed_resource("procurement_ai", ProcurementAI.load_or_train)
 
-if 'ai' not in st.session_state:
-    st.session_state.ai = ProcurementAI()
+# Worker training ulang model dari history quotation Approved (1 per proses, di background)
+@st.cache_resource
+def get_model_trainer():
+    from modules.ai_predictor import ModelTrainer
+    return timed_resource("model_trainer", lambda: ModelTrainer(get_database(), get_procurement_ai()).start())
 
-db = st.session_state.db
-ai = st.session_state.ai
+# Worker email background (1 per proses); tetap start di awal supaya antrian lama langsung terkirim
+@st.cache_resource
+def get_email_dispatcher():
+    return timed_resource("email_dispatcher", lambda: EmailDispatcher(get_database(), smtp_config_from_env()).start())
+
+# Aturan transisi workflow (sama dengan server HTTP modules.workflow_api); AI baru di-load saat prediksi pertama
+@st.cache_resource
+def get_workflow_service():
+    return WorkflowService(get_database(), ai_factory=get_procurement_ai)
+
+db = get_database()
+mailer = get_email_dispatcher()
+workflow = get_workflow_service()
 
 CUSTOMER_LIST = ['KMSI', 'KCIC', 'KPAC', 'KMM', 'KME', 'KEPO', 'KAC', 'KMSA', 'KSAF', 'KLTD']
 SUPPLIER_LIST = ['PT. United Tractors Pandu Eng', 'PT. Astra Otoparts', 'PT. Komatsu Undercarriage', 'Local Workshop A', 'Local Workshop B']
 
 # ================= HELPER FUNC =================
-def calculate_financials(cost_price, target_profit_percent=10.0):
-    sdc = cost_price * 0.03
-    svc = cost_price + sdc
-    profit_decimal = target_profit_percent / 100
-    denominator = 1 - 0.038 - profit_decimal - 0.03
-    if denominator <= 0: sales_price = 0
-    else: sales_price = svc / denominator
-    op_profit_val = sales_price * profit_decimal
-    return {"SDC": round(sdc, 2), "SVC": round(svc, 2), "Sales Price": round(sales_price, 2), "Op Profit Val": round(op_profit_val, 2)}
+def browse_parts_page(key):
+    """Filter + keyset pagination parts master. Hanya 1 halaman yang diambil dari DB."""
+    f1, f2, f3, f4, f5 = st.columns([3, 1, 1, 1, 2])
+    type_sel = f2.selectbox("Item Type", ["All", "Local", "Import"], key=f"{key}_type")
+    position_sel = f5.selectbox("KI vs Region Avg", ["All", "KI below region avg", "KI above region avg"], key=f"{key}_pos")
+    filters = {
+        "description": f1.text_input("Search Description", key=f"{key}_desc").strip() or None,
+        "item_type": None if type_sel == "All" else type_sel,
+        "stock_min": f3.number_input("Min Stock", min_value=0, value=None, key=f"{key}_smin"),
+        "stock_max": f4.number_input("Max Stock", min_value=0, value=None, key=f"{key}_smax"),
+        "competitive": {"KI below region avg": True, "KI above region avg": False}.get(position_sel),
+    }
+    page_size = st.session_state.get(f"{key}_size", 50)
+
+    # Stack = part_number awal tiap halaman yang sudah dilewati; reset jika filter berubah
+    signature = (tuple(filters.items()), page_size)
+    pager = st.session_state.setdefault(f"{key}_pager", {"signature": signature, "stack": [None]})
+    if pager["signature"] != signature:
+        pager.update(signature=signature, stack=[None])
+
+    page = db.get_parts_page(pager["stack"][-1], page_size + 1, **filters)
+    has_next = len(page) > page_size
+    page = page.head(page_size)
+    total = db.count_parts(**filters)
+
+    n1, n2, n3, n4 = st.columns([1, 1, 4, 1])
+    if n1.button("◀ Prev", key=f"{key}_prev", disabled=len(pager["stack"]) == 1):
+        pager["stack"].pop()
+        st.rerun()
+    if n2.button("Next ▶", key=f"{key}_next", disabled=not has_next):
+        pager["stack"].append(page['part_number'].iloc[-1])
+        st.rerun()
+    n3.caption(f"Page {len(pager['stack'])} of {max(1, -(-total // page_size))} · {total:,} parts")
+    n4.selectbox("Rows", [25, 50, 100, 200], index=1, key=f"{key}_size", label_visibility="collapsed")
+    return page
 
 # ================= UI SIDEBAR =================
 st.sidebar.image("https://upload.wikimedia.org/wikipedia/commons/thumb/5/59/Komatsu_logo.svg/2560px-Komatsu_logo.svg.png", width=200)
@@ -41,10 +111,26 @@ st.sidebar.markdown("### Navigation Menu")
 menu = st.sidebar.radio("", 
     ["🏠 Home", "📊 Dashboard", "🛠️ Master Data Parts", "🌏 Customer Inquiry Portal", 
      "1. Inquiry Validation", "⚙️ Localization Development", "2. Cost & Procurement", 
-     "3. Superior Approval", "4. Result & Email"])
+     "3. Superior Approval", "4. Result & Email", "⏱ Performance"], key="menu")
 
 st.sidebar.markdown("---")
 st.sidebar.caption("© 2026 PT Komatsu Indonesia - AfterMarket Division")
+if "first_paint_ms" in st.session_state:
+    st.sidebar.caption(f"⚡ First paint this session: {st.session_state['first_paint_ms']:.0f} ms")
+
+# ================= PAGE TIMING & PROFILING =================
+# Run sebelumnya terputus st.rerun() sebelum profiler sempat di-stop -> stop & simpan di sini
+stale_profiler = st.session_state.pop("active_profiler", None)
+if stale_profiler is not None:
+    st.session_state["last_profile"] = dict(stale_profiler[1], text=stale_profiler[0].stop(), note="interrupted by rerun")
+profiler = None
+if st.session_state.pop("profile_next_run", False):
+    try:
+        profiler = RunProfiler().start()
+        st.session_state["active_profiler"] = (profiler, {"page": menu, "at": time.strftime("%H:%M:%S")})
+    except ValueError:
+        st.sidebar.warning("cProfile busy in another session; try again.")
+page_start = time.perf_counter()
 
 # ================= MENU: HOME =================
 if menu == "🏠 Home":
@@ -75,53 +161,97 @@ if menu == "🏠 Home":
     c1, c2, c3 = st.columns(3)
     c1.info("📡 System: **Online**")
     c2.success("💾 Database: **Connected**")
-    c3.warning("🤖 AI Engine: **Ready**")
+    cache = db.cache_stats()
+    c2.caption(f"Query cache: {cache['hits']} hits / {cache['misses']} misses (hit rate {cache['hit_rate']:.0%}, {cache['entries']} entries, {cache['mb']} MB)")
+    if "procurement_ai" not in startup["resources_ms"]:
+        # Jangan load model hanya untuk status di Home
+        c3.warning("🤖 AI Engine: **Standby**")
+        c3.caption("Model loads on first use in 2. Cost & Procurement.")
+    else:
+        ai = get_procurement_ai()
+        c3.warning("🤖 AI Engine: **Ready**")
+        c3.caption(f"Model v{ai.load_info['version']} · {ai.load_info['source']} in {ai.load_info['seconds']}s · {ai.load_info['artifact_bytes'] / 1e6:.1f} MB")
+        pcache = ai.prediction_cache_stats()
+        c3.caption(f"Prediction cache: {pcache['hits']} hits / {pcache['misses']} misses (hit rate {pcache['hit_rate']:.0%}, {pcache['entries']} entries)")
+        if ai.train_info['source'] == "history":
+            c3.caption(f"Trained on {ai.train_info['rows']} approved quotations ({ai.train_info['mode']}, {ai.train_info['trees']} trees) at {ai.train_info['trained_at']}")
+    c1.caption(f"Startup: imports {startup['imports_ms']:.0f} ms · "
+               + " · ".join(f"{k} {v:.0f} ms" for k, v in startup["resources_ms"].items()))
 
 # ================= MENU: DASHBOARD =================
 elif menu == "📊 Dashboard":
     st.title("📊 Executive Dashboard")
-    all_quotes = db.get_full_results()
+    summary = db.get_dashboard_summary()
     col1, col2, col3 = st.columns(3)
-    total_completed = len(all_quotes)
-    total_sales = f"${all_quotes['sales_price'].sum():,.2f}" if not all_quotes.empty else "$0"
-    avg_profit = f"{all_quotes['profit_percentage'].mean():.1f}%" if not all_quotes.empty else "0%"
-    col1.metric("Total Completed Inquiries", total_completed)
-    col2.metric("Total Sales Potential", total_sales)
-    col3.metric("Avg. Profit Margin", avg_profit)
+    col1.metric("Total Completed Inquiries", summary['completed'])
+    col2.metric("Total Sales Potential", f"${summary['total_sales']:,.2f}")
+    col3.metric("Avg. Profit Margin", f"{summary['avg_profit_pct']:.1f}%")
+    st.caption(f"Running profit value: ${summary['total_profit']:,.2f}")
     st.markdown("---")
     c1, c2 = st.columns(2)
     with c1:
         st.subheader("Inquiry by Customer")
-        if not all_quotes.empty:
-            chart_data = all_quotes.groupby("customer_name")["sales_price"].sum()
-            st.bar_chart(chart_data, color="#2962FF") 
+        sales_by_customer = db.get_sales_by_customer()
+        if not sales_by_customer.empty:
+            st.bar_chart(sales_by_customer.set_index("customer_name")["sales_price"], color="#2962FF") 
         else:
             st.info("No sales data available.")
     with c2:
         st.subheader("Process Status")
-        inq_data = db.get_inquiries_by_status(["Pending Validation", "Ready for Costing", "Need Feasibility Check", "Waiting Approval", "Finished", "Needs Localization", "In Development"])
-        if not inq_data.empty:
-            status_counts = inq_data['status'].value_counts()
-            st.bar_chart(status_counts, color="#FF4B4B") 
+        status_counts = db.get_status_counts(["Pending Validation", "Ready for Costing", "Need Feasibility Check", "Waiting Approval", "Finished", "Needs Localization", "In Development"])
+        if not status_counts.empty:
+            st.bar_chart(status_counts.set_index("status")["inquiry_count"], color="#FF4B4B") 
         else:
             st.info("No transaction data.")
     st.subheader("Finished Transaction History")
-    if not all_quotes.empty:
-        display_df = all_quotes[['quote_id', 'customer_name', 'part_number', 'sales_price', 'status', 'leadtime']]
+    recent = db.get_recent_results(100)
+    if not recent.empty:
+        display_df = recent[['quote_id', 'customer_name', 'part_number', 'sales_price', 'status', 'leadtime']]
         st.dataframe(display_df, use_container_width=True)
+        if summary['completed'] > len(recent):
+            st.caption(f"Showing latest {len(recent)} of {summary['completed']} transactions.")
     else:
         st.info("No finished transactions yet.")
+    st.subheader("📈 Inquiry Trends")
+    t1, t2, t3 = st.columns(3)
+    grain = t1.selectbox("Period", ["month", "week", "day"], format_func=str.title)
+    trend_customer = t2.selectbox("Customer", ["All"] + CUSTOMER_LIST)
+    trend_start = t3.date_input("Since", value=date.today() - timedelta(days=365 * 2))
+    trend = db.get_inquiry_trend(grain, customer=None if trend_customer == "All" else trend_customer,
+                                 start=trend_start.strftime("%Y-%m-%d"))
+    if not trend.empty:
+        trend = trend.set_index("period")
+        g1, g2 = st.columns(2)
+        with g1:
+            st.caption("Volume: Inquiry → Quote → PO")
+            st.line_chart(trend[['inquiries', 'quoted', 'po_created']])
+        with g2:
+            st.caption("Conversion Rate (Quote / Inquiry, PO / Quote)")
+            st.line_chart(trend[['quote_rate', 'po_rate']])
+        st.caption("Revisions")
+        st.bar_chart(trend['revisions'], color="#FFA000")
+    else:
+        st.info("No inquiries in this period.")
+    with st.expander("🔍 Reconcile Aggregates"):
+        st.caption("Bandingkan tabel agregat & rollup dashboard dengan rekap penuh dari quotations & inquiries.")
+        if st.button("Run Reconciliation"):
+            mismatches = db.reconcile_dashboard(repair=True) + db.reconcile_rollups(repair=True)
+            if mismatches:
+                st.warning(f"{len(mismatches)} mismatches found and repaired.")
+                st.dataframe(pd.DataFrame(mismatches).astype({'key': str}), use_container_width=True)
+            else:
+                st.success("Aggregates match the full recomputation.")
 
 # ================= MENU: MASTER DATA PARTS =================
 elif menu == "🛠️ Master Data Parts":
     st.title("🛠️ Master Data Parts")
-    tab1, tab2, tab3 = st.tabs(["View Master Data", "Add New Part", "🌏 Sales Price Comparison"])
+    tab1, tab2, tab3, tab4 = st.tabs(["View Master Data", "Add New Part", "🌏 Sales Price Comparison", "📤 Bulk Upload"])
     
     with tab1:
         st.write("Daftar lengkap Parts dengan kalkulasi standar (Profit 10%).")
-        df_parts = db.get_all_parts()
+        df_parts = browse_parts_page("view")
         if not df_parts.empty:
-            calc_data = df_parts['cost_price'].apply(lambda x: pd.Series(calculate_financials(x)))
+            calc_data = calculate_financials_bulk(df_parts['cost_price'], 10.0)
             # Drop kolom harga region agar tidak penuh, fokus di tab comparison
             cols_to_drop = ['price_bkc', 'price_prpd', 'price_kipl', 'price_ksc', 'price_kac']
             df_parts_clean = df_parts.drop(columns=cols_to_drop, errors='ignore')
@@ -158,39 +288,65 @@ elif menu == "🛠️ Master Data Parts":
         st.subheader("Regional Sales Price Comparison")
         st.info("Komparasi harga 'KI' (Standard Profit 10%) dengan Region lain.")
         
-        df_comp = db.get_all_parts()
+        df_comp = browse_parts_page("comp")
         if not df_comp.empty:
-            # Hitung harga KI standar (Profit 10%)
-            df_comp['KI (Std)'] = df_comp['cost_price'].apply(lambda x: calculate_financials(x, 10.0)['Sales Price'])
+            # Harga KI standar (Profit 10%) & harga region diambil dari tabel benchmark (precomputed)
+            df_comp = df_comp[['part_number', 'description']].join(db.get_benchmarks(df_comp['part_number']), on='part_number')
             
             # Rename kolom supaya sesuai requirement
             rename_map = {
                 'part_number': 'Part Number',
                 'description': 'Description',
-                'KI (Std)': 'KI',
+                'ki_std_price': 'KI',
                 'price_bkc': 'BKC',
                 'price_prpd': 'PRPD',
                 'price_kipl': 'KIPL',
                 'price_ksc': 'KSC',
-                'price_kac': 'KAC'
+                'price_kac': 'KAC',
+                'region_mean': 'Region Avg'
             }
-            cols_show = ['Part Number', 'Description', 'KI', 'BKC', 'PRPD', 'KIPL', 'KSC', 'KAC']
+            cols_show = ['Part Number', 'Description', 'KI', 'BKC', 'PRPD', 'KIPL', 'KSC', 'KAC', 'Region Avg']
             
             df_show = df_comp.rename(columns=rename_map)[cols_show]
             
-            # Styling: Highlight jika KI lebih murah (Green) atau Mahal (Red) dibanding rata-rata region
+            # Styling: Highlight jika KI lebih murah (Green) dibanding rata-rata region
             def highlight_ki(row):
-                avg_region = (row['BKC'] + row['PRPD'] + row['KIPL'] + row['KSC'] + row['KAC']) / 5
-                if row['KI'] < avg_region:
+                if df_comp.loc[row.name, 'is_competitive'] == 1:
                     return ['background-color: #d4edda']*len(row) # Greenish
                 else:
                     return ['']*len(row)
 
-            st.dataframe(df_show, use_container_width=True)
+            st.dataframe(df_show.style.apply(highlight_ki, axis=1), use_container_width=True)
             st.caption("*KI Price calculated based on standard 10% Profit Formula.")
         else:
             st.warning("No data.")
 
+    with tab4:
+        st.subheader("Bulk Upload Parts Master")
+        st.caption("Kolom wajib: part_number, description, unit, stock_on_hand, item_type, cost_price. "
+                   "Kolom opsional: price_bkc, price_prpd, price_kipl, price_ksc, price_kac (angka >= 0; sel kosong = harga lama / di-generate untuk part baru). Part yang sudah ada akan di-update.")
+        upload = st.file_uploader("CSV / Parquet file", type=["csv", "parquet"])
+        if upload is not None and st.button("Start Import"):
+            file_format = "parquet" if upload.name.lower().endswith(".parquet") else "csv"
+            try:
+                with st.spinner("Importing..."):
+                    result = db.bulk_import_parts(upload, file_format)
+            except (ValueError, ImportError) as e:
+                st.error(f"Import gagal, tidak ada data yang disimpan: {e}")
+            else:
+                m1, m2, m3, m4 = st.columns(4)
+                m1.metric("Rows Read", f"{result['rows_read']:,}")
+                m2.metric("Upserted", f"{result['rows_upserted']:,}")
+                m3.metric("Rejected", f"{len(result['rejects']):,}")
+                m4.metric("Throughput", f"{result['rows_per_sec']:,.0f} rows/s")
+                if result['rejects']:
+                    df_rejects = pd.DataFrame(result['rejects'])
+                    st.warning("Beberapa baris ditolak:")
+                    st.dataframe(df_rejects.head(1000), use_container_width=True)
+                    st.download_button("Download Reject Report", df_rejects.to_csv(index=False), "reject_report.csv", "text/csv")
+                else:
+                    st.success("Semua baris berhasil di-import.")
+
 # ================= MENU: CUSTOMER PORTAL =================
 elif menu == "🌏 Customer Inquiry Portal":
     st.title("🌏 Customer Portal")
@@ -199,14 +355,19 @@ elif menu == "🌏 Customer Inquiry Portal":
     tab1, tab2, tab3 = st.tabs(["📝 Submit New Inquiry", "📋 My Inquiries (Cancel)", "🧾 Create PO"])
     with tab1:
         st.subheader(f"New Inquiry Request for {selected_customer}")
-        parts_list = db.get_all_parts()['part_number'].tolist()
+        search_text = st.text_input("🔍 Search Part Number / Description", placeholder="e.g. 708-2L or hydraulic pump")
+        found_parts = db.search_parts(search_text, limit=20)
+        part_labels = dict(zip(found_parts['part_number'], found_parts['description']))
         with st.form("cust_form"):
             c1, c2 = st.columns(2)
-            part_select = c1.selectbox("Select Part Number", parts_list)
+            part_select = c1.selectbox("Select Part Number", list(part_labels), format_func=lambda pn: f"{pn} - {part_labels[pn]}")
             qty_req = c2.number_input("Quantity Required", min_value=1)
-            if st.form_submit_button("Send Inquiry Request"):
-                db.add_inquiry(selected_customer, part_select, qty_req, "Pending Validation")
-                st.success(f"Inquiry sent for {part_select}!")
+            if st.form_submit_button("Send Inquiry Request", disabled=not part_labels):
+                try:
+                    workflow.submit_inquiry(selected_customer, part_select, qty_req)
+                    st.success(f"Inquiry sent for {part_select}!")
+                except WorkflowError as e:
+                    st.error(str(e))
     with tab2:
         st.subheader("Active Inquiries")
         my_inquiries = db.get_inquiries_by_customer(selected_customer)
@@ -216,8 +377,11 @@ elif menu == "🌏 Customer Inquiry Portal":
                 with st.expander(f"Req #{row['id']}: {row['part_number']} - {row['status']}"):
                     st.write(f"Date: {row['date']} | Qty: {row['qty']}")
                     if st.button("❌ Cancel Request", key=f"cncl_{row['id']}"):
-                        db.cancel_inquiry(row['id'])
-                        st.rerun()
+                        try:
+                            workflow.cancel_inquiry(int(row['id']))
+                            st.rerun()
+                        except WorkflowError as e:
+                            st.error(str(e))
         else:
             st.info("No active inquiries found.")
     with tab3:
@@ -231,39 +395,63 @@ elif menu == "🌏 Customer Inquiry Portal":
                 po_num_input = st.text_input("Enter PO Number (e.g. PO-KMSI-001)")
                 if st.form_submit_button("Submit Purchase Order"):
                     inq_id_val = my_ready_quotes[my_ready_quotes['quote_id'] == q_id_select]['inquiry_id'].values[0]
-                    db.create_po(inq_id_val, po_num_input)
-                    st.balloons()
-                    st.success(f"PO {po_num_input} created successfully!")
-                    time.sleep(2)
-                    st.rerun()
+                    try:
+                        workflow.create_po(int(inq_id_val), po_num_input)
+                        st.balloons()
+                        st.success(f"PO {po_num_input} created successfully!")
+                        time.sleep(2)
+                        st.rerun()
+                    except WorkflowError as e:
+                        st.error(str(e))
         else:
             st.info("No approved quotations waiting for PO.")
 
 # ================= MENU: INQUIRY VALIDATION =================
 elif menu == "1. Inquiry Validation":
     st.title("📋 Inquiry Validation Process")
-    pending_items = db.get_inquiries_by_status(["Pending Validation"])
+    pending_items = db.get_inquiries_with_parts(["Pending Validation"])
+    if 'validation_batch_msg' in st.session_state:
+        st.success(st.session_state.pop('validation_batch_msg'))
     if pending_items.empty:
         st.info("No new inquiries to validate.")
     else:
+        # --- Batch validation: semua transisi status dalam 1 transaksi ---
+        with st.container(border=True):
+            st.markdown("#### Batch Validation")
+            batch_opts = {f"#{r['id']} {r['customer_name']} - {r['part_number']} ({r['item_type']})": (r['id'], r['item_type']) for i, r in pending_items.iterrows()}
+            batch_sel = st.multiselect("Select Inquiries", list(batch_opts), key="val_batch_sel")
+            bb1, bb2, bb3 = st.columns([2, 1, 3])
+            batch_action = None
+            if bb1.button("✅ Validate Selected (Local → Costing, Import → Localization)", disabled=not batch_sel):
+                batch_action = "validate"
+            if bb2.button("❌ Reject Selected", disabled=not batch_sel):
+                batch_action = "reject"
+            if batch_action:
+                decisions = [(inq_id, "reject" if batch_action == "reject" else workflow.default_decision(item_type))
+                             for inq_id, item_type in (batch_opts[label] for label in batch_sel)]
+                t0 = time.perf_counter()
+                changed = workflow.validate_inquiries(decisions)
+                st.session_state['validation_batch_msg'] = f"{changed} inquiries updated in {(time.perf_counter() - t0) * 1000:.1f} ms (1 transaction)."
+                st.session_state.pop("val_batch_sel", None)
+                st.rerun()
+
         for idx, row in pending_items.iterrows():
             with st.container(border=True):
                 c1, c2, c3 = st.columns([3, 1, 1])
-                part_detail = db.get_part_details(row['part_number'])
                 c1.markdown(f"**{row['customer_name']}** requesting **{row['part_number']}** ({row['qty']} pcs)")
-                c1.caption(f"Desc: {part_detail['description']} | Type: {part_detail['item_type']}")
-                if part_detail['item_type'] == "Local":
+                c1.caption(f"Desc: {row['description']} | Type: {row['item_type']}")
+                if row['item_type'] == "Local":
                     if c2.button("✅ Validate Local", key=f"v_{row['id']}"):
-                        db.update_inquiry_status(row['id'], "Ready for Costing")
+                        workflow.validate_inquiries([(row['id'], "costing")])
                         st.rerun()
                 else:
                     if c2.button("🛠️ Needs Localization", key=f"loc_{row['id']}"):
-                        db.update_inquiry_status(row['id'], "Needs Localization")
+                        workflow.validate_inquiries([(row['id'], "localization")])
                         st.success("Sent to Development Team.")
                         time.sleep(1)
                         st.rerun()
                     if c3.button("❌ Reject", key=f"r_{row['id']}"):
-                        db.update_inquiry_status(row['id'], "Cancelled")
+                        workflow.validate_inquiries([(row['id'], "reject")])
                         st.rerun()
 
 # ================= MENU: LOCALIZATION DEVELOPMENT =================
@@ -281,10 +469,12 @@ elif menu == "⚙️ Localization Development":
                     target_date = c2.date_input("Est. Completion Date")
                     notes = st.text_area("Development Notes")
                     if st.form_submit_button("Start Development Project"):
-                        db.start_localization(row['id'], row['part_number'], supplier_sel, str(target_date), notes)
-                        db.update_inquiry_status(row['id'], "In Development") 
-                        st.success("Project Started! Check 'On Progress' tab.")
-                        st.rerun()
+                        try:
+                            workflow.start_localization(int(row['id']), supplier_sel, target_date, notes)
+                            st.success("Project Started! Check 'On Progress' tab.")
+                            st.rerun()
+                        except WorkflowError as e:
+                            st.error(str(e))
         else:
             st.info("No new parts waiting for localization setup.")
     with tab_dev2:
@@ -295,24 +485,52 @@ elif menu == "⚙️ Localization Development":
                     st.write(f"Target Date: {row['target_finish_date']}")
                     st.info(f"Notes: {row['notes']}")
                     if st.button("✅ Finish Development & Release to Costing", key=f"fin_{row['project_id']}"):
-                        db.finish_localization(row['project_id'], row['inquiry_id'])
-                        st.success("Development Finished. Data moved to Cost Control.")
-                        time.sleep(1)
-                        st.rerun()
+                        try:
+                            workflow.finish_localization(int(row['project_id']), int(row['inquiry_id']))
+                            st.success("Development Finished. Data moved to Cost Control.")
+                            time.sleep(1)
+                            st.rerun()
+                        except WorkflowError as e:
+                            st.error(str(e))
         else:
             st.info("No active development projects.")
 
 # ================= MENU: COST & PROCUREMENT =================
 elif menu == "2. Cost & Procurement":
     st.title("💰 Cost Control & Procurement")
-    tasks = db.get_inquiries_by_status(["Ready for Costing", "Revise Required"])
+    tasks = db.get_inquiries_with_parts(["Ready for Costing", "Revise Required"])
     
     if not tasks.empty:
+        ai = get_procurement_ai()
+        trainer = get_model_trainer()
+        if st.button(f"🤖 AI Pre-fill All Pending Tasks ({len(tasks)})"):
+            # Satu kali predict untuk semua task, bukan 1 predict per task
+            moqs, lts = ai.predict_many(tasks['cost_price'].fillna(0), tasks['item_type'], tasks['stock_on_hand'].fillna(0), tasks['customer_name'])
+            st.session_state['ai_prefill'] = {int(i): (int(m), int(l)) for i, m, l in zip(tasks['id'], moqs, lts)}
+            st.success(f"MOQ & Leadtime pre-filled for {len(tasks)} tasks.")
+        ai_prefill = st.session_state.get('ai_prefill', {})
+        with st.expander("🧠 AI Model (trained from approved quotations)"):
+            info = ai.train_info
+            if info['source'] == "history":
+                st.write(f"Model **{info['version']}** · {info['rows']} rows · {info['customers']} customers · {info['trees']} trees "
+                         f"({info['mode']}) · fit {info['seconds']}s · data {info['data_mb']} MB · peak RSS {info['peak_rss_mb']} MB · {info['trained_at']}")
+            else:
+                st.write("Model masih memakai data sintetik (history approval belum cukup).")
+            st.caption(f"{trainer.pending_approvals()} new approvals since last training "
+                       f"(auto retrain every {trainer.min_new_approvals}).")
+            pcache = ai.prediction_cache_stats()
+            st.caption(f"Prediction cache hit rate {pcache['hit_rate']:.0%} ({pcache['hits']} hits, {pcache['misses']} misses, "
+                       f"{pcache['entries']} entries, {pcache['evictions']} evicted)")
+            if trainer.last_error:
+                st.warning(trainer.last_error)
+            if st.button("🔁 Retrain Now"):
+                trainer.wake(force=True)
+                st.info("Retraining in background; the new model is swapped in when done.")
+
         task_opts = {f"ID {r['id']} - {r['part_number']} ({r['customer_name']})": r['id'] for i, r in tasks.iterrows()}
         sel_label = st.selectbox("Select Task", list(task_opts.keys()))
         sel_id = task_opts[sel_label]
-        inquiry = tasks[tasks['id'] == sel_id].iloc[0]
-        part = db.get_part_details(inquiry['part_number'])
+        inquiry = tasks[tasks['id'] == sel_id].iloc[0] # Sudah memuat cost, item_type & stock part (JOIN)
         
         if inquiry['revision_count'] > 0:
             st.warning(f"⚠️ REVISION REQUESTED (Rev: {inquiry['revision_count']})")
@@ -320,66 +538,79 @@ elif menu == "2. Cost & Procurement":
         with st.form("cost_form"):
             c1, c2 = st.columns(2)
             c1.markdown("### Costing")
-            cost_in = c1.number_input("Cost Price ($)", value=part['cost_price'])
+            cost_in = c1.number_input("Cost Price ($)", value=inquiry['cost_price'])
             profit_in = c1.slider("Profit (%)", 5.0, 50.0, 10.0)
             fin = calculate_financials(cost_in, profit_in)
             c1.info(f"SDC: ${fin['SDC']} | SVC: ${fin['SVC']} | **Sales Price: ${fin['Sales Price']}**")
             
             # --- FITUR BARU: REGIONAL BENCHMARK DI COSTING ---
             st.markdown("### 🌏 Regional Price Benchmark")
-            comp_data = {
-                'Region': ['KI (You)', 'BKC', 'PRPD', 'KIPL', 'KSC', 'KAC'],
-                'Price': [fin['Sales Price'], part['price_bkc'], part['price_prpd'], part['price_kipl'], part['price_ksc'], part['price_kac']]
-            }
-            df_chart = pd.DataFrame(comp_data)
-            st.bar_chart(df_chart.set_index('Region'), color="#2962FF")
-            
-            # Highlight jika harga KI terlalu tinggi
-            avg_market = sum(comp_data['Price'][1:]) / 5
-            if fin['Sales Price'] > avg_market:
-                st.warning(f"⚠️ Warning: Your price (${fin['Sales Price']}) is higher than market average (${avg_market:.2f}). Consider lowering profit.")
+            bench = db.get_benchmark(inquiry['part_number'])
+            if bench is None:
+                st.info("No regional benchmark for this part yet (regional prices not imported).")
             else:
-                st.success(f"✅ Competitive: Your price is below market average (${avg_market:.2f}).")
+                comp_data = {
+                    'Region': ['KI (You)', 'BKC', 'PRPD', 'KIPL', 'KSC', 'KAC'],
+                    'Price': [fin['Sales Price'], bench['price_bkc'], bench['price_prpd'], bench['price_kipl'], bench['price_ksc'], bench['price_kac']]
+                }
+                df_chart = pd.DataFrame(comp_data)
+                st.bar_chart(df_chart.set_index('Region'), color="#2962FF")
+
+                # Highlight jika harga KI terlalu tinggi
+                avg_market = bench['region_mean']
+                if fin['Sales Price'] > avg_market:
+                    st.warning(f"⚠️ Warning: Your price (${fin['Sales Price']}) is higher than market average (${avg_market:.2f}). Consider lowering profit.")
+                else:
+                    st.success(f"✅ Competitive: Your price is below market average (${avg_market:.2f}).")
             # ------------------------------------------------
             
             c2.markdown("### Procurement")
             if c2.form_submit_button("🤖 AI Predict"):
-                moq, lt = ai.predict(cost_in, part['item_type'], part['stock_on_hand'])
+                moq, lt = ai.predict(cost_in, inquiry['item_type'], inquiry['stock_on_hand'], inquiry['customer_name'])
                 st.session_state['ai_res'] = (moq, lt)
-            ai_vals = st.session_state.get('ai_res', (50, 30))
+                ai_prefill[int(sel_id)] = (moq, lt)
+            ai_vals = ai_prefill.get(int(sel_id), st.session_state.get('ai_res', (50, 30)))
             moq_in = c2.number_input("MOQ", value=ai_vals[0])
             lt_in = c2.number_input("Leadtime (Days)", value=ai_vals[1])
             
             if st.form_submit_button("Submit to Superior"):
-                q_data = {
-                    "quote_id": f"Q-{random.randint(10000,99999)}",
-                    "inquiry_id": int(sel_id),
-                    "customer": inquiry['customer_name'],
-                    "part_number": inquiry['part_number'],
-                    "sales_price": fin['Sales Price'],
-                    "profit": profit_in,
-                    "cost": cost_in,
-                    "sdc": fin['SDC'],
-                    "svc": fin['SVC'],
-                    "moq": moq_in,
-                    "leadtime": lt_in,
-                    "status": "Draft"
-                }
-                db.create_quotation(q_data)
-                db.update_inquiry_status(sel_id, "Waiting Approval")
-                st.success("Draft submitted.")
-                st.rerun()
+                try:
+                    workflow.submit_quotation(int(sel_id), profit_in, moq_in, lt_in, cost=cost_in)
+                    st.success("Draft submitted.")
+                    st.rerun()
+                except WorkflowError as e:
+                    st.error(str(e))
     else:
         st.info("No pending costing tasks.")
 
 # ================= MENU: SUPERIOR APPROVAL =================
 elif menu == "3. Superior Approval":
     st.title("✅ Superior Approval")
-    drafts = db.get_quotations_by_status("Draft")
+    drafts = db.get_quotations_with_benchmarks("Draft")
+    if 'approval_batch_msg' in st.session_state:
+        st.success(st.session_state.pop('approval_batch_msg'))
     
     if not drafts.empty:
+        # --- Batch approval (mis. closing akhir bulan): 1 transaksi untuk semua quote terpilih ---
+        with st.container(border=True):
+            st.markdown("#### Batch Approval")
+            select_all = st.checkbox(f"Select all drafts ({len(drafts)})", key="ap_batch_all")
+            batch_sel = st.multiselect("Select Quotations", drafts['quote_id'].tolist(),
+                                       default=drafts['quote_id'].tolist() if select_all else None, key=f"ap_batch_sel_{select_all}")
+            bb1, bb2, bb3 = st.columns([1, 1, 3])
+            batch_action = None
+            if bb1.button("✅ APPROVE Selected", disabled=not batch_sel):
+                batch_action = ("Approved", workflow.approve_quotations)
+            if bb2.button("❌ REVISE Selected", disabled=not batch_sel):
+                batch_action = ("Revised", workflow.revise_quotations)
+            if batch_action:
+                t0 = time.perf_counter()
+                changed = batch_action[1](batch_sel)
+                st.session_state['approval_batch_msg'] = f"{changed} quotations {batch_action[0].lower()} in {(time.perf_counter() - t0) * 1000:.1f} ms (1 transaction)."
+                st.rerun()
+
         for i, row in drafts.iterrows():
-            with st.expander(f"APPROVAL NEEDED: Quote {row['quote_id']} - {row['customer_name']}", expanded=True):
+            with st.expander(f"APPROVAL NEEDED: Quote {row['quote_id']} - {row['customer_name']}", expanded=len(drafts) <= 10):
                 col_d1, col_d2, col_d3 = st.columns(3)
                 col_d1.markdown("#### Item Info")
                 col_d1.write(f"Part: **{row['part_number']}**")
@@ -396,19 +627,18 @@ elif menu == "3. Superior Approval":
                 # --- FITUR BARU: BENCHMARK DI APPROVAL ---
                 st.divider()
                 st.markdown("#### 🌏 Market Price Comparison")
-                # Ambil data parts untuk compare
-                part_master = db.get_part_details(row['part_number'])
-                
                 # Buat Dataframe compare simple
                 bench_data = {
-                    'Entity': ['KI (Proposed)', 'BKC', 'PRPD', 'KIPL', 'KSC', 'KAC'],
+                    'Entity': ['KI (Proposed)', 'KI (Std 10%)', 'BKC', 'PRPD', 'KIPL', 'KSC', 'KAC', 'Region Avg'],
                     'Price ($)': [
                         row['sales_price'], 
-                        part_master['price_bkc'], 
-                        part_master['price_prpd'], 
-                        part_master['price_kipl'], 
-                        part_master['price_ksc'], 
-                        part_master['price_kac']
+                        row['ki_std_price'],
+                        row['price_bkc'], 
+                        row['price_prpd'], 
+                        row['price_kipl'], 
+                        row['price_ksc'], 
+                        row['price_kac'],
+                        row['region_mean']
                     ]
                 }
                 st.dataframe(pd.DataFrame(bench_data).T, use_container_width=True)
@@ -417,13 +647,11 @@ elif menu == "3. Superior Approval":
                 st.divider()
                 b1, b2 = st.columns(2)
                 if b1.button("✅ APPROVE", key=f"ap_{row['quote_id']}"):
-                    db.update_quotation_status(row['quote_id'], "Approved")
-                    db.update_inquiry_status(row['inquiry_id'], "Finished") 
+                    workflow.approve_quotations([row['quote_id']])
                     st.success("Approved!")
                     st.rerun()
                 if b2.button("❌ REVISE", key=f"rv_{row['quote_id']}"):
-                    db.update_quotation_status(row['quote_id'], "Rejected")
-                    db.update_inquiry_status(row['inquiry_id'], "Revise Required", increment_revision=True)
+                    workflow.revise_quotations([row['quote_id']])
                     st.error("Sent back for revision.")
                     st.rerun()
     else:
@@ -432,9 +660,42 @@ elif menu == "3. Superior Approval":
 # ================= MENU: RESULT & EMAIL =================
 elif menu == "4. Result & Email":
     st.title("📧 Result & Customer Notification")
-    approved = db.get_quotations_by_status("Approved")
+    approved = db.get_quotations_with_benchmarks("Approved")
     if not approved.empty:
-        st.dataframe(approved[['quote_id', 'customer_name', 'part_number', 'sales_price', 'status']])
+        # Terkirim = email_outbox sudah Sent; email Failed dihitung belum terkirim (bisa masuk digest lagi)
+        approved['emailed'] = approved['email_status'] == 'Sent'
+        st.dataframe(approved[['quote_id', 'customer_name', 'part_number', 'sales_price', 'status', 'emailed', 'email_status']])
+
+        # --- PDF quotation: di-render sekali lalu disimpan di cache disk (quote_id + content hash) ---
+        if st.button("📄 Generate All PDFs"):
+            t0 = time.perf_counter()
+            _, pdf_stats = render_quotation_pdfs([quote_record(r) for r in approved.to_dict('records')])
+            st.success(f"{pdf_stats['rendered']} PDFs rendered, {pdf_stats['cached']} already cached "
+                       f"({(time.perf_counter() - t0) * 1000:.0f} ms).")
+
+        # --- Bulk: 1 email digest per customer untuk semua quotation yang belum dikirim ---
+        st.subheader("📨 Send All Approved (Digest per Customer)")
+        unsent = approved[approved['email_status'].isna() | (approved['email_status'] == 'Failed')]
+        if unsent.empty:
+            st.info("All approved quotations have been emailed or are queued.")
+        else:
+            st.write(f"**{len(unsent)}** unsent quotations for **{unsent['customer_name'].nunique()}** customers.")
+            email_df = st.data_editor(pd.DataFrame({'customer_name': sorted(unsent['customer_name'].unique()), 'email': "purchasing@customer.com"}),
+                                      disabled=['customer_name'], hide_index=True, key="digest_emails")
+            email_map = dict(zip(email_df['customer_name'], email_df['email']))
+            if st.button("📨 Send All as Digest"):
+                t0 = time.perf_counter()
+                try:
+                    queued = db.enqueue_digest_emails(iter_customer_digests(unsent, email_map.get))
+                except ValueError as e:
+                    st.error(str(e))
+                else:
+                    mailer.wake()
+                    st.success(f"{len(queued)} digest emails queued covering {sum(n for _, n in queued)} quotations "
+                               f"in {(time.perf_counter() - t0) * 1000:.1f} ms.")
+                    time.sleep(1)
+                    st.rerun()
+
         st.subheader("Compose Email")
         q_sel = st.selectbox("Select Quote", approved['quote_id'].tolist())
         if q_sel:
@@ -453,8 +714,71 @@ elif menu == "4. Result & Email":
             Komatsu AMI
             """
             st.text_area("Preview", body, height=200)
+            pdf_path = get_quotation_pdf(quote_record(q_data))
+            with open(pdf_path, "rb") as f:
+                st.download_button("📄 Download PDF", f.read(), file_name=f"Quotation_{q_sel}.pdf", mime="application/pdf")
+            attach_pdf = st.checkbox("Attach PDF", value=True)
             if st.button("Send Email"):
-                success, msg = send_quotation_email_simulation(recipient_email, q_sel, "OFFER")
-                st.success(f"Email sent to {recipient_email}!")
+                email_id = db.enqueue_email(recipient_email, f"Quotation {q_sel} - OFFER", body, quote_id=q_sel,
+                                            attachment_path=pdf_path if attach_pdf else None)
+                mailer.wake()
+                st.success(f"Email to {recipient_email} queued (#{email_id}). Check Delivery Status below.")
     else:
         st.info("No approved quotations available.")
+
+    st.subheader("📬 Delivery Status")
+    status_counts = dict(db.get_email_status_counts().values.tolist())
+    d1, d2, d3, d4, d5 = st.columns(5)
+    d1.metric("Queued", status_counts.get("Queued", 0))
+    d2.metric("Sending", status_counts.get("Sending", 0))
+    d3.metric("Sent", status_counts.get("Sent", 0))
+    d4.metric("Failed", status_counts.get("Failed", 0))
+    if d5.button("🔁 Retry Failed", disabled=not status_counts.get("Failed")):
+        db.requeue_emails(("Failed",))
+        mailer.wake()
+        st.rerun()
+    if d5.button("🔄 Refresh"):
+        st.rerun()
+    outbox = db.get_email_outbox()
+    if not outbox.empty:
+        st.dataframe(outbox[['id', 'quote_id', 'to_email', 'subject', 'status', 'attempts', 'last_error', 'created_at', 'sent_at']], use_container_width=True)
+
+# ================= MENU: PERFORMANCE =================
+elif menu == "⏱ Performance":
+    st.title("⏱ Performance")
+    st.caption(f"Latency per operation from the last {recorder.max_samples:,} samples, shared by all sessions in this process. "
+               "Pages that end in a rerun are not timed.")
+    layer = st.selectbox("Layer", ["All", "page.", "db.", "ai.", "pricing."])
+    perf_stats = recorder.stats(None if layer == "All" else layer)
+    if perf_stats.empty:
+        st.info("No samples yet. Open a few pages first.")
+    else:
+        st.dataframe(perf_stats, use_container_width=True, hide_index=True)
+        st.bar_chart(perf_stats.head(15).set_index('name')['p95_ms'])
+
+    p1, p2 = st.columns(2)
+    if p1.button("🧪 Profile Next Rerun"):
+        st.session_state["profile_next_run"] = True
+        st.info("The next rerun (any page) is captured with cProfile.")
+    if p2.button("🗑️ Reset Samples"):
+        recorder.reset()
+        st.rerun()
+    last_profile = st.session_state.get("last_profile")
+    if last_profile:
+        st.subheader(f"cProfile · {last_profile['page']} · {last_profile['at']}")
+        if last_profile.get("note"):
+            st.caption(last_profile["note"])
+        st.code(last_profile["text"])
+
+recorder.record(f"page.{menu}", (time.perf_counter() - page_start) * 1000)
+if profiler is not None:
+    st.session_state["last_profile"] = dict(st.session_state.pop("active_profiler")[1], text=profiler.stop())
+
+# ================= FIRST PAINT =================
+# Waktu 1 script run (import + init + render halaman); run pertama di proses = cold, sisanya warm
+paint_ms = round((time.perf_counter() - _RUN_START) * 1000, 1)
+page_stats = startup["pages"].setdefault(menu, {"cold_ms": paint_ms, "warm_ms": None, "runs": 0})
+page_stats["runs"] += 1
+if page_stats["runs"] > 1:
+    page_stats["warm_ms"] = paint_ms
+st.session_state.setdefault("first_paint_ms", paint_ms)
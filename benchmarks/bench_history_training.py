@@ -0,0 +1,67 @@
+"""Training ProcurementAI dari history quotation Approved: refit penuh vs warm start.
+
+Mengisi N quotation Approved sintetis (pola MOQ / leadtime mirip data sintetik lama + efek customer),
+lalu melaporkan waktu fit, ukuran data & peak RSS dari train_info.
+
+Jalankan dari root repo:  python -m benchmarks.bench_history_training [--quotes 100000]
+"""
+import argparse
+import os
+import tempfile
+
+import numpy as np
+
+from modules.ai_predictor import ProcurementAI
+from modules.database_manager import DatabaseManager
+
+CUSTOMERS = ['KMSI', 'KCIC', 'KPAC', 'KMM', 'KME', 'KEPO', 'KAC', 'KMSA', 'KSAF', 'KLTD']
+
+
+def fill_history(db, n, seed=42, offset=0):
+    rng = np.random.default_rng(seed + offset)
+    parts = db.get_all_parts()[['part_number', 'cost_price', 'item_type', 'stock_on_hand']]
+    idx = rng.integers(0, len(parts), n)
+    sel = parts.iloc[idx]
+    customer_idx = rng.integers(0, len(CUSTOMERS), n)
+    is_import = (sel['item_type'] == "Import").to_numpy()
+    moq = np.maximum(10, np.round((1000 / (sel['cost_price'].to_numpy() + 1) + is_import * 50 + customer_idx * 5) / 10) * 10)
+    leadtime = np.maximum(3, np.rint(7 + is_import * 60 - sel['stock_on_hand'].to_numpy() * 0.1 + rng.normal(0, 3, n)))
+    rows = zip([f"H-{offset + i:08d}" for i in range(n)], [CUSTOMERS[c] for c in customer_idx], sel['part_number'].tolist(),
+               sel['cost_price'].tolist(), moq.astype(int).tolist(), leadtime.astype(int).tolist())
+    with db._cursor("quotations") as c:
+        c.execute("BEGIN IMMEDIATE")
+        c.executemany("""INSERT INTO quotations (quote_id, customer_name, part_number, sales_price, profit_percentage,
+                                                 cost_price, sdc, svc, moq, leadtime, status)
+                         VALUES (?, ?, ?, 0, 10, ?, 0, 0, ?, ?, 'Approved')""", rows)
+
+
+def report(label, info):
+    print(f"{label:<28}{info['mode']:>11}{info['rows']:>9,}{info['trees']:>7}{info['seconds']:>9.2f}"
+          f"{info['data_mb']:>9.1f}{info['peak_rss_mb'] or 0:>10.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--quotes", type=int, default=100_000)
+    parser.add_argument("--refresh", type=int, default=5_000, help="approval baru sebelum warm start")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, "history.db"))
+        db.populate_dummy_data()
+        fill_history(db, args.quotes)
+        ai = ProcurementAI()
+
+        print(f"{'step':<28}{'mode':>11}{'rows':>9}{'trees':>7}{'fit s':>9}{'data MB':>9}{'peak RSS':>10}")
+        report("initial (full)", ai.train_from_history(db.iter_training_history(), approvals=args.quotes))
+        fill_history(db, args.refresh, offset=args.quotes)
+        report(f"+{args.refresh:,} approvals (warm)", ai.train_from_history(db.iter_training_history(), warm_start_trees=10))
+        ai.train_info["source"] = "synthetic" # Paksa refit penuh pada data yang sama sebagai pembanding
+        report(f"+{args.refresh:,} approvals (full)", ai.train_from_history(db.iter_training_history()))
+        ai.save_history(tmp)
+        print(f"history artifact: {os.path.getsize(os.path.join(tmp, 'procurement_ai_history.joblib')) / 1e6:.1f} MB")
+        db.pool.close_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Backend inference ProcurementAI: sklearn RandomForestRegressor.predict vs CompiledForest (array NumPy).
+
+Melaporkan latency 1 baris (cache dimatikan -> selalu hit model), latency batch, ukuran model di memory,
+dan memastikan hasil kedua backend identik bit per bit (raw prediksi forest & MOQ / Leadtime final).
+
+Jalankan dari root repo:  python -m benchmarks.bench_inference_backend [--rows 20000] [--history 0]
+(--history N: training dari N baris history sintetik -> tree lebih dalam, seperti model production)
+"""
+import argparse
+import pickle
+import time
+
+import numpy as np
+import pandas as pd
+
+from modules.ai_predictor import COMPILED_MAX_BATCH, FEATURES, ProcurementAI
+from modules.forest_inference import CompiledForest
+
+
+def per_call_us(fn, calls):
+    start = time.perf_counter()
+    for args in calls:
+        fn(*args)
+    return (time.perf_counter() - start) / len(calls) * 1e6
+
+
+def history_chunks(n, seed=42):
+    rng = np.random.default_rng(seed)
+    cost = np.round(rng.uniform(10, 1000, n), 2)
+    is_import = rng.integers(0, 2, n)
+    stock = rng.integers(0, 200, n)
+    customer = rng.choice(['KMSI', 'KCIC', 'KPAC', 'KMM', 'KEPO'], n)
+    yield pd.DataFrame({
+        'cost_price': cost, 'item_type': np.where(is_import, "Import", "Local"), 'stock_on_hand': stock,
+        'customer_name': customer,
+        'moq': np.maximum(10, np.round((1000 / (cost + 1) + is_import * 50) / 10) * 10),
+        'leadtime': np.maximum(3, np.rint(7 + is_import * 60 - stock * 0.1 + rng.normal(0, 3, n))),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20_000, help="jumlah baris untuk cek parity & batch")
+    parser.add_argument("--calls", type=int, default=200, help="jumlah predict 1 baris per backend")
+    parser.add_argument("--history", type=int, default=0)
+    args = parser.parse_args()
+
+    ai = {name: ProcurementAI(cache_size=0, backend=name) for name in ("sklearn", "compiled")}
+    for model in ai.values():
+        if args.history:
+            model.train_from_history(history_chunks(args.history))
+        else:
+            model.train_model()
+
+    rng = np.random.default_rng(7)
+    X = np.column_stack([np.round(rng.uniform(-50, 1200, args.rows), 2), rng.integers(0, 2, args.rows),
+                         rng.integers(-10, 250, args.rows), rng.integers(-1, 5, args.rows)]).astype(float)
+    forests = (ai["sklearn"].model_moq, ai["sklearn"].model_leadtime)
+    compiled = [CompiledForest.from_sklearn(f) for f in forests]
+    raw_equal = all(np.array_equal(f.predict(pd.DataFrame(X, columns=FEATURES)), c.predict(X))
+                    for f, c in zip(forests, compiled))
+
+    items = list(zip(X[:, 0].tolist(), np.where(X[:, 1] == 1, "Import", "Local").tolist(), X[:, 2].astype(int).tolist()))
+    final = {name: model.predict_many(*zip(*items)) for name, model in ai.items()}
+    final_equal = all(np.array_equal(a, b) for a, b in zip(final["sklearn"], final["compiled"]))
+
+    for label, forest, c in zip(("MOQ", "Leadtime"), forests, compiled):
+        print(f"{label:<9}trees {forest.n_estimators}, nodes {len(c.value):,}, max depth {c.max_depth}")
+    print(f"parity ({args.rows:,} rows): raw forest {'identical' if raw_equal else 'DIFFERENT'}, "
+          f"MOQ/Leadtime {'identical' if final_equal else 'DIFFERENT'}")
+
+    sklearn_mb = len(pickle.dumps((ai["sklearn"].model_moq, ai["sklearn"].model_leadtime))) / 1e6
+    compiled_mb = sum(c.nbytes for c in ai["compiled"]._active[4]) / 1e6
+    print(f"model memory: sklearn {sklearn_mb:.2f} MB (pickle), compiled arrays {compiled_mb:.2f} MB")
+
+    single = items[:args.calls]
+    batch = items[:COMPILED_MAX_BATCH]
+    # Batch > COMPILED_MAX_BATCH selalu lewat sklearn (lebih cepat untuk ribuan baris)
+    print(f"{'backend':<10}{'1 row us':>12}{f'{len(batch)} rows us/row':>18}{f'{len(items)} rows us/row':>20}")
+    for name, model in ai.items():
+        single_us = per_call_us(model.predict, single)
+        batch_us = per_call_us(model.predict_many, [tuple(zip(*batch))]) / len(batch)
+        full_us = per_call_us(model.predict_many, [tuple(zip(*items))]) / len(items)
+        print(f"{name:<10}{single_us:>12.1f}{batch_us:>18.2f}{full_us:>20.2f}")
+
+
+if __name__ == "__main__":
+    main()
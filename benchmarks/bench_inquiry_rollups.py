@@ -0,0 +1,110 @@
+"""Time-series inquiry: baca dari rollup (day/week/month) vs GROUP BY langsung di tabel inquiries.
+
+Mengisi N inquiry sintetis (default 10 juta, tersebar beberapa tahun) dengan trigger rollup aktif,
+lalu membandingkan query trend dan mengecek rekonsiliasi rollup vs rekap penuh.
+
+Jalankan dari root repo:  python -m benchmarks.bench_inquiry_rollups [--rows 10000000] [--years 5]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from modules.database_manager import DatabaseManager, ROLLUP_GRAINS, _full_rollup_sql
+
+STATUSES = ["Pending Validation", "Ready for Costing", "Waiting Approval", "Finished", "PO Created",
+            "Revise Required", "Cancelled"]
+
+
+def fill_inquiries(db, rows, years, customers, chunk=1_000_000):
+    """Insert lewat recursive CTE di SQLite (tanpa round-trip Python per baris)"""
+    status_case = " ".join(f"WHEN {i} THEN '{s}'" for i, s in enumerate(STATUSES))
+    days = int(years * 365)
+    for offset in range(0, rows, chunk):
+        n = min(chunk, rows - offset)
+        with db._cursor("inquiries") as c:
+            c.execute("BEGIN IMMEDIATE")
+            c.execute(f"""WITH RECURSIVE seq(k) AS (SELECT 0 UNION ALL SELECT k + 1 FROM seq WHERE k < {n - 1})
+                          INSERT INTO inquiries (date, customer_name, part_number, qty, status, revision_count)
+                          SELECT date('now', '-' || ((k + {offset}) * 7919 % {days}) || ' days'),
+                                 'CUST-' || ((k + {offset}) * 48271 % 2147483647 % {customers}), '101-22-3331', 1 + k % 50,
+                                 CASE (k + {offset}) * 13 % {len(STATUSES)} {status_case} END, (k + {offset}) % 3
+                          FROM seq""")
+
+
+def timed(fn, repeat=3):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def raw_trend(db, grain, customer=None, start=None):
+    """Versi tanpa rollup: GROUP BY langsung atas inquiries"""
+    where, params = "", []
+    if start is not None:
+        where += " AND i.date >= ?"
+        params.append(start)
+    if customer is not None:
+        where += " AND i.customer_name = ?"
+        params.append(customer)
+    with db.pool.connection() as conn:
+        return pd.read_sql(_full_rollup_sql(grain, where), conn, params=params)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--years", type=float, default=5)
+    parser.add_argument("--customers", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, "rollups.db"))
+        db.cache.max_entries = 0 # Ukur query ke DB, bukan QueryCache
+
+        start = time.perf_counter()
+        fill_inquiries(db, args.rows, args.years, args.customers)
+        t_fill = time.perf_counter() - start
+        rollup_rows = {g: db._read_sql("SELECT COUNT(*) AS n FROM inquiry_rollups WHERE grain = ?", (g,))['n'][0] for g in ROLLUP_GRAINS}
+        print(f"{args.rows:,} inquiries over {args.years} years, {args.customers} customers: "
+              f"insert with rollup triggers {t_fill:.1f}s ({args.rows / t_fill:,.0f} rows/s)")
+        print("rollup rows: " + ", ".join(f"{g}={n:,}" for g, n in rollup_rows.items()))
+
+        one_year_ago = pd.Timestamp.now().normalize() - pd.Timedelta(days=365)
+        since = one_year_ago.strftime("%Y-%m-%d")
+        scenarios = [
+            ("monthly, all customers, all history", dict(grain="month"), dict(grain="month")),
+            ("weekly, 1 customer, last year", dict(grain="week", customer="CUST-7", start=since),
+             dict(grain="week", customer="CUST-7", start=since)),
+            ("daily per customer, last year", dict(grain="day", start=since), dict(grain="day", start=since, by_customer=True)),
+        ]
+        print(f"{'query':<40}{'raw ms':>10}{'rollup ms':>11}{'speedup':>9}")
+        for name, raw_kwargs, rollup_kwargs in scenarios:
+            _, t_raw = timed(lambda: raw_trend(db, **raw_kwargs), repeat=1)
+            _, t_rollup = timed(lambda: db.get_inquiry_trend(**rollup_kwargs))
+            print(f"{name:<40}{t_raw * 1000:>10.1f}{t_rollup * 1000:>11.1f}{t_raw / t_rollup:>8.0f}x")
+
+        # Perubahan 1 inquiry hanya menyentuh 3 baris rollup per sisi (day / week / month)
+        start = time.perf_counter()
+        for _ in range(200):
+            inquiry_id = db.add_inquiry("CUST-1", "101-22-3331", 1, "Pending Validation")
+            db.update_inquiry_status(inquiry_id, "Finished")
+        print(f"add_inquiry + status update (incremental rollup): {(time.perf_counter() - start) / 200 * 1000:.2f} ms")
+
+        month_ago = (pd.Timestamp.now().normalize() - pd.Timedelta(days=30)).strftime("%Y-%m-%d")
+        mismatches, t_window = timed(lambda: db.reconcile_rollups(start=month_ago), repeat=1)
+        print(f"reconcile last 30 days: {'ok' if not mismatches else f'{len(mismatches)} MISMATCHES'} ({t_window:.2f}s)")
+        full_mismatches, t_all = timed(lambda: db.reconcile_rollups(), repeat=1)
+        print(f"reconcile full history: {'ok' if not full_mismatches else f'{len(full_mismatches)} MISMATCHES'} ({t_all:.1f}s)")
+        db.pool.close_all()
+    if mismatches or full_mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
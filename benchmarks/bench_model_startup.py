@@ -0,0 +1,46 @@
+"""Cold-start ProcurementAI: training per session (lama) vs artifact di disk (baru).
+
+Jalankan dari root repo:  python -m benchmarks.bench_model_startup
+"""
+import pickle
+import tempfile
+import time
+import tracemalloc
+
+from modules.ai_predictor import ProcurementAI
+
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, seconds, peak
+
+
+def per_session_train():
+    ai = ProcurementAI()
+    ai.train_model()
+    return ai
+
+
+def main():
+    with tempfile.TemporaryDirectory() as model_dir:
+        ai_old, t_old, peak_old = measure(per_session_train)
+        ai_cold, t_cold, peak_cold = measure(lambda: ProcurementAI.load_or_train(model_dir))
+        ai_warm, t_warm, peak_warm = measure(lambda: ProcurementAI.load_or_train(model_dir))
+
+    model_bytes = len(pickle.dumps((ai_old.model_moq, ai_old.model_leadtime)))
+    print(f"{'scenario':<32}{'seconds':>10}{'peak MB':>10}")
+    print(f"{'train per session (before)':<32}{t_old:>10.3f}{peak_old / 1e6:>10.1f}")
+    print(f"{'load_or_train, no artifact':<32}{t_cold:>10.3f}{peak_cold / 1e6:>10.1f}")
+    print(f"{'load_or_train, from disk':<32}{t_warm:>10.3f}{peak_warm / 1e6:>10.1f}")
+    print(f"model size per copy: {model_bytes / 1e6:.1f} MB "
+          f"(before: 1 copy per session, after: 1 copy per process via st.cache_resource)")
+    print(f"source cold={ai_cold.load_info['source']} warm={ai_warm.load_info['source']}")
+
+
+if __name__ == "__main__":
+    main()
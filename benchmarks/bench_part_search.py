@@ -0,0 +1,105 @@
+"""Benchmark search_parts (prefix / substring / fuzzy) pada katalog 100k dan 1M parts.
+
+--descriptions catalog (default): description realistis, ~200k kalimat unik per 1M parts dari ribuan kata
+(komponen, kualifier, posisi, merk, model unit, ukuran). --descriptions basic: 18 description dummy.
+Import diukur 2x: trigger FTS per baris vs trigger dimatikan + rebuild index sekali (default import).
+
+Jalankan dari root repo:  python -m benchmarks.bench_part_search --sizes 100000 1000000
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from modules.database_manager import DatabaseManager, PART_DESCRIPTIONS, PART_PREFIXES, PART_UNITS
+
+QUERIES = {
+    "prefix": ["708-5", "14X-12", "600-999-1"],
+    "substring": ["-321-", "Turbo", "Cooler"],
+    "fuzzy": ["Turbochager", "Hydrolic Filter", "hydralic filter", "Solenod", "elemnt hydralic"],
+}
+
+QUALIFIERS = ["Hydraulic", "Fuel", "Oil", "Air", "Water", "Transmission", "Engine", "Steering", "Brake", "Cooling",
+              "Pilot", "Main", "Swing", "Travel", "Boom", "Arm", "Bucket", "Track", "Final Drive", "Radiator",
+              "Coolant", "Exhaust", "Intake", "Return", "Suction", "Pressure", "Relief", "Control", "Safety", "Torque"]
+COMPONENTS = ["Filter", "Element", "Seal", "O-Ring", "Gasket", "Pump", "Valve", "Hose", "Bearing", "Bushing", "Pin",
+              "Bolt", "Nut", "Washer", "Spring", "Cylinder", "Piston", "Ring", "Sensor", "Switch", "Motor", "Gear",
+              "Shaft", "Cover", "Bracket", "Clamp", "Cap", "Plug", "Tube", "Pipe", "Fitting", "Adapter", "Coupling",
+              "Injector", "Nozzle", "Turbocharger", "Alternator", "Starter", "Fan", "Belt", "Idler", "Roller",
+              "Sprocket", "Shoe", "Link", "Cutting Edge", "Tooth", "Adapter Tooth", "Solenoid", "Cooler", "Head"]
+POSITIONS = ["Assy", "Kit", "Set", "Front", "Rear", "Left", "Right", "Upper", "Lower", "Inner", "Outer", "Spare"]
+MODELS = [f"{m}{n}-{r}" for m in ["PC", "D", "HD", "WA", "GD", "HM"] for n in (78, 130, 200, 300, 400, 600, 785) for r in (5, 7, 8, 10)]
+
+
+def catalog_descriptions(n, rng, brands=3000):
+    """Description berkardinalitas realistis: kualifier + komponen + posisi + merk + model + ukuran"""
+    letters = np.array(list("bcdfghklmnprstvz")), np.array(list("aeiou"))
+    brand_words = np.unique(["".join(rng.choice(letters[i % 2]) for i in range(int(k))).capitalize()
+                             for k in rng.integers(5, 9, brands)])
+    parts = [rng.choice(QUALIFIERS, n), rng.choice(COMPONENTS, n),
+             np.where(rng.random(n) < 0.5, rng.choice(POSITIONS, n), ""),
+             np.where(rng.random(n) < 0.6, rng.choice(brand_words, n), ""),
+             np.where(rng.random(n) < 0.5, rng.choice(MODELS, n), ""),
+             np.where(rng.random(n) < 0.3, np.char.add(rng.integers(6, 200, n).astype(str), "MM"), "")]
+    return pd.Series([" ".join(w for w in words if w) for words in zip(*parts)])
+
+
+def make_parts_csv(path, n, seed=0, descriptions="catalog"):
+    rng = np.random.default_rng(seed)
+    mid = rng.integers(100, 1000, n).astype(str)
+    tail = np.char.zfill((np.arange(n) % 1_000_000).astype(str), 6)
+    df = pd.DataFrame({
+        'part_number': np.char.add(np.char.add(np.char.add(rng.choice(PART_PREFIXES, n), "-"), np.char.add(mid, "-")), tail),
+        'description': catalog_descriptions(n, rng) if descriptions == "catalog" else rng.choice(PART_DESCRIPTIONS, n),
+        'unit': rng.choice(PART_UNITS, n),
+        'stock_on_hand': rng.integers(0, 150, n),
+        'item_type': rng.choice(["Local", "Import"], n),
+        'cost_price': rng.uniform(10.0, 800.0, n).round(2),
+    }).drop_duplicates('part_number')
+    df.to_csv(path, index=False)
+    return len(df), df['description'].nunique()
+
+
+def bench(db, text, repeat=20):
+    db.search_parts(text, limit=20) # warm-up (kosakata fuzzy dibangun sekali per versi tabel parts)
+    timings = []
+    for _ in range(repeat):
+        db.cache.clear()
+        start = time.perf_counter()
+        db.search_parts(text, limit=20)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), sorted(timings)[int(len(timings) * 0.95) - 1], len(db.search_parts(text, limit=20))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--descriptions", choices=["catalog", "basic"], default="catalog")
+    args = parser.parse_args()
+
+    for n in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            csv_path = os.path.join(tmp, "parts.csv")
+            rows, distinct = make_parts_csv(csv_path, n, descriptions=args.descriptions)
+            # Pembanding: trigger FTS per baris selama import (rebuild_index_rows tidak pernah tercapai)
+            db = DatabaseManager(os.path.join(tmp, "triggers.db"))
+            per_row = db.bulk_import_parts(csv_path, rebuild_index_rows=10**12)
+            db.pool.close_all()
+            db = DatabaseManager(os.path.join(tmp, "search.db"))
+            result = db.bulk_import_parts(csv_path)
+            print(f"\n== {rows:,} parts, {distinct:,} distinct descriptions | FTS5={db.has_search_index} words={db.has_word_index}")
+            print(f"import: per-row FTS triggers {per_row['seconds']:.1f}s ({per_row['rows_per_sec']:,.0f} rows/s) | "
+                  f"triggers suspended + rebuild {result['seconds']:.1f}s ({result['rows_per_sec']:,.0f} rows/s)")
+            for mode, texts in QUERIES.items():
+                for text in texts:
+                    p50, p95, hits = bench(db, text)
+                    print(f"{mode:<10} {text!r:<26} p50={p50:7.2f} ms  p95={p95:7.2f} ms  results={hits}")
+            db.pool.close_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Latency ProcurementAI.predict: cache miss (2 forest) vs cache hit, plus simulasi revision loop.
+
+Revision loop: item yang sama kembali ke Cost & Procurement beberapa kali (revision_count naik)
+dan user klik "AI Predict" lagi dengan cost & stock yang sama.
+
+Jalankan dari root repo:  python -m benchmarks.bench_prediction_cache [--items 200] [--revisions 3]
+"""
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from modules.ai_predictor import ProcurementAI
+
+
+def per_call_us(fn, calls):
+    start = time.perf_counter()
+    for args in calls:
+        fn(*args)
+    return (time.perf_counter() - start) / len(calls) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=200)
+    parser.add_argument("--revisions", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as model_dir:
+        ai = ProcurementAI.load_or_train(model_dir)
+    rng = np.random.default_rng(42)
+    items = list(zip(np.round(rng.uniform(10, 1000, args.items), 2).tolist(),
+                     rng.choice(["Local", "Import"], args.items).tolist(),
+                     rng.integers(0, 200, args.items).tolist(),
+                     rng.choice(["KMSI", "KEPO", "KMM"], args.items).tolist()))
+
+    miss_us = per_call_us(ai.predict, items)           # Cache kosong: semua miss
+    hit_us = per_call_us(ai.predict, items * 20)       # Item yang sama: semua hit
+    print(f"predict, cache miss: {miss_us:10.1f} us/call")
+    print(f"predict, cache hit : {hit_us:10.1f} us/call  ({miss_us / hit_us:.0f}x faster)")
+
+    # Revision loop: tiap item di-predict 1 + revisions kali, urutan acak seperti antrean costing
+    ai.prediction_cache.clear()
+    ai.prediction_cache.hits = ai.prediction_cache.misses = 0
+    loop = items * (1 + args.revisions)
+    rng.shuffle(loop)
+    loop_us = per_call_us(ai.predict, loop)
+    stats = ai.prediction_cache_stats()
+    print(f"revision loop ({args.items} items x {1 + args.revisions} clicks): {loop_us:.1f} us/call avg, "
+          f"hit rate {stats['hit_rate']:.0%} ({stats['hits']} hits / {stats['misses']} misses)")
+
+    # Retrain (swap model) mengosongkan cache: prediksi berikutnya dihitung dengan model baru
+    ai.train_model()
+    print(f"after retrain: {ai.prediction_cache_stats()['entries']} cached entries")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Render PDF quotation: serial vs process pool (cold), lalu re-render dari cache (warm).
+
+Jalankan dari root repo:  python -m benchmarks.bench_quotation_pdf [--quotes 1000] [--processes N]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from modules.quotation_pdf import render_quotation_pdfs, get_quotation_pdf
+
+
+def make_records(n, seed=42):
+    rng = random.Random(seed)
+    records = []
+    for i in range(n):
+        cost = round(rng.uniform(50, 5000), 2)
+        records.append({
+            'quote_id': f"Q-{100000 + i}", 'customer_name': f"PT Customer {i % 40}", 'part_number': f"PN-{i:06d}",
+            'sales_price': round(cost * 1.2, 2), 'profit_percentage': 10.0, 'cost_price': cost,
+            'sdc': round(cost * 0.03, 2), 'svc': round(cost * 1.03, 2), 'moq': 10 * rng.randint(1, 20),
+            'leadtime': rng.randint(3, 60), 'ki_std_price': round(cost * 1.24, 2),
+            'price_bkc': round(cost * 1.3, 2), 'price_prpd': round(cost * 1.35, 2), 'price_kipl': round(cost * 1.4, 2),
+            'price_ksc': round(cost * 1.25, 2), 'price_kac': round(cost * 1.45, 2), 'region_mean': round(cost * 1.35, 2),
+        })
+    return records
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--quotes", type=int, default=1000)
+    parser.add_argument("--processes", type=int, default=None)
+    args = parser.parse_args()
+    records = make_records(args.quotes)
+
+    with tempfile.TemporaryDirectory() as serial_dir, tempfile.TemporaryDirectory() as pool_dir:
+        (_, s_serial), t_serial = timed(lambda: render_quotation_pdfs(records, serial_dir, processes=1))
+        workers = args.processes or max(2, os.cpu_count() or 1)
+        (paths, s_pool), t_pool = timed(lambda: render_quotation_pdfs(records, pool_dir, processes=workers, min_parallel=1))
+        (_, s_warm), t_warm = timed(lambda: render_quotation_pdfs(records, pool_dir))
+        # Re-download / re-send 1 quotation: hanya cek cache, tidak render ulang
+        _, t_single = timed(lambda: [get_quotation_pdf(r, pool_dir) for r in records[:100]])
+        total_bytes = sum(os.path.getsize(p) for p in paths.values())
+
+    print(f"{args.quotes} quotations, {os.cpu_count()} CPUs, avg PDF {total_bytes / len(records) / 1024:.1f} KB")
+    print(f"{'scenario':<34}{'seconds':>9}{'quotes/s':>11}{'rendered':>10}{'cached':>8}")
+    for name, t, s in [("cold, serial", t_serial, s_serial), ("cold, process pool", t_pool, s_pool),
+                       ("warm (all cached)", t_warm, s_warm)]:
+        print(f"{name:<34}{t:>9.3f}{len(records) / t:>11.0f}{s['rendered']:>10}{s['cached']:>8}")
+    print(f"get_quotation_pdf, cached (per quote): {t_single / 100 * 1000:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
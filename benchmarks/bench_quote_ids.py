@@ -0,0 +1,114 @@
+"""ID quotation: skema lama Q-<5 digit random> vs sequence harian Q-YYYYMMDD-NNNNNN (id_sequences).
+
+1. Tabrakan skema lama: peluang tabrakan (birthday bound) & IntegrityError nyata saat create_quotation.
+2. Insert 1 quote per transaksi lewat create_quotation (jalur app / API): random vs sequence.
+3. Bulk insert ke tabel quotations yang terus membesar: key random (sepanjang ID baru, tanpa tabrakan)
+   vs key berurutan -> rows/s per chunk & ukuran index quote_id. Key random tersebar ke seluruh B-tree,
+   jadi makin lambat saat index melebihi page cache; key berurutan selalu ditambahkan di ujung kanan.
+
+Jalankan dari root repo:  python -m benchmarks.bench_quote_ids [--quotes 5000] [--rows 1000000]
+"""
+import argparse
+import math
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from modules.database_manager import DatabaseManager, format_quote_id
+
+OLD_ID_SPACE = 90_000 # random.randint(10000, 99999)
+
+
+def quote(inquiry_id, quote_id=None):
+    data = {'inquiry_id': inquiry_id, 'customer': "KMSI", 'part_number': "101-22-3331", 'sales_price': 10.0,
+            'profit': 10.0, 'cost': 8.0, 'sdc': 0.24, 'svc': 8.24, 'moq': 10, 'leadtime': 7, 'status': "Draft"}
+    if quote_id is not None:
+        data['quote_id'] = quote_id
+    return data
+
+
+def collision_probability(n, space=OLD_ID_SPACE):
+    return 1 - math.exp(-n * (n - 1) / (2 * space))
+
+
+def per_quote_inserts(tmp, name, n, make_id):
+    """n x create_quotation (1 transaksi per quote); return (quotes/s, jumlah IntegrityError)"""
+    db = DatabaseManager(os.path.join(tmp, f"{name}.db"))
+    errors = 0
+    start = time.perf_counter()
+    for i in range(n):
+        try:
+            db.create_quotation(quote(i + 1, make_id()))
+        except sqlite3.IntegrityError:
+            errors += 1
+    elapsed = time.perf_counter() - start
+    db.pool.close_all()
+    return n / elapsed, errors
+
+
+def index_pages(conn):
+    try: # dbstat hanya ada jika SQLite dikompilasi dengan SQLITE_ENABLE_DBSTAT_VTAB
+        return conn.execute("SELECT COUNT(*) FROM dbstat WHERE name = 'sqlite_autoindex_quotations_1'").fetchone()[0]
+    except sqlite3.OperationalError:
+        return None
+
+
+def bulk_inserts(tmp, name, rows, chunk, make_ids):
+    """Insert rows quote dalam transaksi per chunk; return list rows/s per chunk, page index, ukuran file MB"""
+    path = os.path.join(tmp, f"bulk_{name}.db")
+    db = DatabaseManager(path)
+    sql = """INSERT INTO quotations (quote_id, inquiry_id, customer_name, part_number, sales_price, profit_percentage,
+             cost_price, sdc, svc, moq, leadtime, status) VALUES (?, ?, 'KMSI', '101-22-3331', 10.0, 10.0, 8.0, 0.24, 8.24, 10, 7, 'Draft')"""
+    rates = []
+    for start in range(0, rows, chunk):
+        ids = make_ids(start, min(chunk, rows - start))
+        t0 = time.perf_counter()
+        with db._cursor("quotations") as c:
+            c.execute("BEGIN IMMEDIATE")
+            c.executemany(sql, ((q, start + k + 1) for k, q in enumerate(ids)))
+        rates.append(len(ids) / (time.perf_counter() - t0))
+    with db.pool.connection() as conn:
+        pages = index_pages(conn)
+    db.pool.close_all()
+    return rates, pages, os.path.getsize(path) / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--quotes", type=int, default=5000, help="quote untuk insert 1 per transaksi")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="baris untuk bulk insert")
+    parser.add_argument("--chunk", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    print("== Old scheme Q-<random 10000-99999>: collision probability (birthday bound)")
+    for n in (100, 354, 1_000, 5_000, 20_000):
+        print(f"  {n:>7,} quotes: {collision_probability(n):7.1%}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"\n== create_quotation x {args.quotes:,} (1 transaction per quote)")
+        results = {
+            "random Q-NNNNN (old)": per_quote_inserts(tmp, "old", args.quotes, lambda: f"Q-{rng.randint(10000, 99999)}"),
+            "daily sequence": per_quote_inserts(tmp, "seq", args.quotes, lambda: None),
+        }
+        for name, (rate, errors) in results.items():
+            print(f"  {name:<24}{rate:>10.0f} quotes/s   IntegrityError: {errors}")
+
+        # Skema lama tidak bisa mengisi > 90k baris; pembanding bulk = key random sepanjang ID baru (tanpa tabrakan)
+        print(f"\n== Bulk insert {args.rows:,} quotes, {args.chunk:,} per transaction (rows/s per chunk)")
+        period = time.strftime("%Y%m%d")
+        schemes = {
+            "random key": lambda start, n: [f"Q-{rng.getrandbits(32):08X}-{rng.getrandbits(24):06X}" for _ in range(n)],
+            "sequential key": lambda start, n: [format_quote_id(period, start + k + 1) for k in range(n)],
+        }
+        for name, make_ids in schemes.items():
+            rates, pages, size_mb = bulk_inserts(tmp, name.replace(" ", "_"), args.rows, args.chunk, make_ids)
+            print(f"  {name:<16} first {rates[0]:>9.0f}  last {rates[-1]:>9.0f}  mean {sum(rates) / len(rates):>9.0f}"
+                  f"   quote_id index pages {pages if pages is not None else 'n/a'}   file {size_mb:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Waktu startup app.py per halaman: cold (proses baru) vs warm (session baru di proses yang sama).
+
+Tiap halaman dijalankan di subprocess Python baru lewat streamlit AppTest, pada salinan repo di folder
+temp (database asli tidak tersentuh):
+  cold   = run pertama di proses: import module + init resource (DB, model, worker) + render
+  warm   = session baru di proses yang sama (resource sudah di st.cache_resource)
+  rerun  = rerun di session yang sama (klik widget)
+
+Jalankan dari root repo:  python -m benchmarks.bench_startup [--pages "🏠 Home" "2. Cost & Procurement"]
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+PAGES = ["🏠 Home", "📊 Dashboard", "🛠️ Master Data Parts", "🌏 Customer Inquiry Portal",
+         "1. Inquiry Validation", "⚙️ Localization Development", "2. Cost & Procurement",
+         "3. Superior Approval", "4. Result & Email", "⏱ Performance"]
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_page(page):
+    """Dijalankan di subprocess (cwd = salinan repo); print hasil sebagai JSON"""
+    t0 = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+    harness_ms = (time.perf_counter() - t0) * 1000
+    heavy_before = "sklearn" in sys.modules
+
+    def timed_run(at):
+        start = time.perf_counter()
+        at.run()
+        if at.exception:
+            raise RuntimeError(f"{page}: {[e.value for e in at.exception]}")
+        return round((time.perf_counter() - start) * 1000, 1)
+
+    result = {"page": page, "harness_ms": round(harness_ms, 1)}
+    for label in ("cold", "warm"):
+        at = AppTest.from_file(os.path.abspath("app.py"), default_timeout=600)
+        at.session_state["menu"] = page
+        result[f"{label}_ms"] = timed_run(at)
+    result["rerun_ms"] = timed_run(at)
+    result["first_paint_ms"] = at.session_state["first_paint_ms"]
+    result["sklearn_loaded"] = not heavy_before and "sklearn" in sys.modules
+    print(json.dumps(result))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", nargs="+", default=PAGES)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return run_page(args.child)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        work = os.path.join(tmp, "app")
+        shutil.copytree(REPO_DIR, work, ignore=shutil.ignore_patterns(".git", "__pycache__", "pdf_cache"))
+        print(f"{'page':<30}{'cold ms':>10}{'warm ms':>10}{'rerun ms':>10}  sklearn")
+        for page in args.pages:
+            out = subprocess.run([sys.executable, "-m", "benchmarks.bench_startup", "--child", page],
+                                 cwd=work, capture_output=True, text=True)
+            if out.returncode != 0:
+                print(f"{page:<30} FAILED\n{out.stderr[-2000:]}")
+                continue
+            r = json.loads(out.stdout.strip().splitlines()[-1])
+            print(f"{page:<30}{r['cold_ms']:>10.0f}{r['warm_ms']:>10.0f}{r['rerun_ms']:>10.0f}  "
+                  f"{'loaded' if r['sklearn_loaded'] else '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""QueryCache tidak boleh menyajikan data basi setelah proses lain (mis. server API) menulis ke DB yang sama.
+
+Proses ini (seperti Streamlit) mengisi cache, lalu proses terpisah menulis lewat DatabaseManager sendiri:
+inquiry baru, perubahan status, dan part baru. Setiap read berikutnya di proses ini harus
+langsung melihat perubahan itu, sementara read tanpa perubahan tetap cache hit.
+Exit code 1 jika ada yang gagal.
+
+Jalankan dari root repo:  python -m benchmarks.check_cache_coherence
+"""
+import os
+import subprocess
+import sys
+import tempfile
+
+from modules.database_manager import DatabaseManager
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def write_in_other_process(path, code):
+    """Jalankan code (variabel db = DatabaseManager(path)) di proses Python terpisah; return stdout"""
+    script = f"from modules.database_manager import DatabaseManager\ndb = DatabaseManager({path!r})\n{code}"
+    return subprocess.run([sys.executable, "-c", script], cwd=ROOT, check=True, capture_output=True, text=True).stdout
+
+
+def main():
+    failures = []
+
+    def check(name, ok, detail=""):
+        print(f"[{'ok' if ok else 'FAIL'}] {name}{'' if ok else ': ' + str(detail)}")
+        if not ok:
+            failures.append(name)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "coherence.db")
+        db = DatabaseManager(path)
+        db.populate_dummy_data()
+        part = db.get_parts_page(None, 1)['part_number'].iloc[0]
+
+        def pending():
+            return len(db.get_inquiries_by_status(["Pending Validation"]))
+
+        before = pending()
+        hits = db.cache_stats()['hits']
+        pending()
+        check("unchanged data is served from cache", db.cache_stats()['hits'] == hits + 1)
+
+        new_id = int(write_in_other_process(path, f"print(db.add_inquiry('KMSI', {part!r}, 1, 'Pending Validation'))"))
+        check("new inquiry from other process visible", pending() == before + 1, f"{pending()} != {before + 1}")
+
+        cancelled = len(db.get_inquiries_by_status(["Cancelled"]))
+        write_in_other_process(path, f"db.update_inquiries_status_batch([({new_id}, 'Cancelled')], 'Pending Validation')")
+        now_cancelled = len(db.get_inquiries_by_status(["Cancelled"]))
+        check("status change from other process visible", pending() == before and now_cancelled == cancelled + 1,
+              f"pending {pending()} (expected {before}), cancelled {now_cancelled} (expected {cancelled + 1})")
+
+        parts = db.count_parts()
+        db.get_benchmark("ZZ-COHERENCE")
+        write_in_other_process(path, "db.add_part('ZZ-COHERENCE', 'Test Part', 'PCS', 5, 'Local', 10.0)")
+        check("new part from other process visible", db.count_parts() == parts + 1, f"{db.count_parts()} != {parts + 1}")
+        check("benchmark of new part visible", db.get_benchmark("ZZ-COHERENCE") is not None)
+
+        hits = db.cache_stats()['hits']
+        pending()
+        check("cache hit again once nothing changed", db.cache_stats()['hits'] == hits + 1)
+        db.pool.close_all()
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Cek agregat dashboard (incremental via trigger) vs rekap penuh, lalu bandingkan waktu baca.
+
+1. Jalankan workflow acak (inquiry, quotation, approve / revise, ubah status, hapus) lalu rekonsiliasi.
+2. Isi N quotation Approved dan bandingkan baca dashboard: tabel agregat vs get_full_results + pandas.
+
+Jalankan dari root repo:  python -m benchmarks.check_dashboard_aggregates [--ops 3000] [--quotes 200000]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from modules.database_manager import DatabaseManager
+
+CUSTOMERS = ["KMSI", "KEPO", "KMM", "PAMA", "BUMA", "SIS", "HPU", "MTN"]
+STATUSES = ["Pending Validation", "Ready for Costing", "Need Feasibility Check", "Waiting Approval",
+            "Finished", "Needs Localization", "In Development", "Revise Required", "Cancelled"]
+
+
+def random_workflow(db, ops, rng):
+    quotes = []
+    for i in range(ops):
+        action = rng.random()
+        if action < 0.3 or not quotes:
+            inquiry_id = db.add_inquiry(rng.choice(CUSTOMERS), "101-22-3331", rng.randint(1, 50), "Pending Validation")
+            quote_id = f"Q-{i:07d}"
+            db.create_quotation({'quote_id': quote_id, 'inquiry_id': inquiry_id, 'customer': rng.choice(CUSTOMERS),
+                                 'part_number': "101-22-3331", 'sales_price': round(rng.uniform(5, 5000), 2),
+                                 'profit': rng.choice([8.0, 10.0, 12.5, 15.0]), 'cost': 1.0, 'sdc': 0.03, 'svc': 1.03,
+                                 'moq': 10, 'leadtime': 7, 'status': "Draft"})
+            quotes.append(quote_id)
+        elif action < 0.55:
+            db.update_quotations_batch(rng.sample(quotes, min(3, len(quotes))), "Approved", "Finished", inquiry_from_status=None)
+        elif action < 0.65:
+            db.update_quotations_batch([rng.choice(quotes)], "Rejected", "Revise Required",
+                                       from_status="Approved", increment_revision=True, inquiry_from_status=None)
+        elif action < 0.85:
+            db.update_inquiry_status(rng.randint(1, len(quotes)), rng.choice(STATUSES))
+        elif action < 0.95:
+            with db._cursor("quotations") as c:
+                c.execute("UPDATE quotations SET sales_price = ?, customer_name = ? WHERE quote_id = ?",
+                          (round(rng.uniform(5, 5000), 2), rng.choice(CUSTOMERS), rng.choice(quotes)))
+        else:
+            quote_id = quotes.pop(rng.randrange(len(quotes)))
+            with db._cursor("quotations", "inquiries") as c:
+                c.execute("DELETE FROM inquiries WHERE id = (SELECT inquiry_id FROM quotations WHERE quote_id = ?)", (quote_id,))
+                c.execute("DELETE FROM quotations WHERE quote_id = ?", (quote_id,))
+
+
+def fill_approved(db, n, rng):
+    with db._cursor("quotations", "inquiries") as c:
+        c.execute("BEGIN IMMEDIATE")
+        c.executemany("INSERT INTO inquiries (date, customer_name, part_number, qty, status) VALUES ('2026-01-01', ?, '101-22-3331', 1, 'Finished')",
+                      ((rng.choice(CUSTOMERS),) for _ in range(n)))
+        c.executemany("""INSERT INTO quotations (quote_id, inquiry_id, customer_name, part_number, sales_price, profit_percentage,
+                                                 cost_price, sdc, svc, moq, leadtime, status)
+                         VALUES (?, NULL, ?, '101-22-3331', ?, 10.0, 1.0, 0.03, 1.03, 10, 7, 'Approved')""",
+                      ((f"B-{i:08d}", rng.choice(CUSTOMERS), round(rng.uniform(5, 5000), 2)) for i in range(n)))
+
+
+def timed(fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def full_recompute(db):
+    quotes = db.get_full_results()
+    quotes['sales_price'].sum(), quotes['profit_percentage'].mean(), quotes.groupby("customer_name")["sales_price"].sum()
+    db.get_inquiries_by_status(STATUSES)['status'].value_counts()
+
+
+def incremental(db):
+    db.get_dashboard_summary(), db.get_sales_by_customer(), db.get_status_counts(STATUSES), db.get_recent_results(100)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ops", type=int, default=3000)
+    parser.add_argument("--quotes", type=int, default=200_000)
+    args = parser.parse_args()
+    rng = random.Random(42)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, "dash.db"))
+        db.populate_dummy_data()
+        random_workflow(db, args.ops, rng)
+        mismatches = db.reconcile_dashboard()
+        print(f"random workflow, {args.ops} ops: {'ok' if not mismatches else f'{len(mismatches)} MISMATCHES'}")
+        for m in mismatches[:10]:
+            print("  ", m)
+
+        start = time.perf_counter()
+        fill_approved(db, args.quotes, rng)
+        print(f"insert {args.quotes} approved quotations (triggers on): {time.perf_counter() - start:.2f}s")
+        mismatches += db.reconcile_dashboard()
+        db.cache.clear() # Ukur baca dari DB, bukan dari QueryCache
+        db.cache.max_entries = 0
+        t_full, t_incr = timed(lambda: full_recompute(db)), timed(lambda: incremental(db))
+        print(f"dashboard read, full recompute : {t_full * 1000:9.1f} ms")
+        print(f"dashboard read, aggregates     : {t_incr * 1000:9.1f} ms  ({t_full / t_incr:.0f}x)")
+        print(f"reconciliation after bulk fill : {'ok' if not mismatches else 'MISMATCH'}")
+        db.pool.close_all()
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
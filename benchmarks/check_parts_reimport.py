@@ -0,0 +1,117 @@
+"""Re-import parts master tidak boleh menimpa harga regional asli dengan harga placeholder.
+
+Skenario di DB sementara:
+1. Import awal lengkap (semua kolom harga region).
+2. Re-import stock / cost saja (tanpa kolom region) + 1 part baru -> part lama tetap memakai harga
+   region di DB, cost & stock ter-update; part baru mendapat harga placeholder.
+3. Re-import dengan sebagian sel region kosong -> hanya sel yang diisi yang berubah.
+4. Harga region bukan angka / negatif -> baris masuk reject report, tidak diganti harga placeholder.
+Setiap langkah juga memastikan part_benchmarks sama dengan hitung ulang dari tabel parts.
+Exit code 1 jika ada yang gagal.
+
+Jalankan dari root repo:  python -m benchmarks.check_parts_reimport
+"""
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from modules.database_manager import DatabaseManager
+from modules.parts_import import REGION_COLUMNS
+from modules.pricing import calculate_financials_bulk
+
+
+def import_csv(db, tmp, df):
+    path = os.path.join(tmp, "parts.csv")
+    df.to_csv(path, index=False)
+    return db.bulk_import_parts(path)
+
+
+def parts(db):
+    with db.pool.connection() as conn:
+        return pd.read_sql("SELECT * FROM parts", conn).set_index('part_number')
+
+
+def benchmark_errors(db):
+    """Baris part_benchmarks yang tidak sama dengan hitung ulang dari parts"""
+    with db.pool.connection() as conn:
+        df = pd.read_sql(f"SELECT p.part_number, p.cost_price, {', '.join('p.' + c for c in REGION_COLUMNS)}, "
+                         f"b.ki_std_price, b.region_mean, b.is_competitive, {', '.join('b.' + c + ' AS b_' + c for c in REGION_COLUMNS)} "
+                         "FROM parts p LEFT JOIN part_benchmarks b ON b.part_number = p.part_number", conn)
+    expected_ki = calculate_financials_bulk(df['cost_price'], 10.0)['Sales Price'].to_numpy()
+    expected_mean = df[REGION_COLUMNS].mean(axis=1).round(2).to_numpy()
+    bad = ~np.isclose(df['ki_std_price'], expected_ki) | ~np.isclose(df['region_mean'], expected_mean)
+    bad |= df['is_competitive'] != (df['ki_std_price'] < df['region_mean']).astype(int)
+    for col in REGION_COLUMNS:
+        bad |= ~np.isclose(df[col], df[f"b_{col}"])
+    return df.loc[bad, 'part_number'].tolist()
+
+
+def main():
+    failures = []
+
+    def check(name, ok, detail=""):
+        print(f"[{'ok' if ok else 'FAIL'}] {name}{'' if ok else ': ' + str(detail)}")
+        if not ok:
+            failures.append(name)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, "reimport.db"))
+        full = pd.DataFrame({
+            'part_number': ["P-001", "P-002", "P-003"], 'description': ["Bolt", "Pin", "Hose"], 'unit': "PCS",
+            'stock_on_hand': [10, 20, 30], 'item_type': ["Local", "Local", "Import"], 'cost_price': [5.5, 12.0, 45.0],
+            'price_bkc': [7.26, 15.0, 60.0], 'price_prpd': [7.1, 14.5, 58.0], 'price_kipl': [6.9, 16.0, 62.0],
+            'price_ksc': [7.4, 15.5, 61.0], 'price_kac': [7.0, 14.8, 59.5],
+        })
+        import_csv(db, tmp, full)
+        before = parts(db)
+        check("initial import: region prices stored", np.allclose(before.loc[full['part_number'], REGION_COLUMNS], full[REGION_COLUMNS]))
+        check("initial import: benchmarks consistent", not benchmark_errors(db), benchmark_errors(db))
+
+        stock_only = full[['part_number', 'description', 'unit', 'stock_on_hand', 'item_type', 'cost_price']].copy()
+        stock_only['stock_on_hand'] = [11, 21, 31]
+        stock_only['cost_price'] = [6.0, 12.0, 50.0]
+        stock_only.loc[len(stock_only)] = ["P-004", "Gasket", "SET", 5, "Import", 100.0]
+        import_csv(db, tmp, stock_only)
+        after = parts(db)
+        old = full['part_number']
+        check("stock/cost re-import: region prices unchanged", np.allclose(after.loc[old, REGION_COLUMNS], before.loc[old, REGION_COLUMNS]),
+              after.loc[old, REGION_COLUMNS].compare(before.loc[old, REGION_COLUMNS]))
+        check("stock/cost re-import: stock & cost updated", after.loc[old, 'stock_on_hand'].tolist() == [11, 21, 31]
+              and after.loc[old, 'cost_price'].tolist() == [6.0, 12.0, 50.0])
+        new_prices = after.loc["P-004", REGION_COLUMNS].astype(float)
+        check("stock/cost re-import: new part gets placeholder prices", new_prices.between(110.0, 150.0).all(), new_prices.to_dict())
+        check("stock/cost re-import: benchmarks consistent", not benchmark_errors(db), benchmark_errors(db))
+
+        partial = full.copy()
+        partial['price_bkc'] = [8.0, np.nan, np.nan]
+        partial['price_kac'] = np.nan
+        import_csv(db, tmp, partial)
+        final = parts(db)
+        expected = after.loc[old, REGION_COLUMNS].copy()
+        expected.loc["P-001", 'price_bkc'] = 8.0
+        for col in ['price_prpd', 'price_kipl', 'price_ksc']:
+            expected[col] = full.set_index('part_number')[col]
+        check("partial re-import: only given cells overwritten", np.allclose(final.loc[old, REGION_COLUMNS], expected),
+              final.loc[old, REGION_COLUMNS].compare(expected))
+        check("partial re-import: benchmarks consistent", not benchmark_errors(db), benchmark_errors(db))
+
+        invalid = full.astype({'price_bkc': object}).copy()
+        invalid.loc[0, 'price_bkc'] = "abc"
+        invalid.loc[1, 'price_prpd'] = -5
+        invalid.loc[len(invalid)] = ["P-005", "Seal", "PCS", 1, "Local", 3.0, "x1", 4.0, 4.0, 4.0, 4.0]
+        result = import_csv(db, tmp, invalid)
+        rejected = {r['part_number']: r['reason'] for r in result['rejects']}
+        check("invalid prices: rows rejected with reason", set(rejected) == {"P-001", "P-002", "P-005"}, rejected)
+        latest = parts(db)
+        check("invalid prices: existing rows untouched", np.allclose(latest.loc[["P-001", "P-002"], REGION_COLUMNS],
+                                                                     final.loc[["P-001", "P-002"], REGION_COLUMNS]))
+        check("invalid prices: no placeholder part created", "P-005" not in latest.index)
+        db.pool.close_all()
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
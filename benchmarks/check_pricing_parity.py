@@ -0,0 +1,64 @@
+"""Pastikan calculate_financials_bulk identik dengan calculate_financials (scalar) per baris.
+
+Kasus: cost & margin random, cost yang hasilnya tepat di tengah sen (.xx5, pembulatan paling rawan),
+margin yang membuat denominator <= 0 (Sales Price 0), serta input scalar / Series yang di-broadcast.
+Input scalar dibandingkan sebagai float Python (lihat catatan np.float64 di calculate_financials_bulk).
+Exit code 1 jika ada selisih.
+
+Jalankan dari root repo:  python -m benchmarks.check_pricing_parity [--rows 200000]
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from modules.pricing import FREIGHT_RATE, OVERHEAD_RATE, calculate_financials, calculate_financials_bulk
+
+COLUMNS = ["SDC", "SVC", "Sales Price", "Op Profit Val"]
+
+
+def mismatches(costs, profits):
+    """Jumlah nilai bulk != scalar + contoh pertama"""
+    bulk = calculate_financials_bulk(costs, profits)
+    costs, profits = np.broadcast_arrays(np.atleast_1d(np.asarray(costs, dtype=float)), np.asarray(profits, dtype=float))
+    scalar = pd.DataFrame([calculate_financials(c, p) for c, p in zip(costs.tolist(), profits.tolist())])
+    diff = (bulk[COLUMNS].to_numpy() != scalar[COLUMNS].to_numpy())
+    rows = diff.any(axis=1).nonzero()[0]
+    example = None
+    if len(rows):
+        r = rows[0]
+        example = {"cost": costs[r], "profit": profits[r], "bulk": bulk.iloc[r].to_dict(), "scalar": scalar.iloc[r].to_dict()}
+    return int(diff.sum()), example
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    rng = np.random.default_rng(args.seed)
+
+    # Margin di mana denominator ~0 (93.2% -> sisa float ~1e-17, Sales Price sangat besar) / negatif
+    zero_margin = (1 - OVERHEAD_RATE - FREIGHT_RATE) * 100
+    cases = {
+        "random cost & margin": (np.round(rng.uniform(0, 10_000, args.rows), 2), np.round(rng.uniform(0, 60, args.rows), 1)),
+        "random cost, margin 10%": (rng.uniform(0, 5_000, args.rows), 10.0),
+        "half-cent cost (x.xx5)": (np.round(rng.integers(0, 1_000_000, args.rows) / 100, 2) + 0.005, rng.choice([5.0, 10.0, 12.5, 15.0], args.rows)),
+        "half-cent sdc (cost*3% = .xx5)": (np.arange(1, 20_001) * 0.5 / 3, 10.0),
+        "denominator <= 0": (rng.uniform(0, 1_000, 1_000), np.concatenate([[zero_margin, 93.2, 93.21, 100.0], rng.uniform(zero_margin, 200, 996)])),
+        "scalar cost, margin array": (123.45, np.round(rng.uniform(0, 100, 1_000), 2)),
+        "Series cost": (pd.Series(rng.uniform(0, 800, 1_000)), 10.0),
+    }
+    failed = False
+    for name, (costs, profits) in cases.items():
+        count, example = mismatches(costs, profits)
+        failed |= count > 0
+        print(f"[{'FAIL' if count else 'ok'}] {name}: {count} mismatched values")
+        if example:
+            print(f"    e.g. {example}")
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
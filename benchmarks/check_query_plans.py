@@ -0,0 +1,63 @@
+"""Pastikan query hot-path DatabaseManager memakai index (bukan full table scan).
+
+SQL yang benar-benar dijalankan tiap method ditangkap lewat trace callback SQLite,
+lalu di-EXPLAIN QUERY PLAN. Exit code 1 jika ada query yang masih SCAN tabel
+(kecuali SMALL_TABLES: tabel bookkeeping yang memang selalu dibaca utuh).
+Jalankan dari root repo:  python -m benchmarks.check_query_plans
+"""
+import os
+import tempfile
+
+from modules.database_manager import DatabaseManager
+
+HOT_QUERIES = {
+    "get_inquiries_by_status": lambda db: db.get_inquiries_by_status(["Pending Validation", "Ready for Costing"]),
+    "get_inquiries_by_customer": lambda db: db.get_inquiries_by_customer("KMSI"),
+    "get_quotations_by_status": lambda db: db.get_quotations_by_status("Draft"),
+    "get_approved_with_po_check": lambda db: db.get_approved_with_po_check(),
+    "get_full_results": lambda db: db.get_full_results(),
+    "get_recent_results": lambda db: db.get_recent_results(100),
+    "get_inquiry_trend": lambda db: db.get_inquiry_trend("week", customer="KMSI", start="2025-01-01"),
+    "get_localization_projects": lambda db: db.get_localization_projects(),
+    "get_inquiries_with_parts": lambda db: db.get_inquiries_with_parts(["Pending Validation"]),
+    "get_quotations_with_benchmarks": lambda db: db.get_quotations_with_benchmarks("Draft"),
+    "get_part_details": lambda db: db.get_part_details("101-22-3331"),
+}
+
+# 1 baris per tabel data -> SCAN lebih murah dari index apa pun
+SMALL_TABLES = ("table_versions",)
+
+
+def capture_sql(db, fn):
+    statements = []
+    with db.pool.connection() as conn:
+        conn.set_trace_callback(statements.append)
+    try:
+        fn(db)
+    finally:
+        with db.pool.connection() as conn:
+            conn.set_trace_callback(None)
+    return [sql for sql in statements if sql.lstrip().upper().startswith(("SELECT", "WITH"))]
+
+
+def main():
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        # pool_size=1 supaya trace callback terpasang di koneksi yang dipakai method
+        db = DatabaseManager(os.path.join(tmp, "plans.db"), pool_size=1)
+        db.populate_dummy_data()
+        print(f"schema version: {db.schema_version()}")
+        for name, fn in HOT_QUERIES.items():
+            for sql in capture_sql(db, fn):
+                plan = db.explain_query_plan(sql)
+                scans = [step for step in plan if step.startswith("SCAN") and step.split()[1] not in SMALL_TABLES]
+                status = "FAIL" if scans else "ok"
+                failed |= bool(scans)
+                print(f"[{status}] {name}: {' | '.join(plan)}")
+        db.pool.close_all()
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""Uji EmailDispatcher terhadap SMTP server lokal (stand-in) tanpa server email asli.
+
+SMTP sink menerima semua email, kecuali:
+  - penerima berisi "tempfail" -> 451 pada percobaan pertama (harus di-retry lalu Sent)
+  - penerima berisi "reject"   -> 550 (harus Failed tanpa retry)
+--db-errors N: N panggilan pertama claim_emails & mark_emails_sent (masing-masing) gagal dengan "database is locked";
+worker harus tetap hidup dan tidak mengirim ulang email yang sudah terkirim.
+Proses kedua: dispatcher kedua (DatabaseManager sendiri) di-start saat dispatcher pertama sedang mengirim;
+email yang sedang dikirim tidak boleh di-requeue (lease claimed_at). Email 'Sending' dengan lease kedaluwarsa
+(proses yang mati) harus dikirim ulang tepat 1x.
+Jalankan dari root repo:  python -m benchmarks.email_dispatch_check --emails 200
+"""
+import argparse
+import os
+import socketserver
+import sqlite3
+import tempfile
+import threading
+import time
+
+from modules.database_manager import DatabaseManager
+from modules.email_service import EmailDispatcher
+
+
+def inject_db_errors(db, count):
+    """count panggilan pertama claim_emails & mark_emails_sent (masing-masing) raise OperationalError (DB terkunci)"""
+    lock = threading.Lock()
+
+    def failing(method):
+        remaining = {"n": count}
+
+        def wrapper(*args, **kwargs):
+            with lock:
+                fail = remaining["n"] > 0
+                remaining["n"] -= fail
+            if fail:
+                raise sqlite3.OperationalError("database is locked")
+            return method(*args, **kwargs)
+        return wrapper
+    db.claim_emails = failing(db.claim_emails)
+    db.mark_emails_sent = failing(db.mark_emails_sent)
+
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, delay=0.0):
+        super().__init__(("127.0.0.1", 0), SMTPSinkHandler)
+        self.delay = delay # Detik per email: memperlebar jendela email 'Sending' saat dispatcher kedua start
+        self.messages = []
+        self.connections = 0
+        self.tempfailed = set()
+        self.lock = threading.Lock()
+
+
+class SMTPSinkHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+        self.reply("220 ami-sink ready")
+        rcpt = None
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            cmd = line.decode(errors="replace").strip()
+            verb = cmd.split(" ", 1)[0].upper()
+            if verb in ("EHLO", "HELO"):
+                self.reply("250 ami-sink")
+            elif verb == "MAIL":
+                rcpt = None
+                self.reply("250 OK")
+            elif verb == "RCPT":
+                rcpt = cmd.split(":", 1)[1].strip(" <>")
+                with server.lock:
+                    first_try = rcpt not in server.tempfailed
+                    if "tempfail" in rcpt and first_try:
+                        server.tempfailed.add(rcpt)
+                        self.reply("451 try again later")
+                        continue
+                if "reject" in rcpt:
+                    self.reply("550 mailbox unavailable")
+                    continue
+                self.reply("250 OK")
+            elif verb == "DATA":
+                self.reply("354 end with .")
+                data = []
+                while True:
+                    chunk = self.rfile.readline()
+                    if chunk in (b".\r\n", b".\n", b""):
+                        break
+                    data.append(chunk)
+                time.sleep(server.delay)
+                with server.lock:
+                    server.messages.append((rcpt, b"".join(data)))
+                self.reply("250 queued")
+            elif verb in ("RSET", "NOOP"):
+                self.reply("250 OK")
+            elif verb == "QUIT":
+                self.reply("221 bye")
+                return
+            else:
+                self.reply("502 not implemented")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--emails", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--db-errors", type=int, default=3)
+    parser.add_argument("--smtp-delay-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    sink = SMTPSink(args.smtp_delay_ms / 1000)
+    threading.Thread(target=sink.serve_forever, daemon=True).start()
+    host, port = sink.server_address
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "email.db")
+        db = DatabaseManager(path)
+        smtp_config = {"host": host, "port": port, "starttls": False, "sender": "ami@test.local"}
+        # Sisa proses yang mati 1 jam lalu di tengah kirim (lease kedaluwarsa)
+        crashed = db.enqueue_email("crashed-buyer@test.local", "Quotation Q-CRASH", "Dear customer, ...", quote_id="Q-CRASH")
+        with db._cursor("email_outbox") as c:
+            c.execute("UPDATE email_outbox SET status = 'Sending', claimed_at = ? WHERE id = ?", (time.time() - 3600, crashed))
+        dispatcher = EmailDispatcher(db, smtp_config, workers=args.workers, batch_size=25, backoff_seconds=0.2, poll_seconds=0.1)
+        dispatcher.start()
+        inject_db_errors(db, args.db_errors)
+
+        start = time.perf_counter()
+        for i in range(args.emails):
+            to = "buyer-tempfail@test.local" if i % 50 == 1 else ("buyer-reject@test.local" if i % 50 == 2 else f"buyer{i}@test.local")
+            db.enqueue_email(f"{i}-{to}", f"Quotation Q-{i:05d}", "Dear customer, ...", quote_id=f"Q-{i:05d}")
+        enqueue_ms = (time.perf_counter() - start) * 1000 / args.emails
+        dispatcher.wake()
+
+        while dict(db.get_email_status_counts().values.tolist()).get("Sent", 0) < args.emails // 4:
+            time.sleep(0.01)
+        second = EmailDispatcher(DatabaseManager(path), smtp_config, workers=1, batch_size=25, poll_seconds=0.1).start()
+
+        total = args.emails + 1
+        expected_failed = sum(1 for i in range(args.emails) if i % 50 == 2)
+        deadline = time.time() + 60
+        while time.time() < deadline:
+            counts = dict(db.get_email_status_counts().values.tolist())
+            if counts.get("Sent", 0) + counts.get("Failed", 0) == total:
+                break
+            time.sleep(0.05)
+        elapsed = time.perf_counter() - start
+        alive = sum(t.is_alive() for t in dispatcher._threads)
+        dispatcher.stop()
+        second.stop()
+        second.db.pool.close_all()
+        db.pool.close_all()
+
+    sink.shutdown()
+    print(f"emails={args.emails} workers={args.workers} enqueue={enqueue_ms:.2f} ms/email (UI click cost)")
+    print(f"status={counts} elapsed={elapsed:.2f}s throughput={counts.get('Sent', 0) / elapsed:.0f} emails/s")
+    print(f"smtp connections={sink.connections} messages received={len(sink.messages)} dispatcher stats={dispatcher.stats}")
+    duplicates = len(sink.messages) - len({rcpt for rcpt, _ in sink.messages})
+    print(f"workers alive={alive}/{args.workers} duplicate sends={duplicates}")
+    ok = (counts.get("Sent", 0) == total - expected_failed and counts.get("Failed", 0) == expected_failed
+          and alive == args.workers and duplicates == 0)
+    if not ok:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
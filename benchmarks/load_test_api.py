@@ -0,0 +1,117 @@
+"""Load test lokal modules.workflow_api: requests/sec & latency dengan micro-batching vs tanpa batching.
+
+Server jalan di thread background di atas DB sementara (diisi benchmarks.synthetic_data); N klien asyncio
+memakai koneksi keep-alive dan mengirim request terus-menerus selama --seconds detik per skenario:
+    submit   POST /inquiries          (batching: banyak insert -> 1 transaksi)
+    suggest  POST /inquiries/<id>/suggest  (batching: banyak prediksi -> 1 predict_many)
+    read     GET  /inquiries/<id>
+    batch    POST /batch berisi --batch-size submit (1 round-trip)
+Tiap skenario dijalankan dengan max_batch besar (batching on) dan max_batch=1 (off).
+
+Jalankan dari root repo:  python -m benchmarks.load_test_api [--clients 32] [--seconds 5] [--rows 10000]
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.synthetic_data import CUSTOMERS, populate
+from modules.ai_predictor import ProcurementAI
+from modules.database_manager import DatabaseManager
+from modules.workflow_api import WorkflowAPIServer
+from modules.workflow_service import WorkflowService
+
+
+async def http_request(reader, writer, method, path, body=None):
+    data = json.dumps(body).encode() if body is not None else b""
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(data)}\r\n\r\n".encode() + data)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line == b"\r\n":
+            break
+        name, _, value = line.decode().partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+
+async def run_clients(port, clients, seconds, make_request):
+    """N klien keep-alive; return (latency ms per request, jumlah error, waktu total)"""
+    latencies, errors = [], [0]
+    deadline = time.perf_counter() + seconds
+
+    async def client(n):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        i = 0
+        while time.perf_counter() < deadline:
+            method, path, body = make_request(n, i)
+            start = time.perf_counter()
+            status, _ = await http_request(reader, writer, method, path, body)
+            latencies.append((time.perf_counter() - start) * 1000)
+            errors[0] += status >= 400
+            i += 1
+        writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(n) for n in range(clients)))
+    return np.array(latencies), errors[0], time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--rows", type=int, default=10_000, help="jumlah parts & inquiries sintetis")
+    parser.add_argument("--batch-size", type=int, default=50, help="request per POST /batch")
+    parser.add_argument("--window-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, "load.db"))
+        print("setup:", populate(db, parts=args.rows, inquiries=args.rows))
+        parts = db.get_parts_page(None, 1000)['part_number'].tolist()
+        ai = ProcurementAI.load_or_train(os.path.join(tmp, "models"))
+        service = WorkflowService(db, ai_factory=lambda: ai)
+        rng = np.random.default_rng(42)
+        inquiry_ids = rng.integers(1, args.rows + 1, 100_000).tolist()
+
+        def submit(n, i):
+            return "POST", "/inquiries", {"customer": CUSTOMERS[n % len(CUSTOMERS)], "part_number": parts[(n * 7919 + i) % len(parts)], "qty": 10}
+
+        def suggest(n, i):
+            ai.prediction_cache.clear() # ukur model, bukan cache LRU
+            return "POST", f"/inquiries/{inquiry_ids[(n * 997 + i) % len(inquiry_ids)]}/suggest", None
+
+        def read(n, i):
+            return "GET", f"/inquiries/{inquiry_ids[(n * 997 + i) % len(inquiry_ids)]}", None
+
+        def batch(n, i):
+            return "POST", "/batch", {"requests": [{"method": "POST", "path": "/inquiries", "body": submit(n, i * args.batch_size + k)[2]}
+                                                   for k in range(args.batch_size)]}
+
+        scenarios = {"submit": (submit, 1), "suggest": (suggest, 1), "read": (read, 1), "batch": (batch, args.batch_size)}
+        print(f"\n{args.clients} clients, {args.seconds:.0f}s per scenario")
+        print(f"{'scenario':<10}{'batching':>9}{'req/s':>10}{'ops/s':>10}{'p50 ms':>9}{'p99 ms':>9}{'errors':>8}{'avg batch':>11}")
+        for name, (make_request, ops_per_request) in scenarios.items():
+            for batching in (True, False):
+                server = WorkflowAPIServer(service, port=0, batch_window_ms=args.window_ms,
+                                           max_batch=256 if batching else 1).start_in_thread()
+                latencies, errors, elapsed = asyncio.run(run_clients(server.port, args.clients, args.seconds, make_request))
+                batcher = server.suggest_batcher if name == "suggest" else server.inquiry_batcher
+                server.stop()
+                avg_batch = batcher.items / batcher.batches if batcher.batches else 0
+                print(f"{name:<10}{'on' if batching else 'off':>9}{len(latencies) / elapsed:>10.0f}{len(latencies) * ops_per_request / elapsed:>10.0f}"
+                      f"{np.percentile(latencies, 50):>9.2f}{np.percentile(latencies, 99):>9.2f}{errors:>8}{avg_batch:>11.1f}")
+        db.pool.close_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Stress test: N session paralel submit inquiry -> quotation -> approval -> PO.
+
+Semua thread memakai 1 DatabaseManager (pool koneksi WAL), sama seperti app.py.
+Jalankan dari root repo:  python -m benchmarks.stress_concurrency --sessions 20 --iterations 50
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from modules.database_manager import DatabaseManager
+
+CUSTOMERS = ['KMSI', 'KCIC', 'KPAC', 'KMM', 'KME', 'KEPO', 'KAC', 'KMSA', 'KSAF', 'KLTD']
+
+
+def run_session(db, session_no, iterations, part_numbers, errors):
+    customer = CUSTOMERS[session_no % len(CUSTOMERS)]
+    try:
+        for i in range(iterations):
+            part_no = part_numbers[(session_no + i) % len(part_numbers)]
+            inq_id = db.add_inquiry(customer, part_no, 1 + i % 5, "Pending Validation")
+            db.get_inquiries_by_customer(customer)
+            db.update_inquiry_status(inq_id, "Ready for Costing")
+            quote_id = db.create_quotation({ # quote_id dari sequence DB, diminta bersamaan oleh semua session
+                "inquiry_id": inq_id, "customer": customer,
+                "part_number": part_no, "sales_price": 100.0, "profit": 10.0, "cost": 80.0,
+                "sdc": 2.4, "svc": 82.4, "moq": 10, "leadtime": 7, "status": "Draft",
+            })
+            db.update_inquiry_status(inq_id, "Waiting Approval")
+            db.get_quotations_by_status("Draft")
+            db.update_quotation_status(quote_id, "Approved")
+            db.update_inquiry_status(inq_id, "Finished")
+            db.create_po(inq_id, f"PO-{customer}-{session_no}-{i}")
+    except Exception as e:
+        errors.append(f"session {session_no}: {type(e).__name__}: {e}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--pool-size", type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, "stress.db"), pool_size=args.pool_size)
+        db.populate_dummy_data()
+        part_numbers = db.get_all_parts()['part_number'].tolist()
+
+        errors = []
+        threads = [threading.Thread(target=run_session, args=(db, n, args.iterations, part_numbers, errors))
+                   for n in range(args.sessions)]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+
+        expected = args.sessions * args.iterations
+        created_po = len(db.get_inquiries_by_status(["PO Created"]))
+        approved = len(db.get_full_results())
+        workflows_per_sec = expected / elapsed
+        # 9 operasi DB per workflow (7 tulis, 2 baca)
+        print(f"sessions={args.sessions} iterations={args.iterations} pool_size={args.pool_size}")
+        print(f"elapsed={elapsed:.2f}s workflows/s={workflows_per_sec:.1f} db ops/s={workflows_per_sec * 9:.1f}")
+        print(f"PO created={created_po}/{expected} approved quotes={approved}/{expected} errors={len(errors)}")
+        for err in errors[:10]:
+            print("  ", err)
+        db.pool.close_all()
+        if errors or created_po != expected or approved != expected:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""Benchmark suite reproducible: query DatabaseManager, pricing, AI predict & transisi workflow pada
+DB sintetis 1k / 100k / 1M baris (parts = inquiries = N, lihat benchmarks.synthetic_data).
+
+Tiap operasi diulang sampai --repeat kali (atau --budget detik habis); query cache DB dikosongkan
+sebelum tiap run, jadi yang diukur adalah query ke SQLite. Hasil ditulis ke JSON (median / p95 / min
+per operasi + meta: commit git, versi Python & SQLite) supaya bisa dibandingkan antar run:
+
+    python -m benchmarks.suite [--sizes 1000 100000 1000000] [--out results.json]
+    python -m benchmarks.suite --sizes 1000 --compare benchmarks/results/suite-<waktu>.json
+"""
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import subprocess
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+from benchmarks.synthetic_data import CUSTOMERS, populate
+from modules.ai_predictor import ProcurementAI
+from modules.database_manager import DatabaseManager
+from modules.perf import _row_count
+from modules.pricing import calculate_financials, calculate_financials_bulk
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(REPO_DIR, "benchmarks", "results")
+
+
+def measure(fn, db=None, repeat=5, budget=5.0):
+    """Jalankan fn berulang; return statistik ms + jumlah baris hasil run terakhir"""
+    timings, result = [], None
+    deadline = time.perf_counter() + budget
+    while len(timings) < repeat and (not timings or time.perf_counter() < deadline):
+        if db is not None:
+            db.cache.clear()
+        start = time.perf_counter()
+        result = fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings = np.array(timings)
+    return {"median_ms": round(float(np.median(timings)), 3), "p95_ms": round(float(np.percentile(timings, 95)), 3),
+            "min_ms": round(float(timings.min()), 3), "runs": len(timings),
+            "rows": _row_count(result)}
+
+
+def query_cases(db, sample_parts):
+    """Operasi baca DatabaseManager dengan argumen yang mewakili pemakaian di app.py"""
+    part = sample_parts[0]
+    since = (date.today() - timedelta(days=90)).isoformat()
+    return {
+        "db.get_all_parts": db.get_all_parts,
+        "db.get_parts_page": lambda: db.get_parts_page(None, 50),
+        "db.get_parts_page[filtered]": lambda: db.get_parts_page(None, 50, description="Filter", item_type="Import"),
+        "db.count_parts[filtered]": lambda: db.count_parts(description="Filter", item_type="Import"),
+        "db.search_parts[prefix]": lambda: db.search_parts(part[:5]),
+        "db.search_parts[fuzzy]": lambda: db.search_parts("Turbochager"),
+        "db.get_part_details": lambda: db.get_part_details(part),
+        "db.get_benchmark": lambda: db.get_benchmark(part),
+        "db.get_benchmarks[50]": lambda: db.get_benchmarks(sample_parts[:50]),
+        "db.get_inquiries_by_status[pending]": lambda: db.get_inquiries_by_status(["Pending Validation"]),
+        "db.get_inquiries_by_customer": lambda: db.get_inquiries_by_customer(CUSTOMERS[0]),
+        "db.get_inquiries_with_parts[costing]": lambda: db.get_inquiries_with_parts(["Ready for Costing", "Revise Required"]),
+        "db.get_localization_projects": db.get_localization_projects,
+        "db.get_quotations_by_status[draft]": lambda: db.get_quotations_by_status("Draft"),
+        "db.get_quotations_with_benchmarks[draft]": lambda: db.get_quotations_with_benchmarks("Draft"),
+        "db.get_quotations_with_benchmarks[approved]": lambda: db.get_quotations_with_benchmarks("Approved"),
+        "db.get_approved_with_po_check": db.get_approved_with_po_check,
+        "db.get_full_results": db.get_full_results,
+        "db.get_recent_results": db.get_recent_results,
+        "db.get_dashboard_summary": db.get_dashboard_summary,
+        "db.get_sales_by_customer": db.get_sales_by_customer,
+        "db.get_status_counts": db.get_status_counts,
+        "db.get_inquiry_trend[month]": lambda: db.get_inquiry_trend("month"),
+        "db.get_inquiry_trend[week,customer,90d]": lambda: db.get_inquiry_trend("week", customer=CUSTOMERS[0], start=since),
+        "db.get_email_outbox": db.get_email_outbox,
+    }
+
+
+def workflow_cases(db, sample_parts):
+    """Transisi workflow seperti di app.py: portal -> validation -> costing -> approval -> PO (1 inquiry per run)"""
+    counter = iter(range(10**9))
+
+    def full_cycle():
+        n = next(counter)
+        part = sample_parts[n % len(sample_parts)]
+        inquiry_id = db.add_inquiry(CUSTOMERS[n % len(CUSTOMERS)], part, 10, "Pending Validation")
+        db.update_inquiry_status(inquiry_id, "Ready for Costing")
+        fin = calculate_financials(100.0, 10.0)
+        quote_id = db.create_quotation({'inquiry_id': inquiry_id, 'customer': CUSTOMERS[0], 'part_number': part,
+                             'sales_price': fin['Sales Price'], 'profit': 10.0, 'cost': 100.0, 'sdc': fin['SDC'],
+                             'svc': fin['SVC'], 'moq': 10, 'leadtime': 7, 'status': "Draft"})
+        db.update_inquiry_status(inquiry_id, "Waiting Approval")
+        db.update_quotations_batch([quote_id], "Approved", "Finished")
+        db.create_po(inquiry_id, f"PO-B{n}")
+
+    def batch_validation():
+        pending = db.get_inquiries_by_status(["Pending Validation"]).head(100)
+        transitions = [(i, "Ready for Costing") for i in pending['id'].tolist()]
+        return db.update_inquiries_status_batch(transitions, from_status="Pending Validation")
+
+    return {"workflow.full_cycle": full_cycle, "workflow.batch_validation[100]": batch_validation}
+
+
+def run_size(n, args):
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, "suite.db"))
+        start = time.perf_counter()
+        setup = populate(db, parts=n, inquiries=n, seed=args.seed)
+        setup["seconds"] = round(time.perf_counter() - start, 2)
+        print(f"\n== N = {n:,}: {setup}")
+
+        rng = np.random.default_rng(args.seed)
+        parts = db.get_parts_page(None, 1000)
+        sample_parts = parts['part_number'].iloc[rng.permutation(len(parts))].tolist()
+        results = {}
+
+        def record(name, fn, use_db=True, repeat=args.repeat):
+            results[name] = measure(fn, db if use_db else None, repeat, args.budget)
+            r = results[name]
+            print(f"{name:<46}{r['median_ms']:>12.3f}{r['p95_ms']:>12.3f}{r['runs']:>6}{r['rows'] if r['rows'] is not None else '':>10}")
+
+        print(f"{'operation':<46}{'median ms':>12}{'p95 ms':>12}{'runs':>6}{'rows':>10}")
+        for name, fn in query_cases(db, sample_parts).items():
+            record(name, fn)
+
+        costs = rng.uniform(10, 800, n)
+        record("pricing.calculate_financials[x1000]", lambda: [calculate_financials(c, 10.0) for c in costs[:1000]], use_db=False)
+        record("pricing.calculate_financials_bulk[N]", lambda: calculate_financials_bulk(costs, 10.0), use_db=False)
+
+        ai = ProcurementAI.load_or_train(os.path.join(tmp, "models"))
+        tasks = parts.head(256)
+        item = tasks.iloc[0]
+
+        def predict_one():
+            ai.prediction_cache.clear()
+            return ai.predict(item['cost_price'], item['item_type'], item['stock_on_hand'], CUSTOMERS[0])
+
+        def predict_batch():
+            ai.prediction_cache.clear()
+            return ai.predict_many(tasks['cost_price'], tasks['item_type'], tasks['stock_on_hand'])[0]
+
+        record("ai.predict[uncached]", predict_one, use_db=False)
+        record("ai.predict_many[256,uncached]", predict_batch, use_db=False)
+
+        for name, fn in workflow_cases(db, sample_parts).items():
+            record(name, fn, repeat=max(args.repeat, 20))
+        db.pool.close_all()
+    return {"setup": setup, "results": results}
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report, baseline_path, threshold):
+    """Bandingkan median dengan baseline; rasio > threshold ditandai REGRESSION"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\n== vs {baseline_path} (commit {baseline['meta'].get('commit')})")
+    regressions = 0
+    for size, data in report["sizes"].items():
+        old = baseline["sizes"].get(size, {}).get("results", {})
+        for name, r in data["results"].items():
+            if name not in old or not old[name]["median_ms"]:
+                continue
+            ratio = r["median_ms"] / old[name]["median_ms"]
+            flag = "REGRESSION" if ratio > threshold else ("faster" if ratio < 1 / threshold else "")
+            regressions += flag == "REGRESSION"
+            print(f"N={size:<9}{name:<46}{old[name]['median_ms']:>12.3f}{r['median_ms']:>12.3f}{ratio:>8.2f}x  {flag}")
+    print(f"{regressions} regression(s) above {threshold:.2f}x")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=5.0, help="batas detik per operasi (minimal 1 run)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", help="file JSON hasil (default benchmarks/results/suite-<waktu>.json)")
+    parser.add_argument("--compare", help="file JSON baseline untuk dibandingkan")
+    parser.add_argument("--threshold", type=float, default=1.25)
+    args = parser.parse_args()
+
+    report = {"meta": {"timestamp": datetime.now().isoformat(timespec="seconds"), "commit": git_commit(),
+                       "python": platform.python_version(), "sqlite": sqlite3.sqlite_version,
+                       "platform": platform.platform(), "repeat": args.repeat, "seed": args.seed},
+              "sizes": {}}
+    for n in args.sizes:
+        report["sizes"][str(n)] = run_size(n, args)
+
+    out = args.out or os.path.join(RESULTS_DIR, f"suite-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nresults written to {out}")
+    if args.compare:
+        compare(report, args.compare, args.threshold)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""Generator data sintetis berskala untuk load test: parts, inquiries, quotations & localization projects.
+
+Kosakata part (prefix / description / unit) sama dengan populate_dummy_data. Inquiry tersebar di
+beberapa tahun untuk customer di CUSTOMERS; inquiry lama sudah selesai (Finished / PO Created /
+Cancelled), inquiry 60 hari terakhir masih di pipeline. Quotation & localization project dibuat
+sesuai status inquiry-nya, jadi join & agregat dashboard berisi data yang konsisten.
+
+Dipakai oleh benchmarks.suite; bisa juga dijalankan langsung untuk mengisi DB kosong:
+    python -m benchmarks.synthetic_data demo.db --parts 100000 --inquiries 100000
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from modules.database_manager import DatabaseManager, PART_DESCRIPTIONS, PART_PREFIXES, PART_UNITS
+from modules.parts_import import REGION_COLUMNS
+from modules.pricing import calculate_financials_bulk
+
+CUSTOMERS = ['KMSI', 'KCIC', 'KPAC', 'KMM', 'KME', 'KEPO', 'KAC', 'KMSA', 'KSAF', 'KLTD'] # = CUSTOMER_LIST di app.py
+SUPPLIERS = ['PT. United Tractors Pandu Eng', 'PT. Astra Otoparts', 'PT. Komatsu Undercarriage', 'Local Workshop A', 'Local Workshop B']
+
+# Komposisi status: inquiry yang sudah lewat 60 hari vs yang masih berjalan
+CLOSED_STATUS_MIX = {"Finished": 0.40, "PO Created": 0.45, "Cancelled": 0.15}
+PIPELINE_STATUS_MIX = {"Pending Validation": 0.25, "Needs Localization": 0.08, "In Development": 0.12,
+                       "Ready for Costing": 0.20, "Waiting Approval": 0.20, "Revise Required": 0.08,
+                       "Finished": 0.04, "PO Created": 0.03}
+PIPELINE_DAYS = 60
+# Status inquiry -> status quotation-nya (inquiry lain belum punya quotation)
+QUOTE_STATUS = {"Waiting Approval": "Draft", "Revise Required": "Rejected", "Finished": "Approved", "PO Created": "Approved"}
+LOCALIZED_SHARE = 0.10 # Porsi inquiry yang sudah lewat costing dan dulunya butuh localization
+
+
+def generate_parts(n, seed=42):
+    """DataFrame parts master (kolom sama dengan import CSV); part_number unik untuk n <= 9 juta"""
+    rng = np.random.default_rng(seed)
+    i = np.arange(n)
+    middle = (100 + i // 10_000 % 900).astype(str)
+    tail = np.char.zfill((i % 10_000).astype(str), 4)
+    cost = rng.uniform(10.0, 800.0, n).round(2)
+    parts = pd.DataFrame({
+        'part_number': np.char.add(np.char.add(rng.choice(PART_PREFIXES, n), "-"), np.char.add(np.char.add(middle, "-"), tail)),
+        'description': rng.choice(PART_DESCRIPTIONS, n),
+        'unit': rng.choice(PART_UNITS, n),
+        'stock_on_hand': rng.integers(0, 151, n),
+        'item_type': rng.choice(["Local", "Import"], n),
+        'cost_price': cost,
+    })
+    for col in REGION_COLUMNS: # Harga region 1.1x - 1.5x cost, sama dengan gen_market_price
+        parts[col] = (cost * rng.uniform(1.1, 1.5, n)).round(2)
+    return parts
+
+
+def _sample(rng, mix, n):
+    return rng.choice(list(mix), n, p=np.array(list(mix.values())) / sum(mix.values()))
+
+
+def generate_inquiries(n, part_numbers, first_id=1, years=2, seed=42, today=None):
+    """DataFrame inquiries (id, date, customer_name, part_number, qty, status, revision_count, po_number)"""
+    rng = np.random.default_rng(seed + 1)
+    today = today or date.today()
+    age_days = np.sort(rng.integers(0, int(years * 365), n))[::-1] # id naik = tanggal naik
+    status = np.where(age_days > PIPELINE_DAYS, _sample(rng, CLOSED_STATUS_MIX, n), _sample(rng, PIPELINE_STATUS_MIX, n))
+    # Customer & part tidak merata: customer besar lebih sering inquiry, 20% inquiry untuk 1% part fast moving
+    customer_weights = 1 / np.arange(1, len(CUSTOMERS) + 1)
+    fast_moving = rng.permutation(len(part_numbers))[:max(1, len(part_numbers) // 100)]
+    part_idx = np.where(rng.random(n) < 0.2, rng.choice(fast_moving, n), rng.integers(0, len(part_numbers), n))
+    ids = np.arange(first_id, first_id + n)
+    revisions = np.where(status == "Revise Required", 1, 0) + rng.binomial(2, 0.1, n)
+    return pd.DataFrame({
+        'id': ids,
+        'date': pd.to_datetime(today) - pd.to_timedelta(age_days, unit="D"),
+        'customer_name': rng.choice(CUSTOMERS, n, p=customer_weights / customer_weights.sum()),
+        'part_number': np.asarray(part_numbers)[part_idx],
+        'qty': rng.integers(1, 101, n),
+        'status': status,
+        'revision_count': revisions,
+        'po_number': np.where(status == "PO Created", np.char.add("PO-", ids.astype(str)), None),
+    }).assign(date=lambda df: df['date'].dt.strftime("%Y-%m-%d"))
+
+
+def generate_quotations(inquiries, parts, seed=42):
+    """Quotation untuk inquiry yang sudah di-costing; harga dari calculate_financials_bulk"""
+    rng = np.random.default_rng(seed + 2)
+    quoted = inquiries[inquiries['status'].isin(list(QUOTE_STATUS))]
+    part = parts.set_index('part_number').loc[quoted['part_number'], ['cost_price', 'item_type', 'stock_on_hand']]
+    n = len(quoted)
+    profit = rng.choice([5.0, 8.0, 10.0, 12.0, 15.0, 20.0], n)
+    fin = calculate_financials_bulk(part['cost_price'].to_numpy(), profit)
+    is_import = (part['item_type'] == "Import").to_numpy()
+    return pd.DataFrame({
+        'quote_id': np.char.add("Q-S", np.char.zfill(quoted['id'].to_numpy().astype(str), 9)),
+        'inquiry_id': quoted['id'].to_numpy(),
+        'customer_name': quoted['customer_name'].to_numpy(),
+        'part_number': quoted['part_number'].to_numpy(),
+        'sales_price': fin['Sales Price'].to_numpy(),
+        'profit_percentage': profit,
+        'cost_price': part['cost_price'].to_numpy(),
+        'sdc': fin['SDC'].to_numpy(),
+        'svc': fin['SVC'].to_numpy(),
+        'moq': np.maximum(10, np.round((1000 / (part['cost_price'].to_numpy() + 1) + is_import * 50) / 10) * 10).astype(int),
+        'leadtime': np.maximum(3, np.rint(7 + is_import * 60 - part['stock_on_hand'].to_numpy() * 0.1 + rng.normal(0, 3, n))).astype(int),
+        'status': quoted['status'].map(QUOTE_STATUS).to_numpy(),
+    })
+
+
+def generate_localization(inquiries, seed=42):
+    """Project On Progress untuk inquiry In Development + project Finished untuk sebagian inquiry yang sudah lewat"""
+    rng = np.random.default_rng(seed + 3)
+    done_statuses = ["Ready for Costing", "Waiting Approval", "Revise Required", "Finished", "PO Created"]
+    active = inquiries['status'] == "In Development"
+    finished = inquiries['status'].isin(done_statuses) & (rng.random(len(inquiries)) < LOCALIZED_SHARE)
+    projects = inquiries[active | finished]
+    start = pd.to_datetime(projects['date']) + pd.to_timedelta(rng.integers(1, 8, len(projects)), unit="D")
+    return pd.DataFrame({
+        'inquiry_id': projects['id'].to_numpy(),
+        'part_number': projects['part_number'].to_numpy(),
+        'supplier_name': rng.choice(SUPPLIERS, len(projects)),
+        'start_date': start.dt.strftime("%Y-%m-%d").to_numpy(),
+        'target_finish_date': (start + pd.to_timedelta(rng.integers(30, 181, len(projects)), unit="D")).dt.strftime("%Y-%m-%d").to_numpy(),
+        'development_status': np.where(projects['status'] == "In Development", "On Progress", "Finished"),
+        'notes': "Synthetic load-test project",
+    })
+
+
+def _insert(db, table, df, tables, chunk=100_000):
+    cols = list(df.columns)
+    sql = f"INSERT INTO {table} ({', '.join(cols)}) VALUES ({', '.join('?' for _ in cols)})"
+    with db._cursor(*tables) as c:
+        c.execute("BEGIN IMMEDIATE")
+        for start in range(0, len(df), chunk):
+            part = df.iloc[start:start + chunk]
+            c.executemany(sql, zip(*(part[col].tolist() for col in cols)))
+
+
+def populate(db, parts=1000, inquiries=1000, years=2, seed=42):
+    """Isi db dengan data sintetis. Parts lewat bulk_import_parts (jalur import asli), sisanya executemany.
+
+    Return dict jumlah baris & waktu per tabel (detik).
+    """
+    timings = {}
+    start = time.perf_counter()
+    parts_df = generate_parts(parts, seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "parts.csv")
+        parts_df.to_csv(path, index=False)
+        db.bulk_import_parts(path)
+    timings['parts_s'] = round(time.perf_counter() - start, 2)
+
+    with db.pool.connection() as conn:
+        first_id = conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM inquiries").fetchone()[0]
+    start = time.perf_counter()
+    inquiries_df = generate_inquiries(inquiries, parts_df['part_number'].to_numpy(), first_id, years, seed)
+    _insert(db, "inquiries", inquiries_df, ("inquiries",))
+    timings['inquiries_s'] = round(time.perf_counter() - start, 2)
+
+    start = time.perf_counter()
+    quotations_df = generate_quotations(inquiries_df, parts_df, seed)
+    _insert(db, "quotations", quotations_df, ("quotations",))
+    timings['quotations_s'] = round(time.perf_counter() - start, 2)
+
+    start = time.perf_counter()
+    projects_df = generate_localization(inquiries_df, seed)
+    _insert(db, "localization_projects", projects_df, ("localization_projects",))
+    timings['localization_s'] = round(time.perf_counter() - start, 2)
+
+    return {"parts": len(parts_df), "inquiries": len(inquiries_df), "quotations": len(quotations_df),
+            "localization_projects": len(projects_df), **timings}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("db_path")
+    parser.add_argument("--parts", type=int, default=1000)
+    parser.add_argument("--inquiries", type=int, default=1000)
+    parser.add_argument("--years", type=float, default=2)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    db = DatabaseManager(args.db_path)
+    print(populate(db, args.parts, args.inquiries, args.years, args.seed))
+    db.pool.close_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,46 +1,443 @@
+import os
+import copy
+import json
+import time
+import hashlib
+import threading
+import joblib
+from collections import OrderedDict
 import pandas as pd
 import numpy as np
+from datetime import datetime
 from sklearn.ensemble import RandomForestRegressor
+from modules.forest_inference import CompiledForest
+from modules.perf import timed
+
+try:
+    import resource # Tidak ada di Windows -> laporan peak RSS dilewati
+except ImportError:
+    resource = None
+
+# customer = kode ordinal customer (-1 = tidak dikenal / data sintetik)
+FEATURES = ['cost', 'is_import', 'stock', 'customer']
+
+# Naikkan MODEL_VERSION jika logic training / format artifact berubah
+MODEL_VERSION = 2
+TRAINING_CONFIG = {"n_estimators": 50, "random_state": 42, "n_samples": 500, "data_seed": 42}
+MODEL_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "models")
+HISTORY_ARTIFACT = "procurement_ai_history.joblib"
+# Backend inference: "compiled" = forest di-export ke array NumPy (hasil identik, jauh lebih cepat
+# untuk 1 baris), "sklearn" = RandomForestRegressor.predict. Bisa diganti lewat env AMI_AI_BACKEND.
+INFERENCE_BACKENDS = ("compiled", "sklearn")
+INFERENCE_BACKEND = os.environ.get("AMI_AI_BACKEND", "compiled")
+# Batch besar (mis. Bulk Predict ribuan part) lebih cepat di loop C sklearn; hasil kedua backend identik
+COMPILED_MAX_BATCH = 256
+
+class PredictionCache:
+    """LRU cache hasil prediksi (MOQ, Leadtime); hit dilayani tanpa menyentuh model"""
+    def __init__(self, max_entries=4096):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries), "evictions": self.evictions,
+                    "hit_rate": round(self.hits / total, 3) if total else 0.0}
 
 class ProcurementAI:
-    def __init__(self):
-        self.model_moq = RandomForestRegressor(n_estimators=50, random_state=42)
-        self.model_leadtime = RandomForestRegressor(n_estimators=50, random_state=42)
-        self.is_trained = False
+    def __init__(self, config=None, cache_size=4096, stock_bucket=1, backend=None):
+        self.config = dict(TRAINING_CONFIG, **(config or {}))
+        self.backend = backend or INFERENCE_BACKEND
+        if self.backend not in INFERENCE_BACKENDS:
+            raise ValueError(f"Backend inference tidak dikenal: {self.backend} (pilih {', '.join(INFERENCE_BACKENDS)})")
+        # Key cache: (versi model, cost dibulatkan sen, import?, bucket stock, kode customer).
+        # stock_bucket > 1 -> stock dibulatkan ke bawah ke kelipatan bucket sebelum predict.
+        self.prediction_cache = PredictionCache(cache_size)
+        self.stock_bucket = stock_bucket
+        # (model_moq, model_leadtime, customer_codes, version, compiled) diganti sekaligus -> predict tidak
+        # pernah memakai campuran model lama & baru saat training background selesai
+        self._active = (self._new_forest(), self._new_forest(), {}, None, None)
+        self.load_info = {}
+        self.train_info = {"source": "synthetic"}
 
-    def train_model(self):
-        """Simulasi training model dengan data sintetik"""
-        # Feature: [Cost Price, Is_Import (0/1), Stock]
+    def _new_forest(self, n_estimators=None):
+        return RandomForestRegressor(n_estimators=n_estimators or self.config['n_estimators'],
+                                     random_state=self.config['random_state'])
+
+    @property
+    def model_moq(self):
+        return self._active[0]
+
+    @property
+    def model_leadtime(self):
+        return self._active[1]
+
+    @property
+    def customer_codes(self):
+        return self._active[2]
+
+    @property
+    def model_version(self):
+        return self._active[3]
+
+    @property
+    def is_trained(self):
+        return self._active[3] is not None
+
+    def _swap(self, model_moq, model_leadtime, customer_codes, version):
+        # Export ke array dilakukan sekali per model baru (bukan per predict); model sklearn tetap
+        # disimpan untuk save artifact & warm start
+        compiled = None
+        if self.backend == "compiled":
+            compiled = (CompiledForest.from_sklearn(model_moq), CompiledForest.from_sklearn(model_leadtime))
+        self._active = (model_moq, model_leadtime, customer_codes, version, compiled)
+        self.prediction_cache.clear() # Hasil model lama tidak berlaku lagi (versi juga bagian dari key)
+
+    def build_training_data(self):
+        """Simulasi data training sintetik"""
+        # Feature: [Cost Price, Is_Import (0/1), Stock, Customer (-1)]
         # Target: [MOQ, Leadtime]
-        
+
         # Buat 500 data dummy untuk belajar pola
-        np.random.seed(42)
-        cost = np.random.uniform(10, 1000, 500)
-        is_import = np.random.choice([0, 1], 500)
-        stock = np.random.randint(0, 200, 500)
-        
-        X = pd.DataFrame({'cost': cost, 'is_import': is_import, 'stock': stock})
-        
+        n = self.config['n_samples']
+        np.random.seed(self.config['data_seed'])
+        cost = np.random.uniform(10, 1000, n)
+        is_import = np.random.choice([0, 1], n)
+        stock = np.random.randint(0, 200, n)
+
+        X = pd.DataFrame({'cost': cost, 'is_import': is_import, 'stock': stock, 'customer': -1})[FEATURES]
+
         # Logic Pattern: Import leadtime lama, Barang murah MOQ tinggi
-        y_moq = (1000 / (cost + 1)) + (is_import * 50) 
+        y_moq = (1000 / (cost + 1)) + (is_import * 50)
         y_lt = 7 + (is_import * 60) + (stock * -0.1)
-        
-        self.model_moq.fit(X, y_moq)
-        self.model_leadtime.fit(X, y_lt)
-        self.is_trained = True
+        return X, y_moq, y_lt
+
+    def build_history_data(self, chunks, customer_codes=None):
+        """Gabungkan chunk history (cost_price, item_type, stock_on_hand, customer_name, moq, leadtime).
+
+        Tiap chunk langsung dikonversi ke array float, jadi DataFrame mentah tidak ditumpuk di memory.
+        Kode customer lama dipertahankan (penting untuk warm start), customer baru ditambahkan di belakang.
+        """
+        codes = dict(customer_codes or {})
+        arrays = []
+        for chunk in chunks:
+            customers = chunk['customer_name'].fillna("").tolist()
+            arrays.append(np.column_stack([
+                chunk['cost_price'].fillna(0).to_numpy(dtype=float),
+                (chunk['item_type'] == "Import").to_numpy(dtype=float),
+                chunk['stock_on_hand'].fillna(0).to_numpy(dtype=float),
+                np.fromiter((codes.setdefault(c, len(codes)) for c in customers), dtype=float, count=len(customers)),
+                chunk['moq'].to_numpy(dtype=float),
+                chunk['leadtime'].to_numpy(dtype=float),
+            ]))
+        data = np.concatenate(arrays) if arrays else np.empty((0, 6))
+        return pd.DataFrame(data[:, :4], columns=FEATURES), data[:, 4], data[:, 5], codes
+
+    def fingerprint(self, X, y_moq, y_lt, extra=None):
+        """Hash dari versi model + config + data training, dipakai sebagai versi artifact"""
+        h = hashlib.sha256()
+        meta = {"model_version": MODEL_VERSION, "config": self.config}
+        if extra:
+            meta["extra"] = extra
+        h.update(json.dumps(meta, sort_keys=True).encode())
+        for arr in (X.to_numpy(dtype=float), np.asarray(y_moq, dtype=float), np.asarray(y_lt, dtype=float)):
+            h.update(np.ascontiguousarray(arr).tobytes())
+        return h.hexdigest()[:16]
+
+    @timed("ai.train_model")
+    def train_model(self):
+        X, y_moq, y_lt = self.build_training_data()
+        self._fit(X, y_moq, y_lt)
+
+    def _fit(self, X, y_moq, y_lt, customer_codes=None, model_moq=None, model_leadtime=None):
+        """Fit di objek model baru lalu swap; model yang sedang dipakai predict tidak disentuh"""
+        model_moq = model_moq if model_moq is not None else self._new_forest()
+        model_leadtime = model_leadtime if model_leadtime is not None else self._new_forest()
+        model_moq.fit(X, y_moq)
+        model_leadtime.fit(X, y_lt)
+        # Jumlah tree hasil warm start ikut di versi (data sama, tree lebih banyak = model berbeda)
+        trees = model_moq.n_estimators
+        extra = {"trees": trees} if trees != self.config['n_estimators'] else None
+        self._swap(model_moq, model_leadtime, customer_codes or {}, self.fingerprint(X, y_moq, y_lt, extra))
+
+    @timed("ai.train_from_history")
+    def train_from_history(self, chunks, approvals=0, warm_start_trees=None, max_trees=200, min_rows=30):
+        """Training dari history quotation Approved (lihat DatabaseManager.iter_training_history).
+
+        warm_start_trees=k -> model history yang ada ditambah k tree baru (lebih cepat dari refit penuh),
+        selama total tree <= max_trees; selain itu refit penuh. Return train_info.
+        """
+        start = time.perf_counter()
+        rss_before = _peak_rss_mb()
+        warm = warm_start_trees and self.train_info.get("source") == "history" \
+            and self.model_moq.n_estimators + warm_start_trees <= max_trees
+        X, y_moq, y_lt, codes = self.build_history_data(chunks, self.customer_codes if warm else None)
+        if len(X) < min_rows:
+            raise ValueError(f"History belum cukup untuk training: {len(X)} quotation Approved (minimal {min_rows})")
+
+        if warm:
+            model_moq, model_leadtime = copy.deepcopy(self.model_moq), copy.deepcopy(self.model_leadtime)
+            for model in (model_moq, model_leadtime):
+                model.set_params(warm_start=True, n_estimators=model.n_estimators + warm_start_trees)
+        else:
+            model_moq = model_leadtime = None
+        self._fit(X, y_moq, y_lt, codes, model_moq, model_leadtime)
+
+        self.train_info = {
+            "source": "history",
+            "mode": "warm_start" if warm else "full",
+            "rows": len(X),
+            "customers": len(codes),
+            "trees": self.model_moq.n_estimators,
+            "approvals": approvals,
+            "seconds": round(time.perf_counter() - start, 3),
+            "data_mb": round((X.to_numpy().nbytes + y_moq.nbytes + y_lt.nbytes) / 1e6, 2),
+            "peak_rss_mb": _peak_rss_mb(),
+            "peak_rss_growth_mb": round(_peak_rss_mb() - rss_before, 1) if resource is not None else None,
+            "version": self.model_version,
+            "trained_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        return self.train_info
 
-    def predict(self, cost_price, item_type_str, stock):
+    # --- Artifact (simpan / load model dari disk) ---
+    @staticmethod
+    def artifact_path(version, model_dir=MODEL_DIR):
+        return os.path.join(model_dir, f"procurement_ai_{version}.joblib")
+
+    def _dump(self, path, **extra):
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        joblib.dump({"version": self.model_version, "config": self.config,
+                     "model_moq": self.model_moq, "model_leadtime": self.model_leadtime, **extra}, tmp_path)
+        os.replace(tmp_path, path) # atomic, aman jika beberapa proses menyimpan bersamaan
+        return path
+
+    def save(self, model_dir=MODEL_DIR):
+        os.makedirs(model_dir, exist_ok=True)
+        return self._dump(self.artifact_path(self.model_version, model_dir))
+
+    def save_history(self, model_dir=MODEL_DIR):
+        """Simpan model hasil training history (1 file, ditimpa atomic tiap retrain)"""
+        os.makedirs(model_dir, exist_ok=True)
+        return self._dump(os.path.join(model_dir, HISTORY_ARTIFACT), model_format=MODEL_VERSION,
+                          customer_codes=self.customer_codes, train_info=self.train_info)
+
+    def load_history(self, model_dir=MODEL_DIR):
+        """Pakai model history dari disk jika ada & formatnya cocok. Return True jika berhasil"""
+        path = os.path.join(model_dir, HISTORY_ARTIFACT)
+        if not os.path.exists(path):
+            return False
+        try:
+            artifact = joblib.load(path)
+        except Exception:
+            return False # Artifact rusak -> tetap pakai model sekarang
+        if artifact.get("model_format") != MODEL_VERSION:
+            return False
+        self._swap(artifact["model_moq"], artifact["model_leadtime"], artifact["customer_codes"], artifact["version"])
+        self.train_info = artifact["train_info"]
+        return True
+
+    @classmethod
+    def load_or_train(cls, model_dir=MODEL_DIR, config=None, backend=None):
+        """Load model dari disk jika versi cocok, training ulang hanya jika config/data berubah"""
+        start = time.perf_counter()
+        ai = cls(config, backend=backend)
+        X, y_moq, y_lt = ai.build_training_data()
+        version = ai.fingerprint(X, y_moq, y_lt)
+        path = cls.artifact_path(version, model_dir)
+
+        source = "trained"
+        if os.path.exists(path):
+            try:
+                artifact = joblib.load(path)
+                if artifact.get("version") == version:
+                    ai._swap(artifact["model_moq"], artifact["model_leadtime"], {}, version)
+                    source = "disk"
+            except Exception:
+                pass # Artifact rusak -> training ulang
+        if not ai.is_trained:
+            ai._fit(X, y_moq, y_lt)
+            path = ai.save(model_dir)
+
+        ai.load_info = {
+            "source": source,
+            "version": version,
+            "seconds": round(time.perf_counter() - start, 4),
+            "artifact_bytes": os.path.getsize(path),
+        }
+        return ai
+
+    def _cache_key(self, version, codes, cost_price, item_type, stock, customer):
+        stock = int(stock) // self.stock_bucket * self.stock_bucket
+        return (version, round(float(cost_price), 2), item_type == "Import", stock, codes.get(customer, -1))
+
+    @timed("ai.predict")
+    def predict(self, cost_price, item_type_str, stock, customer=None):
+        if not self.is_trained:
+            self.train_model()
+        active = self._active
+        key = self._cache_key(active[3], active[2], cost_price, item_type_str, stock, customer)
+        result = self.prediction_cache.get(key)
+        if result is None:
+            moq, lt = self._predict_keys(active, [key])
+            result = (int(moq[0]), int(lt[0]))
+            self.prediction_cache.put(key, result)
+        return result
+
+    @timed("ai.predict_many")
+    def predict_many(self, cost_prices, item_types, stocks, customers=None):
+        """Prediksi MOQ & Leadtime sekaligus untuk banyak part; hanya yang belum ada di cache yang
+        dihitung model (1x predict per model untuk semua miss)"""
         if not self.is_trained:
             self.train_model()
-            
-        is_import = 1 if item_type_str == "Import" else 0
-        features = pd.DataFrame([[cost_price, is_import, stock]], columns=['cost', 'is_import', 'stock'])
-        
-        pred_moq = self.model_moq.predict(features)[0]
-        pred_lt = self.model_leadtime.predict(features)[0]
-        
-        # Post-processing agar angkanya cantik (bulatkan)
-        final_moq = int(max(10, round(pred_moq, -1))) # Minimal 10, round puluhan
-        final_lt = int(max(3, round(pred_lt)))        # Minimal 3 hari
-        
-        return final_moq, final_lt
\ No newline at end of file
+        active = self._active
+        cost_prices, item_types, stocks = list(cost_prices), list(item_types), list(stocks)
+        customers = [None] * len(cost_prices) if customers is None else list(customers)
+        keys = [self._cache_key(active[3], active[2], c, t, s, cu)
+                for c, t, s, cu in zip(cost_prices, item_types, stocks, customers)]
+        results = [self.prediction_cache.get(k) for k in keys]
+        missing = [i for i, r in enumerate(results) if r is None]
+        if missing:
+            moq, lt = self._predict_keys(active, [keys[i] for i in missing])
+            for i, m, l in zip(missing, moq.tolist(), lt.tolist()):
+                results[i] = (m, l)
+                self.prediction_cache.put(keys[i], results[i])
+        if not results:
+            return np.empty(0, dtype=int), np.empty(0, dtype=int)
+        final_moq, final_lt = np.array(results, dtype=int).T
+        return final_moq, final_lt
+
+    def _predict_keys(self, active, keys):
+        """Jalankan model untuk list cache key (fitur diambil dari key, jadi hasil = isi cache)"""
+        model_moq, model_leadtime, _, _, compiled = active
+        if compiled is not None and len(keys) <= COMPILED_MAX_BATCH:
+            features = np.array([k[1:] for k in keys], dtype=float)
+            pred_moq = compiled[0].predict(features)
+            pred_lt = compiled[1].predict(features)
+        else:
+            features = pd.DataFrame([k[1:] for k in keys], columns=FEATURES, dtype=float)
+            pred_moq = model_moq.predict(features)
+            pred_lt = model_leadtime.predict(features)
+
+        # Post-processing agar angkanya cantik (bulatkan), sama dengan versi 1 baris
+        final_moq = np.maximum(10, _round_tens(pred_moq)).astype(int) # Minimal 10, round puluhan
+        final_lt = np.maximum(3, np.rint(pred_lt)).astype(int)          # Minimal 3 hari
+
+        return final_moq, final_lt
+
+    def prediction_cache_stats(self):
+        return self.prediction_cache.stats()
+
+
+class ModelTrainer:
+    """Worker background: training ulang ProcurementAI dari history quotation Approved.
+
+    Retrain hanya jika sudah ada min_new_approvals approval baru sejak training terakhir.
+    Retrain berikutnya memakai warm start (tambah refresh_trees tree); jika total tree melewati
+    max_trees, model di-refit penuh. Model baru di-swap atomic ke objek ai yang dipakai app.
+    """
+    def __init__(self, db, ai, min_new_approvals=50, min_rows=30, refresh_trees=10, max_trees=200,
+                 poll_seconds=60.0, chunksize=50_000, model_dir=MODEL_DIR):
+        self.db = db
+        self.ai = ai
+        self.min_new_approvals = min_new_approvals
+        self.min_rows = min_rows
+        self.refresh_trees = refresh_trees
+        self.max_trees = max_trees
+        self.poll_seconds = poll_seconds
+        self.chunksize = chunksize
+        self.model_dir = model_dir
+        self.last_error = None
+        self._force = False
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.ai.load_history(self.model_dir) # Model history terakhir dari disk, tanpa training ulang
+        self._thread = threading.Thread(target=self._run, name="model-trainer", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=10.0):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def wake(self, force=False):
+        """Cek (force=True: jalankan) retrain sekarang, di thread worker"""
+        self._force = self._force or force
+        self._wake.set()
+
+    def pending_approvals(self, approvals=None):
+        """Jumlah perubahan quotation Approved sejak training terakhir (dari tabel agregat dashboard)"""
+        if approvals is None:
+            approvals = self.db.get_dashboard_summary()['completed']
+        return abs(approvals - self.ai.train_info.get("approvals", 0))
+
+    def train_once(self, force=False):
+        with self._lock:
+            approvals = self.db.get_dashboard_summary()['completed']
+            if not force and self.pending_approvals(approvals) < self.min_new_approvals:
+                return None
+            info = self.ai.train_from_history(self.db.iter_training_history(self.chunksize), approvals=approvals,
+                                              warm_start_trees=self.refresh_trees, max_trees=self.max_trees,
+                                              min_rows=self.min_rows)
+            self.ai.save_history(self.model_dir)
+            return info
+
+    def _run(self):
+        while not self._stop.is_set():
+            force, self._force = self._force, False
+            try:
+                self.train_once(force)
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+            self._wake.wait(self.poll_seconds)
+            self._wake.clear()
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if os.uname().sysname == "Darwin" else 1024), 1) # macOS: bytes, Linux: KB
+
+
+def _round_tens(values):
+    """Sama dengan round(x, -1) Python; nilai tepat di tengah dibulatkan ulang satu per satu"""
+    out = np.round(values, -1)
+    scaled = values / 10
+    near_half = np.abs(np.abs(scaled - np.trunc(scaled)) - 0.5) < 1e-9
+    if near_half.any():
+        out[near_half] = [round(v, -1) for v in values[near_half].tolist()]
+    return out
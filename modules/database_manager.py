@@ -1,209 +1,1141 @@
 import sqlite3
+import threading
+import queue
+import time
 import pandas as pd
 import random
+import difflib
+import re
+from collections import OrderedDict
+from contextlib import contextmanager
 from datetime import datetime
+from modules.parts_import import PART_COLUMNS, REGION_COLUMNS, REQUIRED_COLUMNS, fill_region_prices, read_part_chunks, validate_part_chunk
+from modules.perf import instrument_methods
+from modules.pricing import calculate_financials_bulk
+
+# Kosakata data dummy parts (dipakai populate_dummy_data & generator data sintetis benchmark)
+PART_PREFIXES = ['600', '14X', '708', '070', '20Y', '421', '040', '099']
+PART_DESCRIPTIONS = [
+    'Hydraulic Filter', 'O-Ring Seal', 'Piston Pump', 'Fuel Injector',
+    'Bushing bucket', 'Track Shoe', 'Idler Assy', 'Radiator', 'Alternator',
+    'Starter Motor', 'Turbocharger', 'Water Pump', 'Oil Cooler', 'Gasket Kit',
+    'Solenoid Valve', 'Bearing', 'Cylinder Head', 'Cutting Edge'
+]
+PART_UNITS = ["PCS", "SET", "KIT", "ASSY"]
+
+class ConnectionPool:
+    """Pool koneksi SQLite (WAL) yang dipakai bersama oleh semua session/thread Streamlit"""
+    PRAGMAS = (
+        "PRAGMA journal_mode=WAL",     # Reader tidak diblok oleh writer
+        "PRAGMA synchronous=NORMAL",   # Aman untuk WAL, fsync lebih sedikit
+        "PRAGMA cache_size=-16000",    # ~16 MB page cache per koneksi
+        "PRAGMA temp_store=MEMORY",
+    )
+
+    def __init__(self, db_name, size=8, busy_timeout=10.0):
+        self.db_name = db_name
+        self.size = size
+        self.busy_timeout = busy_timeout
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_name, timeout=self.busy_timeout, check_same_thread=False)
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout * 1000)}")
+        for pragma in self.PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                try:
+                    return self._connect()
+                except Exception:
+                    self._created -= 1
+                    raise
+        return self._idle.get(timeout=self.busy_timeout)
+
+    def release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close_all(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._lock:
+            self._created = 0
+
+class QueryCache:
+    """Cache hasil read (DataFrame) per (query, params), di-invalidate lewat versi per tabel.
+
+    Setiap entry menyimpan snapshot versi tabel-tabel yang dibaca query. Method yang menulis
+    menaikkan versi tabelnya, sehingga entry lama otomatis dianggap basi (miss). Tulisan dari proses
+    lain (mis. server API) masuk lewat sync_versions dari tabel table_versions di DB.
+    Dibatasi jumlah entry dan total memory (DataFrame.memory_usage deep); hasil yang lebih besar
+    dari max_entry_bytes (mis. get_all_parts di 1M baris) tidak di-cache sama sekali.
+    """
+    def __init__(self, max_entries=256, max_bytes=64_000_000, max_entry_bytes=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes if max_entry_bytes is not None else max_bytes // 4
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._db_versions = {} # Versi table_versions di DB yang terakhir dilihat
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.skipped = 0
+
+    def snapshot(self, tables):
+        with self._lock:
+            return tuple(self._versions.get(t, 0) for t in tables)
+
+    def get(self, key, tables):
+        with self._lock:
+            entry = self._entries.get(key)
+            current = tuple(self._versions.get(t, 0) for t in tables)
+            if entry is not None and entry[0] == current:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1].copy() # Copy supaya caller bebas memodifikasi DataFrame
+            self.misses += 1
+            return None
+
+    def _frame_bytes(self, df):
+        shallow = int(df.memory_usage(index=True, deep=False).sum())
+        if shallow > self.max_entry_bytes: # Sudah pasti terlalu besar, lewati hitung deep (scan semua string)
+            return shallow
+        return int(df.memory_usage(index=True, deep=True).sum())
+
+    def put(self, key, snapshot, df):
+        size = self._frame_bytes(df)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[2]
+            if size > self.max_entry_bytes:
+                self.skipped += 1
+                return
+            self._entries[key] = (snapshot, df.copy(), size)
+            self.bytes += size
+            while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                _, (_, _, evicted) = self._entries.popitem(last=False)
+                self.bytes -= evicted
+
+    def invalidate(self, *tables):
+        with self._lock:
+            for t in tables:
+                self._versions[t] = self._versions.get(t, 0) + 1
+
+    def sync_versions(self, db_versions, invalidate=True):
+        """db_versions: [(tabel, versi)] dari table_versions. Tabel yang versinya naik sejak dilihat terakhir
+        di-invalidate; invalidate=False hanya mencatat (tulisan proses ini sendiri, sudah di-invalidate)"""
+        with self._lock:
+            for t, version in db_versions:
+                if version > self._db_versions.get(t, 0):
+                    self._db_versions[t] = version
+                    if invalidate:
+                        self._versions[t] = self._versions.get(t, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries),
+                    "mb": round(self.bytes / 1e6, 1), "skipped": self.skipped,
+                    "hit_rate": round(self.hits / total, 3) if total else 0.0}
+
+def _bump_table_versions(c, tables):
+    """Naikkan versi tabel di table_versions dalam transaksi tulis c; return [(tabel, versi baru)]"""
+    tables = sorted(set(tables))
+    c.executemany("INSERT INTO table_versions (name, version) VALUES (?, 1) "
+                  "ON CONFLICT(name) DO UPDATE SET version = version + 1", [(t,) for t in tables])
+    return c.execute(f"SELECT name, version FROM table_versions WHERE name IN ({','.join('?' for _ in tables)})",
+                     tables).fetchall()
+
+# Index FTS5 atas tabel parts (external content) -> kolom yang diindex; disinkronkan lewat trigger
+PARTS_FTS_INDEXES = {"parts_search": ("part_number", "description"), "parts_words": ("description",)}
+
+def _fts_trigger_sql(fts):
+    cols = PARTS_FTS_INDEXES[fts]
+    names, new_vals, old_vals = ', '.join(cols), ', '.join(f"new.{c}" for c in cols), ', '.join(f"old.{c}" for c in cols)
+    return {
+        f"{fts}_ai": f"""CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON parts BEGIN
+                    INSERT INTO {fts}(rowid, {names}) VALUES (new.rowid, {new_vals});
+                 END""",
+        f"{fts}_ad": f"""CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON parts BEGIN
+                    INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.rowid, {old_vals});
+                 END""",
+        f"{fts}_au": f"""CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {names} ON parts BEGIN
+                    INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.rowid, {old_vals});
+                    INSERT INTO {fts}(rowid, {names}) VALUES (new.rowid, {new_vals});
+                 END""",
+    }
+
+def _existing_fts_indexes(c):
+    return [fts for fts in PARTS_FTS_INDEXES
+            if c.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (fts,)).fetchone() is not None]
+
+def _suspend_fts_triggers(c):
+    """Drop trigger sinkron FTS (dalam transaksi c); wajib diikuti _restore_fts_triggers di transaksi yang sama"""
+    for fts in _existing_fts_indexes(c):
+        for name in _fts_trigger_sql(fts):
+            c.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+def _restore_fts_triggers(c):
+    """Pasang lagi trigger FTS dan rebuild index sekali (lebih cepat dari trigger per baris untuk import besar)"""
+    for fts in _existing_fts_indexes(c):
+        for sql in _fts_trigger_sql(fts).values():
+            c.execute(sql)
+        c.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+def _create_parts_search_index(c):
+    """FTS5 (trigram) atas part_number + description, disinkronkan dengan tabel parts lewat trigger.
+
+    Jika SQLite tidak punya FTS5/trigram, index dilewati dan search_parts memakai LIKE.
+    """
+    try:
+        c.execute("""CREATE VIRTUAL TABLE IF NOT EXISTS parts_search USING fts5(
+                        part_number, description, content='parts', content_rowid='rowid', tokenize='trigram')""")
+    except sqlite3.OperationalError:
+        return
+    for sql in _fts_trigger_sql("parts_search").values():
+        c.execute(sql)
+    c.execute("INSERT INTO parts_search(parts_search) VALUES ('rebuild')")
+
+def _create_parts_words_index(c):
+    """FTS5 per kata (unicode61) atas description + fts5vocab-nya: kosakata kata untuk fuzzy search.
+
+    Kosakata di-maintain FTS sendiri (trigger yang sama seperti parts_search), tanpa scan tabel parts.
+    """
+    try:
+        c.execute("""CREATE VIRTUAL TABLE IF NOT EXISTS parts_words USING fts5(
+                        description, content='parts', content_rowid='rowid', tokenize='unicode61 remove_diacritics 2')""")
+        c.execute("CREATE VIRTUAL TABLE IF NOT EXISTS parts_words_vocab USING fts5vocab(parts_words, 'row')")
+    except sqlite3.OperationalError:
+        return
+    for sql in _fts_trigger_sql("parts_words").values():
+        c.execute(sql)
+    c.execute("INSERT INTO parts_words(parts_words) VALUES ('rebuild')")
+
+BENCHMARK_COLUMNS = ['part_number', 'ki_std_price'] + REGION_COLUMNS + ['region_mean', 'region_min', 'region_max', 'is_competitive']
+
+def _upsert_benchmarks(c, parts_df):
+    """Hitung ulang benchmark (KI std 10% vs harga region) untuk parts_df dan simpan ke part_benchmarks"""
+    if parts_df.empty:
+        return
+    bench = parts_df[['part_number'] + REGION_COLUMNS].copy()
+    bench['ki_std_price'] = calculate_financials_bulk(parts_df['cost_price'], 10.0)['Sales Price'].to_numpy()
+    regions = parts_df[REGION_COLUMNS].astype(float)
+    bench['region_mean'] = regions.mean(axis=1).round(2)
+    bench['region_min'] = regions.min(axis=1)
+    bench['region_max'] = regions.max(axis=1)
+    # Kompetitif = harga KI standar di bawah rata-rata region (region_mean yang disimpan & ditampilkan, sudah dibulatkan)
+    bench['is_competitive'] = (bench['ki_std_price'] < bench['region_mean']).astype(int)
+    updates = ', '.join(f"{col} = excluded.{col}" for col in BENCHMARK_COLUMNS[1:])
+    c.executemany(f"INSERT INTO part_benchmarks ({', '.join(BENCHMARK_COLUMNS)}) "
+                  f"VALUES ({', '.join('?' for _ in BENCHMARK_COLUMNS)}) "
+                  f"ON CONFLICT(part_number) DO UPDATE SET {updates}",
+                  zip(*(bench[col].tolist() for col in BENCHMARK_COLUMNS)))
+
+def _existing_part_numbers(conn, part_numbers):
+    """Subset part_numbers yang ada di parts master (conn boleh koneksi atau cursor dalam transaksi)"""
+    part_numbers, found = list(set(part_numbers)), set()
+    for i in range(0, len(part_numbers), 500):
+        batch = part_numbers[i:i + 500]
+        rows = conn.execute(f"SELECT part_number FROM parts WHERE part_number IN ({','.join('?' for _ in batch)})", batch)
+        found.update(r[0] for r in rows)
+    return found
+
+def _refresh_benchmarks(c, part_numbers=None):
+    """Refresh incremental part_benchmarks untuk part_numbers tertentu (None = semua parts)"""
+    cols = ['part_number', 'cost_price'] + REGION_COLUMNS
+    select = f"SELECT {', '.join(cols)} FROM parts"
+    if part_numbers is None:
+        _upsert_benchmarks(c, pd.DataFrame(c.execute(select).fetchall(), columns=cols))
+        return
+    part_numbers = list(part_numbers)
+    for i in range(0, len(part_numbers), 500):
+        batch = part_numbers[i:i + 500]
+        rows = c.execute(f"{select} WHERE part_number IN ({','.join('?' for _ in batch)})", batch).fetchall()
+        _upsert_benchmarks(c, pd.DataFrame(rows, columns=cols))
+
+def _create_part_benchmarks(c):
+    c.execute('''CREATE TABLE IF NOT EXISTS part_benchmarks (
+                    part_number TEXT PRIMARY KEY,
+                    ki_std_price REAL,
+                    price_bkc REAL,
+                    price_prpd REAL,
+                    price_kipl REAL,
+                    price_ksc REAL,
+                    price_kac REAL,
+                    region_mean REAL,
+                    region_min REAL,
+                    region_max REAL,
+                    is_competitive INTEGER,
+                    FOREIGN KEY(part_number) REFERENCES parts(part_number)
+                )''')
+    _refresh_benchmarks(c)
+
+# --- Agregat dashboard, di-maintain incremental oleh trigger (tidak perlu scan seluruh history) ---
+# Uang disimpan dalam sen (INTEGER) supaya tambah / kurang berulang tidak menimbulkan selisih float.
+_QUOTE_SALES_CENTS = "CAST(ROUND(COALESCE({r}.sales_price, 0) * 100) AS INTEGER)"
+_QUOTE_PROFIT_CENTS = "CAST(ROUND(COALESCE({r}.sales_price, 0) * COALESCE({r}.profit_percentage, 0)) AS INTEGER)"
+
+def _add_customer_sales_sql(r):
+    return f"""INSERT INTO dashboard_customer_sales (customer_name, quote_count, sales_cents, profit_cents, profit_pct_sum)
+               VALUES ({r}.customer_name, 1, {_QUOTE_SALES_CENTS.format(r=r)}, {_QUOTE_PROFIT_CENTS.format(r=r)}, COALESCE({r}.profit_percentage, 0))
+               ON CONFLICT(customer_name) DO UPDATE SET quote_count = quote_count + 1,
+                   sales_cents = sales_cents + excluded.sales_cents, profit_cents = profit_cents + excluded.profit_cents,
+                   profit_pct_sum = profit_pct_sum + excluded.profit_pct_sum;"""
+
+def _sub_customer_sales_sql(r):
+    return f"""UPDATE dashboard_customer_sales SET quote_count = quote_count - 1,
+                   sales_cents = sales_cents - {_QUOTE_SALES_CENTS.format(r=r)}, profit_cents = profit_cents - {_QUOTE_PROFIT_CENTS.format(r=r)},
+                   profit_pct_sum = profit_pct_sum - COALESCE({r}.profit_percentage, 0)
+               WHERE customer_name = {r}.customer_name;
+               DELETE FROM dashboard_customer_sales WHERE customer_name = {r}.customer_name AND quote_count <= 0;"""
+
+def _add_status_count_sql(r):
+    return f"""INSERT INTO dashboard_status_counts (status, inquiry_count) VALUES ({r}.status, 1)
+               ON CONFLICT(status) DO UPDATE SET inquiry_count = inquiry_count + 1;"""
+
+def _sub_status_count_sql(r):
+    return f"""UPDATE dashboard_status_counts SET inquiry_count = inquiry_count - 1 WHERE status = {r}.status;
+               DELETE FROM dashboard_status_counts WHERE status = {r}.status AND inquiry_count <= 0;"""
+
+# Query rekap penuh (dipakai untuk backfill & rekonsiliasi)
+FULL_CUSTOMER_SALES_SQL = f"""
+    SELECT customer_name, COUNT(*) AS quote_count, SUM({_QUOTE_SALES_CENTS.format(r='q')}) AS sales_cents,
+           SUM({_QUOTE_PROFIT_CENTS.format(r='q')}) AS profit_cents, SUM(COALESCE(q.profit_percentage, 0)) AS profit_pct_sum
+    FROM quotations q WHERE q.status = 'Approved' GROUP BY customer_name"""
+FULL_STATUS_COUNTS_SQL = "SELECT status, COUNT(*) AS inquiry_count FROM inquiries GROUP BY status"
+
+def _rebuild_dashboard_aggregates(c):
+    c.execute("DELETE FROM dashboard_customer_sales")
+    c.execute(f"INSERT INTO dashboard_customer_sales {FULL_CUSTOMER_SALES_SQL}")
+    c.execute("DELETE FROM dashboard_status_counts")
+    c.execute(f"INSERT INTO dashboard_status_counts {FULL_STATUS_COUNTS_SQL}")
+
+def _create_dashboard_aggregates(c):
+    c.execute('''CREATE TABLE IF NOT EXISTS dashboard_customer_sales (
+                    customer_name TEXT PRIMARY KEY,
+                    quote_count INTEGER NOT NULL,
+                    sales_cents INTEGER NOT NULL,
+                    profit_cents INTEGER NOT NULL,
+                    profit_pct_sum REAL NOT NULL
+                )''')
+    c.execute('''CREATE TABLE IF NOT EXISTS dashboard_status_counts (
+                    status TEXT PRIMARY KEY,
+                    inquiry_count INTEGER NOT NULL
+                )''')
+    quote_cols = "status, customer_name, sales_price, profit_percentage"
+    triggers = {
+        "dash_quotations_ai": ("AFTER INSERT ON quotations WHEN new.status = 'Approved'", _add_customer_sales_sql("new")),
+        "dash_quotations_ad": ("AFTER DELETE ON quotations WHEN old.status = 'Approved'", _sub_customer_sales_sql("old")),
+        "dash_quotations_au_old": (f"AFTER UPDATE OF {quote_cols} ON quotations WHEN old.status = 'Approved'",
+                                   _sub_customer_sales_sql("old")),
+        "dash_quotations_au_new": (f"AFTER UPDATE OF {quote_cols} ON quotations WHEN new.status = 'Approved'",
+                                   _add_customer_sales_sql("new")),
+        "dash_inquiries_ai": ("AFTER INSERT ON inquiries", _add_status_count_sql("new")),
+        "dash_inquiries_ad": ("AFTER DELETE ON inquiries", _sub_status_count_sql("old")),
+        "dash_inquiries_au": ("AFTER UPDATE OF status ON inquiries WHEN old.status IS NOT new.status",
+                              _sub_status_count_sql("old") + _add_status_count_sql("new")),
+    }
+    for name, (event, body) in triggers.items():
+        c.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {event} BEGIN {body} END")
+    _rebuild_dashboard_aggregates(c)
+
+# --- Rollup time-series inquiry per day / week / month x customer (incremental via trigger) ---
+# Period = tanggal awal bucket ('YYYY-MM-DD'); week mulai hari Senin.
+ROLLUP_GRAINS = {
+    "day": "date({d})",
+    "week": "date({d}, 'weekday 0', '-6 days')",
+    "month": "strftime('%Y-%m-01', {d})",
+}
+# Funnel per inquiry: quoted = quotation sudah di-approve & dikirim, po_created = customer sudah PO
+_ROLLUP_MEASURES = {
+    "inquiries": "1",
+    "quoted": "({r}.status IN ('Finished', 'PO Created'))",
+    "po_created": "({r}.status = 'PO Created')",
+    "revisions": "COALESCE({r}.revision_count, 0)",
+}
+ROLLUP_MEASURES = list(_ROLLUP_MEASURES)
+
+def _rollup_delta_sql(r, sign):
+    cols = ', '.join(ROLLUP_MEASURES)
+    updates = ', '.join(f"{m} = {m} + excluded.{m}" for m in ROLLUP_MEASURES)
+    values = ', '.join(f"{sign}{expr.format(r=r)}" for expr in _ROLLUP_MEASURES.values())
+    sql = ""
+    for grain, period in ROLLUP_GRAINS.items():
+        key = f"'{grain}', {period.format(d=f'{r}.date')}, COALESCE({r}.customer_name, '')"
+        sql += f"""INSERT INTO inquiry_rollups (grain, period, customer_name, {cols}) VALUES ({key}, {values})
+                   ON CONFLICT(grain, period, customer_name) DO UPDATE SET {updates};"""
+        if sign == "-":
+            sql += f"DELETE FROM inquiry_rollups WHERE (grain, period, customer_name) = ({key}) AND inquiries <= 0;"
+    return sql
+
+ROLLUP_STEP = {"day": "+1 day", "week": "+7 days", "month": "+1 month"}
+
+def _rollup_window(grain, start=None, end=None):
+    """Filter (rollup, raw inquiries, params) untuk bucket yang memuat tanggal start..end.
+
+    Filter raw berupa range di kolom date (bukan fungsi atas date) supaya idx_inquiries_date terpakai.
+    """
+    if grain not in ROLLUP_GRAINS:
+        raise ValueError(f"Grain tidak dikenal: {grain} (pilih {', '.join(ROLLUP_GRAINS)})")
+    period = ROLLUP_GRAINS[grain]
+    rollup_where, raw_where, params = "", "", []
+    if start is not None:
+        rollup_where += f" AND period >= {period.format(d='?')}"
+        raw_where += f" AND i.date >= {period.format(d='?')}"
+        params.append(str(start))
+    if end is not None:
+        rollup_where += f" AND period <= {period.format(d='?')}"
+        raw_where += f" AND i.date < date({period.format(d='?')}, '{ROLLUP_STEP[grain]}')"
+        params.append(str(end))
+    return rollup_where, raw_where, params
+
+def _full_rollup_sql(grain, raw_where=""):
+    sums = ', '.join(f"SUM({expr.format(r='i')}) AS {m}" for m, expr in _ROLLUP_MEASURES.items())
+    period = ROLLUP_GRAINS[grain].format(d="i.date")
+    return f"""SELECT '{grain}' AS grain, {period} AS period, COALESCE(i.customer_name, '') AS customer_name, {sums}
+               FROM inquiries i WHERE i.date IS NOT NULL {raw_where} GROUP BY 2, 3"""
+
+def _rebuild_inquiry_rollups(c, start=None, end=None):
+    for grain in ROLLUP_GRAINS:
+        rollup_where, raw_where, params = _rollup_window(grain, start, end)
+        c.execute(f"DELETE FROM inquiry_rollups WHERE grain = '{grain}' {rollup_where}", params)
+        c.execute(f"INSERT INTO inquiry_rollups (grain, period, customer_name, {', '.join(ROLLUP_MEASURES)}) "
+                  f"{_full_rollup_sql(grain, raw_where)}", params)
+
+def _create_inquiry_rollups(c):
+    c.execute(f'''CREATE TABLE IF NOT EXISTS inquiry_rollups (
+                    grain TEXT NOT NULL,
+                    period TEXT NOT NULL,
+                    customer_name TEXT NOT NULL,
+                    {', '.join(f"{m} INTEGER NOT NULL DEFAULT 0" for m in ROLLUP_MEASURES)},
+                    PRIMARY KEY (grain, period, customer_name)
+                ) WITHOUT ROWID''')
+    rollup_cols = "date, customer_name, status, revision_count"
+    triggers = {
+        "rollup_inquiries_ai": ("AFTER INSERT ON inquiries WHEN new.date IS NOT NULL", _rollup_delta_sql("new", "+")),
+        "rollup_inquiries_ad": ("AFTER DELETE ON inquiries WHEN old.date IS NOT NULL", _rollup_delta_sql("old", "-")),
+        "rollup_inquiries_au_old": (f"AFTER UPDATE OF {rollup_cols} ON inquiries WHEN old.date IS NOT NULL",
+                                    _rollup_delta_sql("old", "-")),
+        "rollup_inquiries_au_new": (f"AFTER UPDATE OF {rollup_cols} ON inquiries WHEN new.date IS NOT NULL",
+                                    _rollup_delta_sql("new", "+")),
+    }
+    for name, (event, body) in triggers.items():
+        c.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {event} BEGIN {body} END")
+    _rebuild_inquiry_rollups(c)
+
+def _diff_aggregates(conn, table, stored_sql, full_sql, keys, params=()):
+    """Selisih antara tabel agregat (stored_sql) dan rekap penuh (full_sql), per key & kolom"""
+    stored = pd.read_sql(stored_sql, conn, params=params).set_index(keys)
+    full = pd.read_sql(full_sql, conn, params=params).set_index(keys)
+    index = stored.index.union(full.index)
+    stored = stored.reindex(index, fill_value=0)[full.columns]
+    full = full.reindex(index, fill_value=0)
+    rows, cols = ((stored - full).abs() > 1e-6).to_numpy().nonzero()
+    return [{"table": table, "key": index[r], "column": full.columns[c],
+             "stored": stored.iat[r, c], "expected": full.iat[r, c]} for r, c in zip(rows, cols)]
+
+# --- ID quotation: Q-<YYYYMMDD>-<urutan harian>, dari tabel id_sequences (bukan random) ---
+# Urut waktu & unik: insert ke index quote_id selalu di ujung B-tree dan tidak ada IntegrityError karena tabrakan.
+QUOTE_ID_SEQUENCE = "quotation"
+QUOTE_ID_DIGITS = 6 # Lebih dari 999999 quote / hari tetap unik, hanya urutan teks hari itu yang tidak lagi rapi
+QUOTE_ID_PATTERN = "Q-[0-9][0-9][0-9][0-9][0-9][0-9][0-9][0-9]-[0-9]*" # GLOB untuk ID format baru
+
+def format_quote_id(period, value):
+    return f"Q-{period}-{value:0{QUOTE_ID_DIGITS}d}"
+
+def _next_sequence_value(c, name, period, count=1):
+    """Naikkan sequence (name, period) sebanyak count dalam transaksi cursor c; return nilai terakhir.
+
+    UPSERT mengambil write lock, jadi session lain yang minta nilai berikutnya menunggu sampai transaksi
+    ini commit / rollback (rollback -> nilai tidak terpakai, tidak ada lubang).
+    """
+    c.execute("""INSERT INTO id_sequences (name, period, value) VALUES (?, ?, ?)
+                 ON CONFLICT(name, period) DO UPDATE SET value = value + excluded.value""", (name, period, count))
+    return c.execute("SELECT value FROM id_sequences WHERE name = ? AND period = ?", (name, period)).fetchone()[0]
+
+def _create_id_sequences(c):
+    c.execute('''CREATE TABLE IF NOT EXISTS id_sequences (
+                    name TEXT NOT NULL,
+                    period TEXT NOT NULL,
+                    value INTEGER NOT NULL,
+                    PRIMARY KEY (name, period)
+                ) WITHOUT ROWID''')
+    # Quote lama (Q-<5 digit random>) tetap memakai ID-nya: sudah tercetak di PDF / email & direferensikan
+    # email_outbox. Sequence di-seed dari quote yang sudah berformat baru (mis. DB hasil copy / restore).
+    c.execute(f"""INSERT OR REPLACE INTO id_sequences (name, period, value)
+                  SELECT '{QUOTE_ID_SEQUENCE}', substr(quote_id, 3, 8), MAX(CAST(substr(quote_id, 12) AS INTEGER))
+                  FROM quotations WHERE quote_id GLOB '{QUOTE_ID_PATTERN}' GROUP BY 2""")
+
+# Migrasi schema berurutan; versi terakhir yang sudah jalan disimpan di PRAGMA user_version.
+# Tiap step berisi SQL string atau fungsi fn(cursor). Jangan ubah step lama, tambahkan step baru.
+MIGRATIONS = [
+    (1, "workflow secondary indexes", [
+        "CREATE INDEX IF NOT EXISTS idx_inquiries_status ON inquiries(status)",
+        "CREATE INDEX IF NOT EXISTS idx_inquiries_customer_status ON inquiries(customer_name, status)",
+        "CREATE INDEX IF NOT EXISTS idx_quotations_status ON quotations(status)",
+        "CREATE INDEX IF NOT EXISTS idx_quotations_inquiry ON quotations(inquiry_id)",
+        "CREATE INDEX IF NOT EXISTS idx_localization_status ON localization_projects(development_status)",
+    ]),
+    (2, "parts full-text search index", [
+        _create_parts_search_index,
+    ]),
+    (3, "materialized regional price benchmarks", [
+        _create_part_benchmarks,
+    ]),
+    (4, "email outbox queue", [
+        '''CREATE TABLE IF NOT EXISTS email_outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                quote_id TEXT,
+                to_email TEXT,
+                subject TEXT,
+                body TEXT,
+                attachment_path TEXT,
+                status TEXT DEFAULT 'Queued',
+                attempts INTEGER DEFAULT 0,
+                next_attempt_at REAL DEFAULT 0,
+                last_error TEXT,
+                created_at TEXT,
+                sent_at TEXT
+            )''',
+        "CREATE INDEX IF NOT EXISTS idx_email_outbox_status ON email_outbox(status, next_attempt_at)",
+        "CREATE INDEX IF NOT EXISTS idx_email_outbox_quote ON email_outbox(quote_id)",
+    ]),
+    (5, "track emailed quotations", [
+        "ALTER TABLE quotations ADD COLUMN email_id INTEGER REFERENCES email_outbox(id)",
+    ]),
+    (6, "incremental dashboard aggregates", [
+        _create_dashboard_aggregates,
+    ]),
+    (7, "inquiry time-series rollups", [
+        "CREATE INDEX IF NOT EXISTS idx_inquiries_date ON inquiries(date)",
+        _create_inquiry_rollups,
+    ]),
+    (8, "sequential quotation ids", [
+        _create_id_sequences,
+    ]),
+    (9, "parts word index for fuzzy search", [
+        _create_parts_words_index,
+    ]),
+    (10, "table versions for cross-process cache invalidation", [
+        """CREATE TABLE IF NOT EXISTS table_versions (
+                name TEXT PRIMARY KEY,
+                version INTEGER NOT NULL
+            ) WITHOUT ROWID""",
+    ]),
+    (11, "email outbox claim lease", [
+        "ALTER TABLE email_outbox ADD COLUMN claimed_at REAL",
+    ]),
+    (12, "quotations by email", [
+        "CREATE INDEX IF NOT EXISTS idx_quotations_email ON quotations(email_id)",
+    ]),
+    (13, "competitive flag from stored region mean", [
+        "UPDATE part_benchmarks SET is_competitive = (ki_std_price < region_mean)",
+    ]),
+]
 
 class DatabaseManager:
-    def __init__(self, db_name="komatsu_aftermarket.db"):
-        self.conn = sqlite3.connect(db_name, check_same_thread=False)
+    def __init__(self, db_name="komatsu_aftermarket.db", pool_size=8, cache_entries=256, cache_mb=64):
+        self.pool = ConnectionPool(db_name, size=pool_size)
+        self.cache = QueryCache(cache_entries, max_bytes=int(cache_mb * 1e6))
         self.create_tables()
+        self.migrate()
+        self.has_search_index = self._table_exists("parts_search")
+        self.has_word_index = self._table_exists("parts_words_vocab")
+        self._vocabulary = (None, (set(), {}))
+
+    @contextmanager
+    def _cursor(self, *tables):
+        """Pinjam koneksi dari pool untuk 1 operasi tulis (commit / rollback otomatis).
+
+        tables = tabel yang diubah; cache read untuk tabel tersebut di-invalidate setelah commit.
+        Jika ada baris yang berubah, versinya juga dinaikkan di table_versions (transaksi yang sama),
+        supaya cache proses lain yang memakai DB ini ikut ter-invalidate.
+        """
+        with self.pool.connection() as conn:
+            try:
+                changes = conn.total_changes
+                yield conn.cursor()
+                # Hanya jika ada baris yang berubah: transaksi tanpa perubahan tidak meng-invalidate cache proses lain
+                versions = _bump_table_versions(conn, tables) if tables and conn.total_changes > changes else ()
+                conn.commit()
+                self.cache.sync_versions(versions, invalidate=False)
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                self.cache.invalidate(*tables)
+
+    def _read_sql(self, query, params=None, tables=()):
+        """pd.read_sql lewat cache; tables = tabel yang dibaca query (kosong = tanpa cache)"""
+        key = (query, tuple(params) if params is not None else ())
+        if tables:
+            self._sync_cache_versions()
+            cached = self.cache.get(key, tables)
+            if cached is not None:
+                return cached
+            snapshot = self.cache.snapshot(tables) # Ambil versi sebelum query, bukan sesudah
+        with self.pool.connection() as conn:
+            df = pd.read_sql(query, conn, params=params)
+        if tables:
+            self.cache.put(key, snapshot, df)
+        return df
+
+    def _sync_cache_versions(self):
+        """Invalidate cache untuk tabel yang ditulis proses lain sejak dicek terakhir (1 query kecil)"""
+        with self.pool.connection() as conn:
+            versions = conn.execute("SELECT name, version FROM table_versions").fetchall()
+        self.cache.sync_versions(versions)
+
+    def cache_stats(self):
+        return self.cache.stats()
 
     def create_tables(self):
-        c = self.conn.cursor()
-        
-        # Tabel Parts Master (Ditambah kolom harga Regional)
-        c.execute('''CREATE TABLE IF NOT EXISTS parts (
-                        part_number TEXT PRIMARY KEY,
-                        description TEXT,
-                        unit TEXT,
-                        stock_on_hand INTEGER,
-                        item_type TEXT,
-                        cost_price REAL,
-                        price_bkc REAL,
-                        price_prpd REAL,
-                        price_kipl REAL,
-                        price_ksc REAL,
-                        price_kac REAL
-                    )''')
-        
-        # Tabel Inquiries
-        c.execute('''CREATE TABLE IF NOT EXISTS inquiries (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        date TEXT,
-                        customer_name TEXT, 
-                        part_number TEXT,
-                        qty INTEGER,
-                        status TEXT,
-                        revision_count INTEGER DEFAULT 0,
-                        po_number TEXT,
-                        FOREIGN KEY(part_number) REFERENCES parts(part_number)
-                    )''')
-
-        # Tabel Quotations
-        c.execute('''CREATE TABLE IF NOT EXISTS quotations (
-                        quote_id TEXT PRIMARY KEY,
-                        inquiry_id INTEGER,
-                        customer_name TEXT,
-                        part_number TEXT,
-                        sales_price REAL,
-                        profit_percentage REAL,
-                        cost_price REAL,
-                        sdc REAL,
-                        svc REAL,
-                        moq INTEGER,
-                        leadtime INTEGER,
-                        status TEXT,
-                        FOREIGN KEY(inquiry_id) REFERENCES inquiries(id)
-                    )''')
-        
-        # Tabel Localization
-        c.execute('''CREATE TABLE IF NOT EXISTS localization_projects (
-                        project_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        inquiry_id INTEGER,
-                        part_number TEXT,
-                        supplier_name TEXT,
-                        start_date TEXT,
-                        target_finish_date TEXT,
-                        development_status TEXT,
-                        notes TEXT,
-                        FOREIGN KEY(inquiry_id) REFERENCES inquiries(id)
-                    )''')
-        self.conn.commit()
+        with self._cursor() as c:
+            # Tabel Parts Master (Ditambah kolom harga Regional)
+            c.execute('''CREATE TABLE IF NOT EXISTS parts (
+                            part_number TEXT PRIMARY KEY,
+                            description TEXT,
+                            unit TEXT,
+                            stock_on_hand INTEGER,
+                            item_type TEXT,
+                            cost_price REAL,
+                            price_bkc REAL,
+                            price_prpd REAL,
+                            price_kipl REAL,
+                            price_ksc REAL,
+                            price_kac REAL
+                        )''')
+
+            # Tabel Inquiries
+            c.execute('''CREATE TABLE IF NOT EXISTS inquiries (
+                            id INTEGER PRIMARY KEY AUTOINCREMENT,
+                            date TEXT,
+                            customer_name TEXT, 
+                            part_number TEXT,
+                            qty INTEGER,
+                            status TEXT,
+                            revision_count INTEGER DEFAULT 0,
+                            po_number TEXT,
+                            FOREIGN KEY(part_number) REFERENCES parts(part_number)
+                        )''')
+
+            # Tabel Quotations
+            c.execute('''CREATE TABLE IF NOT EXISTS quotations (
+                            quote_id TEXT PRIMARY KEY,
+                            inquiry_id INTEGER,
+                            customer_name TEXT,
+                            part_number TEXT,
+                            sales_price REAL,
+                            profit_percentage REAL,
+                            cost_price REAL,
+                            sdc REAL,
+                            svc REAL,
+                            moq INTEGER,
+                            leadtime INTEGER,
+                            status TEXT,
+                            FOREIGN KEY(inquiry_id) REFERENCES inquiries(id)
+                        )''')
+
+            # Tabel Localization
+            c.execute('''CREATE TABLE IF NOT EXISTS localization_projects (
+                            project_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                            inquiry_id INTEGER,
+                            part_number TEXT,
+                            supplier_name TEXT,
+                            start_date TEXT,
+                            target_finish_date TEXT,
+                            development_status TEXT,
+                            notes TEXT,
+                            FOREIGN KEY(inquiry_id) REFERENCES inquiries(id)
+                        )''')
+
+    def migrate(self):
+        """Jalankan migrasi yang belum pernah dijalankan (aman jika beberapa proses start bersamaan)"""
+        if self.schema_version() >= MIGRATIONS[-1][0]:
+            return # Sudah versi terbaru: tanpa BEGIN IMMEDIATE, start proses tidak menunggu write lock
+        with self._cursor() as c:
+            c.execute("BEGIN IMMEDIATE") # Kunci DB dulu baru baca versi
+            current = c.execute("PRAGMA user_version").fetchone()[0]
+            for version, _name, steps in MIGRATIONS:
+                if version <= current:
+                    continue
+                for step in steps:
+                    if callable(step): step(c)
+                    else: c.execute(step)
+                c.execute(f"PRAGMA user_version = {int(version)}")
+
+    def _table_exists(self, name):
+        with self.pool.connection() as conn:
+            return conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (name,)).fetchone() is not None
+
+    def schema_version(self):
+        with self.pool.connection() as conn:
+            return conn.execute("PRAGMA user_version").fetchone()[0]
+
+    def explain_query_plan(self, query, params=()):
+        """Detail EXPLAIN QUERY PLAN (list string) untuk cek apakah query memakai index"""
+        with self.pool.connection() as conn:
+            return [row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}", params).fetchall()]
 
     def populate_dummy_data(self):
         """Mengisi data parts 200 baris dengan harga regional variatif"""
-        c = self.conn.cursor()
-        c.execute("SELECT count(*) FROM parts")
-        if c.fetchone()[0] == 0:
-            
-            # Helper untuk generate harga random sekitar harga dasar (+/- 20%)
-            def gen_market_price(base_price):
-                # Asumsi Base Sales Price ~ Cost * 1.25 (Profit standar)
-                # Market price di region lain fluktuatif 0.8x s/d 1.4x dari cost
-                return round(base_price * random.uniform(1.1, 1.5), 2)
-
-            # 1. Data Wajib
-            specific_items = [
-                ("101-22-3331", "Bolt", "PCS", 100, "Local", 5.5),
-                ("202-44-5552", "Pin", "PCS", 50, "Local", 12.0),
-                ("303-66-7773", "Hose", "MTR", 200, "Import", 45.0),
-                ("708-2L-00300", "Hydraulic Pump", "ASSY", 5, "Import", 2500.0)
-            ]
-            
-            for p_num, desc, unit, stock, p_type, cost in specific_items:
-                c.execute("INSERT OR IGNORE INTO parts VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", 
-                          (p_num, desc, unit, stock, p_type, cost, 
-                           gen_market_price(cost), gen_market_price(cost), gen_market_price(cost), 
-                           gen_market_price(cost), gen_market_price(cost)))
-
-            # 2. Generator 200 Data Random
-            part_prefixes = ['600', '14X', '708', '070', '20Y', '421', '040', '099']
-            descriptions = [
-                'Hydraulic Filter', 'O-Ring Seal', 'Piston Pump', 'Fuel Injector', 
-                'Bushing bucket', 'Track Shoe', 'Idler Assy', 'Radiator', 'Alternator',
-                'Starter Motor', 'Turbocharger', 'Water Pump', 'Oil Cooler', 'Gasket Kit',
-                'Solenoid Valve', 'Bearing', 'Cylinder Head', 'Cutting Edge'
-            ]
-            
-            for _ in range(200):
-                p_num = f"{random.choice(part_prefixes)}-{random.randint(100,999)}-{random.randint(1000,9999)}"
-                desc = random.choice(descriptions)
-                unit = random.choice(["PCS", "SET", "KIT", "ASSY"])
-                cost = round(random.uniform(10.0, 800.0), 2)
-                item_type = random.choice(["Local", "Import"])
-                stock = random.randint(0, 150)
+        with self._cursor("parts", "part_benchmarks") as c:
+            c.execute("SELECT count(*) FROM parts")
+            if c.fetchone()[0] == 0:
                 
-                c.execute("INSERT INTO parts VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
-                          (p_num, desc, unit, stock, item_type, cost,
-                           gen_market_price(cost), gen_market_price(cost), gen_market_price(cost), 
-                           gen_market_price(cost), gen_market_price(cost)))
+                # Helper untuk generate harga random sekitar harga dasar (+/- 20%)
+                def gen_market_price(base_price):
+                    # Asumsi Base Sales Price ~ Cost * 1.25 (Profit standar)
+                    # Market price di region lain fluktuatif 0.8x s/d 1.4x dari cost
+                    return round(base_price * random.uniform(1.1, 1.5), 2)
+
+                # 1. Data Wajib
+                specific_items = [
+                    ("101-22-3331", "Bolt", "PCS", 100, "Local", 5.5),
+                    ("202-44-5552", "Pin", "PCS", 50, "Local", 12.0),
+                    ("303-66-7773", "Hose", "MTR", 200, "Import", 45.0),
+                    ("708-2L-00300", "Hydraulic Pump", "ASSY", 5, "Import", 2500.0)
+                ]
                 
-            self.conn.commit()
+                for p_num, desc, unit, stock, p_type, cost in specific_items:
+                    c.execute("INSERT OR IGNORE INTO parts VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", 
+                              (p_num, desc, unit, stock, p_type, cost, 
+                               gen_market_price(cost), gen_market_price(cost), gen_market_price(cost), 
+                               gen_market_price(cost), gen_market_price(cost)))
+
+                # 2. Generator 200 Data Random
+                for _ in range(200):
+                    p_num = f"{random.choice(PART_PREFIXES)}-{random.randint(100,999)}-{random.randint(1000,9999)}"
+                    desc = random.choice(PART_DESCRIPTIONS)
+                    unit = random.choice(PART_UNITS)
+                    cost = round(random.uniform(10.0, 800.0), 2)
+                    item_type = random.choice(["Local", "Import"])
+                    stock = random.randint(0, 150)
+                    
+                    c.execute("INSERT INTO parts VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                              (p_num, desc, unit, stock, item_type, cost,
+                               gen_market_price(cost), gen_market_price(cost), gen_market_price(cost), 
+                               gen_market_price(cost), gen_market_price(cost)))
+
+                _refresh_benchmarks(c)
 
     # --- Methods ---
     def get_all_parts(self):
-        return pd.read_sql("SELECT * FROM parts", self.conn)
+        return self._read_sql("SELECT * FROM parts", tables=("parts",))
+
+    @staticmethod
+    def _parts_filter_sql(description=None, item_type=None, stock_min=None, stock_max=None,
+                          price_delta_min=None, price_delta_max=None, competitive=None):
+        """FROM + WHERE clause + params untuk filter parts (alias p).
+
+        price_delta = % selisih harga KI std vs rata-rata region, competitive = flag is_competitive; keduanya
+        dibaca dari part_benchmarks (dihitung dengan calculate_financials_bulk) supaya sama dengan halaman costing.
+        Return (from_sql, clauses, params, tables).
+        """
+        clauses, params = [], []
+        if description:
+            clauses.append("p.description LIKE ?")
+            params.append(f"%{description}%")
+        if item_type:
+            clauses.append("p.item_type = ?")
+            params.append(item_type)
+        if stock_min is not None:
+            clauses.append("p.stock_on_hand >= ?")
+            params.append(int(stock_min))
+        if stock_max is not None:
+            clauses.append("p.stock_on_hand <= ?")
+            params.append(int(stock_max))
+        delta_sql = "((b.ki_std_price - b.region_mean) * 100.0 / b.region_mean)"
+        if price_delta_min is not None:
+            clauses.append(f"{delta_sql} >= ?")
+            params.append(float(price_delta_min))
+        if price_delta_max is not None:
+            clauses.append(f"{delta_sql} <= ?")
+            params.append(float(price_delta_max))
+        if competitive is not None:
+            clauses.append("b.is_competitive = ?")
+            params.append(int(bool(competitive)))
+        if price_delta_min is None and price_delta_max is None and competitive is None:
+            return "parts p", clauses, params, ("parts",)
+        return "parts p JOIN part_benchmarks b ON b.part_number = p.part_number", clauses, params, ("parts", "part_benchmarks")
+
+    def get_parts_page(self, after_part_number=None, page_size=50, **filters):
+        """1 halaman parts (keyset pagination, urut part_number). Halaman berikutnya: after = part_number terakhir"""
+        from_sql, clauses, params, tables = self._parts_filter_sql(**filters)
+        if after_part_number is not None:
+            clauses.append("p.part_number > ?")
+            params.append(after_part_number)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        query = f"SELECT p.* FROM {from_sql} {where} ORDER BY p.part_number LIMIT ?"
+        return self._read_sql(query, params=params + [int(page_size)], tables=tables)
+
+    def search_parts(self, text, limit=20, fuzzy=True):
+        """Cari part (top-k): prefix part_number -> substring (FTS) -> fuzzy (kemiripan trigram)"""
+        text = (text or "").strip()
+        cols = "p.part_number, p.description, p.item_type"
+        if not text:
+            return self._read_sql(f"SELECT {cols} FROM parts p ORDER BY p.part_number LIMIT ?",
+                                  params=(limit,), tables=("parts",))
+
+        # 1. Prefix part number lewat index primary key
+        results = [self._read_sql(f"SELECT {cols} FROM parts p WHERE p.part_number >= ? AND p.part_number < ? "
+                                  f"ORDER BY p.part_number LIMIT ?",
+                                  params=(text, text + "\U0010ffff", limit), tables=("parts",))]
+        found = len(results[0])
+
+        if found < limit and self.has_search_index and len(text) >= 3:
+            # 2. Substring di part_number / description (tanpa ORDER BY rank supaya tidak menilai semua match)
+            phrase = '"' + text.replace('"', '""') + '"'
+            match_sql = (f"SELECT {cols} FROM parts_search s JOIN parts p ON p.rowid = s.rowid "
+                         f"WHERE parts_search MATCH ? LIMIT ?")
+            results.append(self._read_sql(match_sql, params=(phrase, limit), tables=("parts",)))
+            found += len(results[-1])
+            # 3. Fuzzy per kata: tiap kata dikoreksi ke kata terdekat di kosakata description, lalu semua kata
+            #    dicari (AND, urutan bebas) di index kata. "hydralic filter" -> hydraulic AND filter
+            words = re.findall(r"[^\W\d_]+", text.lower())
+            if fuzzy and found < limit and self.has_word_index and words:
+                corrected = [self._correct_word(w) for w in words if len(w) >= 3]
+                if corrected and all(corrected):
+                    query = " ".join(f'"{w}"' for w in corrected)
+                    results.append(self._read_sql(f"SELECT {cols} FROM parts_words w JOIN parts p ON p.rowid = w.rowid "
+                                                  f"WHERE parts_words MATCH ? LIMIT ?", params=(query, limit), tables=("parts",)))
+        elif found < limit and not self.has_search_index:
+            like = f"%{text}%"
+            results.append(self._read_sql(f"SELECT {cols} FROM parts p WHERE p.part_number LIKE ? OR p.description LIKE ? "
+                                          f"LIMIT ?", params=(like, like, limit), tables=("parts",)))
+
+        return pd.concat(results, ignore_index=True).drop_duplicates('part_number').head(limit).reset_index(drop=True)
+
+    def get_benchmark(self, part_number):
+        """Benchmark harga 1 part (KI std, harga per region, mean/min/max, flag kompetitif)"""
+        df = self._read_sql("SELECT * FROM part_benchmarks WHERE part_number = ?", params=(part_number,), tables=("part_benchmarks",))
+        return df.iloc[0] if not df.empty else None
+
+    def get_benchmarks(self, part_numbers):
+        """Benchmark banyak part sekaligus (1 query), index = part_number"""
+        part_numbers = sorted(set(part_numbers))
+        if not part_numbers:
+            return pd.DataFrame(columns=BENCHMARK_COLUMNS).set_index('part_number')
+        placeholders = ','.join('?' for _ in part_numbers)
+        df = self._read_sql(f"SELECT * FROM part_benchmarks WHERE part_number IN ({placeholders})",
+                            params=part_numbers, tables=("part_benchmarks",))
+        return df.set_index('part_number')
+
+    def _word_vocabulary(self):
+        """Kata unik di description (>= 3 huruf, tanpa angka) dari parts_words_vocab: (set, dict panjang -> list).
+
+        Dibaca dari index FTS (sebanyak kata unik, bukan sebanyak parts), ulang hanya setelah parts berubah.
+        """
+        version = self.cache.snapshot(("parts",))
+        if self._vocabulary[0] != version:
+            with self.pool.connection() as conn:
+                rows = conn.execute("SELECT term FROM parts_words_vocab "
+                                    "WHERE length(term) >= 3 AND term NOT GLOB '*[0-9]*'").fetchall()
+            by_length = {}
+            for (term,) in rows:
+                by_length.setdefault(len(term), []).append(term)
+            self._vocabulary = (version, ({r[0] for r in rows}, by_length))
+        return self._vocabulary[1]
+
+    def _correct_word(self, word):
+        """Kata terdekat di kosakata (word sendiri jika ada), None jika tidak ada yang cukup mirip"""
+        terms, by_length = self._word_vocabulary()
+        if word in terms:
+            return word
+        slack = max(1, len(word) // 4) # Salah ketik mengubah panjang kata paling banyak beberapa huruf
+        candidates = [t for n in range(len(word) - slack, len(word) + slack + 1) for t in by_length.get(n, ())]
+        match = difflib.get_close_matches(word, candidates, n=1, cutoff=0.75)
+        return match[0] if match else None
+
+    def count_parts(self, **filters):
+        from_sql, clauses, params, tables = self._parts_filter_sql(**filters)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return int(self._read_sql(f"SELECT count(*) AS n FROM {from_sql} {where}", params=params, tables=tables)['n'].iloc[0])
 
     def add_part(self, p_num, desc, unit, stock, p_type, cost):
-        c = self.conn.cursor()
         # Untuk part baru, harga regional di-generate otomatis dulu
         def gen_price(c): return round(c * random.uniform(1.1, 1.5), 2)
         try:
-            c.execute("INSERT INTO parts VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", 
-                     (p_num, desc, unit, stock, p_type, cost, 
-                      gen_price(cost), gen_price(cost), gen_price(cost), gen_price(cost), gen_price(cost)))
-            self.conn.commit()
+            with self._cursor("parts", "part_benchmarks") as c:
+                c.execute("INSERT INTO parts VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", 
+                         (p_num, desc, unit, stock, p_type, cost, 
+                          gen_price(cost), gen_price(cost), gen_price(cost), gen_price(cost), gen_price(cost)))
+                _refresh_benchmarks(c, [p_num])
             return True, "Success"
         except sqlite3.IntegrityError:
             return False, "Part Number already exists"
 
+    def bulk_import_parts(self, source, file_format="csv", chunksize=50_000, rebuild_index_rows=20_000):
+        """Import parts master dari CSV/Parquet secara streaming (per chunk), 1 transaksi.
+
+        Part yang sudah ada di-update (upsert). Baris invalid / duplikat di file masuk reject report.
+        Harga regional yang kosong / kolomnya tidak ada di file: part lama tetap memakai harga di DB,
+        part baru diisi harga placeholder (fill_region_prices).
+        Jika jumlah baris >= max(rebuild_index_rows, 1/4 isi tabel), trigger index FTS dimatikan selama import
+        dan index di-rebuild sekali di akhir (transaksi yang sama, jadi search tidak pernah melihat index setengah jadi).
+        Return dict: rows_read, rows_upserted, rejects (list dict), seconds, rows_per_sec.
+        """
+        start = time.perf_counter()
+        cols = ', '.join(PART_COLUMNS)
+        updates = ', '.join([f"{col} = excluded.{col}" for col in REQUIRED_COLUMNS[1:]] +
+                            [f"{col} = COALESCE(excluded.{col}, parts.{col})" for col in REGION_COLUMNS])
+        sql = (f"INSERT INTO parts ({cols}) VALUES ({', '.join('?' for _ in PART_COLUMNS)}) "
+               f"ON CONFLICT(part_number) DO UPDATE SET {updates}")
+
+        rows_read, rows_upserted, rejects, seen = 0, 0, [], set()
+        with self._cursor("parts", "part_benchmarks") as c:
+            c.execute("BEGIN IMMEDIATE")
+            # Import besar (relatif terhadap isi tabel): trigger FTS per baris dimatikan, index di-rebuild sekali di akhir
+            table_rows = c.execute("SELECT COALESCE(MAX(rowid), 0) FROM parts").fetchone()[0]
+            rebuild_at, suspended = max(rebuild_index_rows, table_rows // 4), False
+            for chunk in read_part_chunks(source, file_format, chunksize):
+                if not suspended and rows_read + len(chunk) >= rebuild_at:
+                    _suspend_fts_triggers(c)
+                    suspended = True
+                valid, chunk_rejects = validate_part_chunk(chunk, seen, row_offset=rows_read)
+                incomplete = valid[REGION_COLUMNS].isna().any(axis=1)
+                if incomplete.any():
+                    existing = valid['part_number'].isin(_existing_part_numbers(c, valid.loc[incomplete, 'part_number']))
+                    valid = fill_region_prices(valid, incomplete & ~existing)
+                    incomplete &= existing # Harga finalnya baru diketahui setelah COALESCE di DB
+                values = [valid[col].tolist() for col in REQUIRED_COLUMNS]
+                values += [valid[col].astype(object).where(valid[col].notna(), None).tolist() for col in REGION_COLUMNS]
+                c.executemany(sql, zip(*values))
+                _upsert_benchmarks(c, valid[~incomplete])
+                if incomplete.any():
+                    _refresh_benchmarks(c, valid.loc[incomplete, 'part_number'])
+                rows_read += len(chunk)
+                rows_upserted += len(valid)
+                rejects.extend(chunk_rejects)
+            if suspended:
+                _restore_fts_triggers(c)
+
+        seconds = time.perf_counter() - start
+        return {"rows_read": rows_read, "rows_upserted": rows_upserted, "rejects": rejects,
+                "seconds": round(seconds, 3), "rows_per_sec": round(rows_read / seconds, 1) if seconds else 0.0}
+
     def add_inquiry(self, cust_name, part_no, qty, status):
-        c = self.conn.cursor()
         date_now = datetime.now().strftime("%Y-%m-%d")
-        c.execute("INSERT INTO inquiries (date, customer_name, part_number, qty, status) VALUES (?, ?, ?, ?, ?)",
-                  (date_now, cust_name, part_no, qty, status))
-        self.conn.commit()
+        with self._cursor("inquiries") as c:
+            c.execute("INSERT INTO inquiries (date, customer_name, part_number, qty, status) VALUES (?, ?, ?, ?, ?)",
+                      (date_now, cust_name, part_no, qty, status))
+            return c.lastrowid
+
+    def add_inquiries_batch(self, rows):
+        """Insert banyak inquiry (customer, part_number, qty, status) dalam 1 transaksi. Return list id"""
+        date_now = datetime.now().strftime("%Y-%m-%d")
+        ids = []
+        with self._cursor("inquiries") as c:
+            c.execute("BEGIN IMMEDIATE")
+            for cust_name, part_no, qty, status in rows:
+                c.execute("INSERT INTO inquiries (date, customer_name, part_number, qty, status) VALUES (?, ?, ?, ?, ?)",
+                          (date_now, cust_name, part_no, qty, status))
+                ids.append(c.lastrowid)
+        return ids
+
+    def get_inquiry(self, inquiry_id):
+        """1 inquiry + atribut part (dict), None jika tidak ada. Tanpa query cache: dipakai untuk cek status transisi"""
+        with self.pool.connection() as conn:
+            cur = conn.execute("""SELECT i.*, p.description, p.item_type, p.cost_price, p.stock_on_hand
+                                  FROM inquiries i LEFT JOIN parts p ON p.part_number = i.part_number
+                                  WHERE i.id = ?""", (int(inquiry_id),))
+            row = cur.fetchone()
+            return dict(zip([d[0] for d in cur.description], row)) if row is not None else None
+
+    def get_inquiries(self, inquiry_ids):
+        """Banyak inquiry + atribut part sekaligus (WHERE id IN, per 500 id): dict id -> dict. Id yang tidak ada dilewati"""
+        inquiry_ids, found = sorted({int(i) for i in inquiry_ids}), {}
+        with self.pool.connection() as conn:
+            for i in range(0, len(inquiry_ids), 500):
+                batch = inquiry_ids[i:i + 500]
+                cur = conn.execute(f"""SELECT i.*, p.description, p.item_type, p.cost_price, p.stock_on_hand
+                                       FROM inquiries i LEFT JOIN parts p ON p.part_number = i.part_number
+                                       WHERE i.id IN ({','.join('?' for _ in batch)})""", batch)
+                cols = [d[0] for d in cur.description]
+                found.update((row[0], dict(zip(cols, row))) for row in cur)
+        return found
+
+    def existing_part_numbers(self, part_numbers):
+        """Subset part_numbers yang ada di parts master"""
+        with self.pool.connection() as conn:
+            return _existing_part_numbers(conn, part_numbers)
 
     def get_inquiries_by_status(self, status_list):
         placeholders = ','.join('?' for _ in status_list)
         query = f"SELECT * FROM inquiries WHERE status IN ({placeholders})"
-        return pd.read_sql(query, self.conn, params=status_list)
+        return self._read_sql(query, params=status_list, tables=("inquiries",))
     
     def get_inquiries_by_customer(self, customer_name):
-        return pd.read_sql("SELECT * FROM inquiries WHERE customer_name = ?", self.conn, params=(customer_name,))
+        return self._read_sql("SELECT * FROM inquiries WHERE customer_name = ?", params=(customer_name,), tables=("inquiries",))
     
-    def cancel_inquiry(self, inquiry_id):
-        c = self.conn.cursor()
-        c.execute("UPDATE inquiries SET status = 'Cancelled' WHERE id = ?", (inquiry_id,))
-        self.conn.commit()
+    def cancel_inquiry(self, inquiry_id, from_status=None):
+        """Inquiry -> Cancelled + quotation Draft-nya -> Rejected dalam 1 transaksi (Draft yatim tidak bisa di-approve).
+
+        from_status diisi -> hanya jika inquiry masih berstatus itu. Return jumlah inquiry yang berubah.
+        """
+        with self._cursor("inquiries", "quotations") as c:
+            c.execute("BEGIN IMMEDIATE")
+            c.execute("UPDATE inquiries SET status = 'Cancelled' WHERE id = ? AND (? IS NULL OR status = ?)",
+                      (inquiry_id, from_status, from_status))
+            changed = c.rowcount
+            if changed:
+                c.execute("UPDATE quotations SET status = 'Rejected' WHERE inquiry_id = ? AND status = 'Draft'", (inquiry_id,))
+            return changed
 
-    def create_po(self, inquiry_id, po_number):
-        c = self.conn.cursor()
-        c.execute("UPDATE inquiries SET status = 'PO Created', po_number = ? WHERE id = ?", (po_number, inquiry_id,))
-        self.conn.commit()
+    def create_po(self, inquiry_id, po_number, from_status=None):
+        """Set PO; from_status diisi -> hanya jika inquiry masih berstatus itu. Return jumlah inquiry yang berubah"""
+        with self._cursor("inquiries") as c:
+            c.execute("UPDATE inquiries SET status = 'PO Created', po_number = ? WHERE id = ? AND (? IS NULL OR status = ?)",
+                      (po_number, inquiry_id, from_status, from_status))
+            return c.rowcount
 
     def get_part_details(self, part_number):
-        return pd.read_sql(f"SELECT * FROM parts WHERE part_number='{part_number}'", self.conn).iloc[0]
+        return self._read_sql("SELECT * FROM parts WHERE part_number = ?", params=(part_number,), tables=("parts",)).iloc[0]
+
+    def get_inquiries_with_parts(self, status_list):
+        """Inquiries + atribut part (description, item_type, cost, stock) dalam 1 query JOIN"""
+        placeholders = ','.join('?' for _ in status_list)
+        query = f"""
+        SELECT i.*, p.description, p.item_type, p.cost_price, p.stock_on_hand
+        FROM inquiries i
+        LEFT JOIN parts p ON p.part_number = i.part_number
+        WHERE i.status IN ({placeholders})
+        """
+        return self._read_sql(query, params=status_list, tables=("inquiries", "parts"))
 
     def update_inquiry_status(self, inquiry_id, new_status, increment_revision=False):
-        c = self.conn.cursor()
-        c.execute("UPDATE inquiries SET status = ? WHERE id = ?", (new_status, inquiry_id))
-        if increment_revision:
-            c.execute("UPDATE inquiries SET revision_count = revision_count + 1 WHERE id = ?", (inquiry_id,))
-        self.conn.commit()
+        with self._cursor("inquiries") as c:
+            c.execute("UPDATE inquiries SET status = ? WHERE id = ?", (new_status, inquiry_id))
+            if increment_revision:
+                c.execute("UPDATE inquiries SET revision_count = revision_count + 1 WHERE id = ?", (inquiry_id,))
+
+    def update_inquiries_status_batch(self, transitions, from_status=None, increment_revision=False):
+        """Ubah status banyak inquiry dalam 1 transaksi (executemany).
+
+        transitions: iterable (inquiry_id, new_status). from_status: jika diisi, hanya inquiry
+        yang masih berstatus tersebut yang diubah. Return jumlah inquiry yang berubah.
+        """
+        params = [(new_status, int(increment_revision), int(i), from_status, from_status) for i, new_status in transitions]
+        if not params:
+            return 0
+        with self._cursor("inquiries") as c:
+            c.execute("BEGIN IMMEDIATE")
+            c.executemany("""UPDATE inquiries SET status = ?, revision_count = revision_count + ?
+                             WHERE id = ? AND (? IS NULL OR status = ?)""", params)
+            return c.rowcount
 
     # --- Localization Methods ---
-    def start_localization(self, inquiry_id, part_number, supplier, target_date, notes):
-        c = self.conn.cursor()
+    def start_localization(self, inquiry_id, supplier, target_date, notes):
+        """Inquiry Needs Localization -> In Development + buat project On Progress dalam 1 transaksi.
+
+        Return project_id, atau None jika inquiry sudah tidak berstatus Needs Localization (tidak ada yang disimpan).
+        """
         date_now = datetime.now().strftime("%Y-%m-%d")
-        c.execute("""INSERT INTO localization_projects 
-                     (inquiry_id, part_number, supplier_name, start_date, target_finish_date, development_status, notes) 
-                     VALUES (?, ?, ?, ?, ?, ?, ?)""",
-                  (inquiry_id, part_number, supplier, date_now, target_date, "On Progress", notes))
-        self.conn.commit()
+        with self._cursor("localization_projects", "inquiries") as c:
+            c.execute("BEGIN IMMEDIATE")
+            c.execute("UPDATE inquiries SET status = 'In Development' WHERE id = ? AND status = 'Needs Localization'", (inquiry_id,))
+            if c.rowcount == 0:
+                return None
+            c.execute("""INSERT INTO localization_projects 
+                         (inquiry_id, part_number, supplier_name, start_date, target_finish_date, development_status, notes) 
+                         SELECT id, part_number, ?, ?, ?, 'On Progress', ? FROM inquiries WHERE id = ?""",
+                      (supplier, date_now, target_date, notes, inquiry_id))
+            return c.lastrowid
 
     def get_localization_projects(self):
-        return pd.read_sql("SELECT * FROM localization_projects WHERE development_status = 'On Progress'", self.conn)
+        return self._read_sql("SELECT * FROM localization_projects WHERE development_status = 'On Progress'", tables=("localization_projects",))
 
     def finish_localization(self, project_id, inquiry_id):
-        c = self.conn.cursor()
-        c.execute("UPDATE localization_projects SET development_status = 'Finished' WHERE project_id = ?", (project_id,))
-        c.execute("UPDATE inquiries SET status = 'Ready for Costing' WHERE id = ?", (inquiry_id,))
-        self.conn.commit()
+        """Project On Progress -> Finished + inquiry In Development -> Ready for Costing dalam 1 transaksi.
+
+        Hanya jika project milik inquiry tersebut, masih On Progress, dan inquiry masih In Development.
+        Return True jika berubah, False jika tidak ada yang diubah.
+        """
+        with self._cursor("localization_projects", "inquiries") as c:
+            c.execute("BEGIN IMMEDIATE")
+            c.execute("""UPDATE inquiries SET status = 'Ready for Costing'
+                         WHERE id = ? AND status = 'In Development'
+                           AND EXISTS (SELECT 1 FROM localization_projects
+                                       WHERE project_id = ? AND inquiry_id = ? AND development_status = 'On Progress')""",
+                      (inquiry_id, project_id, inquiry_id))
+            if c.rowcount == 0:
+                return False
+            c.execute("UPDATE localization_projects SET development_status = 'Finished' WHERE project_id = ?", (project_id,))
+            return True
 
     # --- Quotation Methods ---
-    def create_quotation(self, data):
-        c = self.conn.cursor()
-        c.execute("""INSERT INTO quotations 
-                     (quote_id, inquiry_id, customer_name, part_number, sales_price, profit_percentage, cost_price, sdc, svc, moq, leadtime, status) 
-                     VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-                  (data['quote_id'], data['inquiry_id'], data['customer'], data['part_number'], 
-                   data['sales_price'], data['profit'], data['cost'], data['sdc'], data['svc'], 
-                   data['moq'], data['leadtime'], data['status']))
-        self.conn.commit()
+    def create_quotation(self, data, from_status=None):
+        """Insert quotation. Tanpa data['quote_id'] -> ID berikutnya dari sequence harian (format_quote_id),
+        dialokasikan di transaksi yang sama dengan insert-nya.
+
+        from_status diisi -> inquiry-nya sekaligus from_status -> Waiting Approval dalam 1 transaksi; jika inquiry
+        sudah tidak berstatus from_status, tidak ada yang disimpan. Return quote_id, atau None jika tidak tersimpan.
+        """
+        with self._cursor("quotations", "inquiries") as c:
+            c.execute("BEGIN IMMEDIATE")
+            if from_status is not None:
+                c.execute("UPDATE inquiries SET status = 'Waiting Approval' WHERE id = ? AND status = ?",
+                          (data['inquiry_id'], from_status))
+                if c.rowcount == 0:
+                    return None
+            quote_id = data.get('quote_id')
+            if not quote_id:
+                period = datetime.now().strftime("%Y%m%d")
+                quote_id = format_quote_id(period, _next_sequence_value(c, QUOTE_ID_SEQUENCE, period))
+            c.execute("""INSERT INTO quotations 
+                         (quote_id, inquiry_id, customer_name, part_number, sales_price, profit_percentage, cost_price, sdc, svc, moq, leadtime, status) 
+                         VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                      (quote_id, data['inquiry_id'], data['customer'], data['part_number'], 
+                       data['sales_price'], data['profit'], data['cost'], data['sdc'], data['svc'], 
+                       data['moq'], data['leadtime'], data['status']))
+            return quote_id
 
     def get_quotations_by_status(self, status):
-        return pd.read_sql("SELECT * FROM quotations WHERE status = ?", self.conn, params=(status,))
+        return self._read_sql("SELECT * FROM quotations WHERE status = ?", params=(status,), tables=("quotations",))
+    
+    def get_quotations_with_benchmarks(self, status):
+        """Quotations + benchmark harga region per part dalam 1 query JOIN (untuk halaman approval).
+        email_status = status email_outbox terakhir yang memuat quotation ini (NULL = belum pernah di-email)"""
+        query = """
+        SELECT q.*, b.ki_std_price, b.price_bkc, b.price_prpd, b.price_kipl, b.price_ksc, b.price_kac,
+               b.region_mean, b.region_min, b.region_max, b.is_competitive, e.status AS email_status
+        FROM quotations q
+        LEFT JOIN part_benchmarks b ON b.part_number = q.part_number
+        LEFT JOIN email_outbox e ON e.id = q.email_id
+        WHERE q.status = ?
+        """
+        return self._read_sql(query, params=(status,), tables=("quotations", "part_benchmarks", "email_outbox"))
     
     def get_approved_with_po_check(self):
         query = """
@@ -212,12 +1144,224 @@ class DatabaseManager:
         JOIN inquiries i ON q.inquiry_id = i.id
         WHERE q.status = 'Approved'
         """
-        return pd.read_sql(query, self.conn)
+        return self._read_sql(query, tables=("quotations", "inquiries"))
     
     def get_full_results(self):
-        return pd.read_sql("SELECT * FROM quotations WHERE status = 'Approved'", self.conn)
+        return self._read_sql("SELECT * FROM quotations WHERE status = 'Approved'", tables=("quotations",))
+
+    def iter_training_history(self, chunksize=50_000):
+        """Stream data training ProcurementAI: quotation Approved + data part (per chunk DataFrame).
+
+        Stock yang dipakai adalah stock part saat ini (history stock tidak disimpan).
+        """
+        query = """
+        SELECT q.cost_price, p.item_type, p.stock_on_hand, q.customer_name, q.moq, q.leadtime
+        FROM quotations q
+        JOIN parts p ON p.part_number = q.part_number
+        WHERE q.status = 'Approved' AND q.moq IS NOT NULL AND q.leadtime IS NOT NULL
+        ORDER BY q.rowid
+        """
+        with self.pool.connection() as conn:
+            yield from pd.read_sql(query, conn, chunksize=chunksize)
+
+    def get_recent_results(self, limit=100):
+        """Quotation Approved terbaru saja (history dashboard), tidak load seluruh tabel"""
+        return self._read_sql("SELECT * FROM quotations WHERE status = 'Approved' ORDER BY rowid DESC LIMIT ?",
+                              params=(int(limit),), tables=("quotations",))
+
+    # --- Dashboard: baca tabel agregat, O(#customer + #status) berapapun panjang history ---
+    def get_dashboard_summary(self):
+        row = self._read_sql("""SELECT COALESCE(SUM(quote_count), 0) AS quote_count, COALESCE(SUM(sales_cents), 0) AS sales_cents,
+                                       COALESCE(SUM(profit_cents), 0) AS profit_cents, COALESCE(SUM(profit_pct_sum), 0) AS profit_pct_sum
+                                FROM dashboard_customer_sales""", tables=("quotations",)).iloc[0]
+        count = int(row['quote_count'])
+        return {"completed": count, "total_sales": float(row['sales_cents']) / 100, "total_profit": float(row['profit_cents']) / 100,
+                "avg_profit_pct": float(row['profit_pct_sum']) / count if count else 0.0}
+
+    def get_sales_by_customer(self):
+        return self._read_sql("""SELECT customer_name, quote_count, sales_cents / 100.0 AS sales_price, profit_cents / 100.0 AS profit_value
+                                 FROM dashboard_customer_sales ORDER BY customer_name""", tables=("quotations",))
+
+    def get_status_counts(self, status_list=None):
+        df = self._read_sql("SELECT status, inquiry_count FROM dashboard_status_counts ORDER BY status", tables=("inquiries",))
+        return df[df['status'].isin(status_list)] if status_list is not None else df
+
+    def reconcile_dashboard(self, repair=False):
+        """Bandingkan tabel agregat dengan rekap penuh dari quotations / inquiries.
+
+        Return list selisih (kosong = konsisten). repair=True -> agregat dibangun ulang dari rekap penuh.
+        """
+        checks = [("dashboard_customer_sales", FULL_CUSTOMER_SALES_SQL, "customer_name"),
+                  ("dashboard_status_counts", FULL_STATUS_COUNTS_SQL, "status")]
+        mismatches = []
+        with self.pool.connection() as conn:
+            for table, full_sql, key in checks:
+                mismatches += _diff_aggregates(conn, table, f"SELECT * FROM {table}", full_sql, key)
+        if repair and mismatches:
+            with self._cursor("quotations", "inquiries") as c:
+                c.execute("BEGIN IMMEDIATE")
+                _rebuild_dashboard_aggregates(c)
+        return mismatches
+
+    # --- Time-series (baca tabel inquiry_rollups, bukan scan history inquiries) ---
+    def get_inquiry_trend(self, grain="month", customer=None, start=None, end=None, by_customer=False):
+        """Volume inquiry, funnel (inquiry -> quote -> PO) & revisi per period (opsional per customer).
+
+        start / end = tanggal 'YYYY-MM-DD'; bucket yang memuat tanggal tsb ikut diambil.
+        """
+        rollup_where, _, params = _rollup_window(grain, start, end)
+        if customer is not None:
+            rollup_where += " AND customer_name = ?"
+            params.append(customer)
+        group = "period, customer_name" if by_customer else "period"
+        sums = ', '.join(f"SUM({m}) AS {m}" for m in ROLLUP_MEASURES)
+        df = self._read_sql(f"SELECT {group}, {sums} FROM inquiry_rollups WHERE grain = ? {rollup_where} GROUP BY {group} ORDER BY {group}",
+                            params=[grain] + params, tables=("inquiries",))
+        df['quote_rate'] = (df['quoted'] / df['inquiries']).where(df['inquiries'] > 0, 0.0)
+        df['po_rate'] = (df['po_created'] / df['quoted']).where(df['quoted'] > 0, 0.0)
+        return df
+
+    def reconcile_rollups(self, start=None, end=None, repair=False):
+        """Bandingkan inquiry_rollups dengan rekap penuh dari inquiries (opsional hanya window tanggal).
+
+        Return list selisih (kosong = konsisten). repair=True -> bucket dalam window dibangun ulang.
+        """
+        mismatches = []
+        with self.pool.connection() as conn:
+            for grain in ROLLUP_GRAINS:
+                rollup_where, raw_where, params = _rollup_window(grain, start, end)
+                stored_sql = f"SELECT * FROM inquiry_rollups WHERE grain = '{grain}' {rollup_where}"
+                mismatches += _diff_aggregates(conn, "inquiry_rollups", stored_sql, _full_rollup_sql(grain, raw_where),
+                                               ["grain", "period", "customer_name"], params=params)
+        if repair and mismatches:
+            with self._cursor("inquiries") as c:
+                c.execute("BEGIN IMMEDIATE")
+                _rebuild_inquiry_rollups(c, start, end)
+        return mismatches
 
     def update_quotation_status(self, quote_id, status):
-        c = self.conn.cursor()
-        c.execute("UPDATE quotations SET status = ? WHERE quote_id = ?", (status, quote_id))
-        self.conn.commit()
\ No newline at end of file
+        with self._cursor("quotations") as c:
+            c.execute("UPDATE quotations SET status = ? WHERE quote_id = ?", (status, quote_id))
+
+    def update_quotations_batch(self, quote_ids, quote_status, inquiry_status, from_status="Draft", increment_revision=False,
+                                inquiry_from_status="Waiting Approval"):
+        """Approve / revise banyak quotation sekaligus: status quotation + inquiry-nya, 1 transaksi.
+
+        Hanya quotation yang masih berstatus from_status dan inquiry-nya masih inquiry_from_status yang diproses
+        (aman jika diklik 2x; inquiry yang sudah Cancelled tidak dihidupkan lagi). inquiry_from_status None = status
+        inquiry apa pun. Return jumlah quotation yang berubah.
+        """
+        quote_ids = list(quote_ids)
+        if not quote_ids:
+            return 0
+        changed = 0
+        with self._cursor("quotations", "inquiries") as c:
+            c.execute("BEGIN IMMEDIATE")
+            for q in quote_ids:
+                # Inquiry di-update dulu selagi status quotation masih from_status; quotation hanya ikut jika inquiry berubah
+                c.execute("""UPDATE inquiries SET status = ?, revision_count = revision_count + ?
+                             WHERE id = (SELECT inquiry_id FROM quotations WHERE quote_id = ? AND status = ?)
+                               AND (? IS NULL OR status = ?)""",
+                          (inquiry_status, int(increment_revision), q, from_status, inquiry_from_status, inquiry_from_status))
+                if c.rowcount:
+                    c.execute("UPDATE quotations SET status = ? WHERE quote_id = ? AND status = ?", (quote_status, q, from_status))
+                    changed += c.rowcount
+        return changed
+
+    # --- Email Outbox (antrian email, diproses EmailDispatcher di background) ---
+    def enqueue_email(self, to_email, subject, body, quote_id=None, attachment_path=None):
+        date_now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with self._cursor("email_outbox", "quotations") as c:
+            c.execute("""INSERT INTO email_outbox (quote_id, to_email, subject, body, attachment_path, status, created_at)
+                         VALUES (?, ?, ?, ?, ?, 'Queued', ?)""",
+                      (quote_id, to_email, subject, body, attachment_path, date_now))
+            email_id = c.lastrowid
+            if quote_id is not None:
+                c.execute("UPDATE quotations SET email_id = ? WHERE quote_id = ?", (email_id, quote_id))
+            return email_id
+
+    def enqueue_digest_emails(self, digests):
+        """Masukkan banyak email digest (1 per customer) ke antrian dalam 1 transaksi.
+
+        digests: iterable dict {to_email, subject, body, quote_ids} (boleh generator).
+        Quotation ditandai email_id-nya supaya tidak terkirim ulang. Quotation yang email sebelumnya Failed
+        boleh masuk lagi; email Failed lama yang tidak lagi memuat quotation apapun di-Cancel supaya
+        "Retry Failed" tidak mengirimnya dobel. Jika ada quotation yang ternyata sudah di-antri / dikirim
+        session lain, seluruh batch dibatalkan (ValueError).
+        Return list (email_id, jumlah quote).
+        """
+        date_now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        queued = []
+        with self._cursor("email_outbox", "quotations") as c:
+            c.execute("BEGIN IMMEDIATE")
+            for d in digests:
+                c.execute("""INSERT INTO email_outbox (to_email, subject, body, attachment_path, status, created_at)
+                             VALUES (?, ?, ?, ?, 'Queued', ?)""",
+                          (d['to_email'], d['subject'], d['body'], d.get('attachment_path'), date_now))
+                email_id = c.lastrowid
+                placeholders = ','.join('?' for _ in d['quote_ids'])
+                failed = [r[0] for r in c.execute(f"""SELECT DISTINCT q.email_id FROM quotations q
+                                                      JOIN email_outbox e ON e.id = q.email_id AND e.status = 'Failed'
+                                                      WHERE q.quote_id IN ({placeholders})""", d['quote_ids'])]
+                c.executemany("""UPDATE quotations SET email_id = ? WHERE quote_id = ?
+                                 AND (email_id IS NULL OR email_id IN (SELECT id FROM email_outbox WHERE status = 'Failed'))""",
+                              [(email_id, q) for q in d['quote_ids']])
+                if c.rowcount != len(d['quote_ids']):
+                    raise ValueError("Sebagian quotation sudah dikirim oleh session lain, silakan refresh.")
+                c.executemany("""UPDATE email_outbox SET status = 'Cancelled', last_error = ?
+                                 WHERE id = ? AND status = 'Failed' AND NOT EXISTS (SELECT 1 FROM quotations WHERE email_id = ?)""",
+                              [(f"Diganti email #{email_id}", old, old) for old in failed])
+                queued.append((email_id, len(d['quote_ids'])))
+        return queued
+
+    def claim_emails(self, limit=20):
+        """Ambil email Queued yang sudah jatuh tempo dan tandai 'Sending' + claimed_at (atomic, aman untuk >1 worker)"""
+        with self.pool.connection() as conn: # Cek baca dulu: poll saat antrian kosong tidak membuka transaksi tulis
+            if conn.execute("SELECT 1 FROM email_outbox WHERE status = 'Queued' AND next_attempt_at <= ? LIMIT 1",
+                            (time.time(),)).fetchone() is None:
+                return []
+        with self._cursor("email_outbox") as c:
+            c.execute("BEGIN IMMEDIATE")
+            rows = c.execute("""SELECT id, quote_id, to_email, subject, body, attachment_path, attempts
+                                FROM email_outbox WHERE status = 'Queued' AND next_attempt_at <= ?
+                                ORDER BY id LIMIT ?""", (time.time(), limit)).fetchall()
+            claimed_at = time.time()
+            c.executemany("UPDATE email_outbox SET status = 'Sending', claimed_at = ? WHERE id = ?", [(claimed_at, r[0]) for r in rows])
+        cols = ['id', 'quote_id', 'to_email', 'subject', 'body', 'attachment_path', 'attempts']
+        return [dict(zip(cols, r)) for r in rows]
+
+    def mark_emails_sent(self, email_ids):
+        date_now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with self._cursor("email_outbox") as c:
+            c.executemany("UPDATE email_outbox SET status = 'Sent', attempts = attempts + 1, sent_at = ?, last_error = NULL WHERE id = ?",
+                          [(date_now, i) for i in email_ids])
+
+    def mark_email_failed(self, email_id, error, retry_at=None):
+        """retry_at = epoch detik untuk dicoba lagi; None = gagal permanen"""
+        with self._cursor("email_outbox") as c:
+            c.execute("""UPDATE email_outbox SET status = ?, attempts = attempts + 1, last_error = ?, next_attempt_at = ?
+                         WHERE id = ?""",
+                      ('Queued' if retry_at is not None else 'Failed', str(error)[:500], retry_at or 0, email_id))
+
+    def requeue_emails(self, statuses=("Sending",), stale_seconds=None):
+        """Kembalikan email ke antrian (mis. 'Sending' yang tertinggal saat proses mati, atau retry 'Failed').
+
+        stale_seconds diisi -> hanya email yang di-claim lebih lama dari itu (lease habis), supaya email
+        yang sedang dikirim worker lain yang masih hidup tidak ikut di-requeue dan terkirim 2x.
+        """
+        placeholders = ','.join('?' for _ in statuses)
+        lease = "" if stale_seconds is None else " AND (claimed_at IS NULL OR claimed_at < ?)"
+        params = list(statuses) + ([] if stale_seconds is None else [time.time() - stale_seconds])
+        with self._cursor("email_outbox") as c:
+            c.execute(f"UPDATE email_outbox SET status = 'Queued', next_attempt_at = 0, claimed_at = NULL "
+                      f"WHERE status IN ({placeholders}){lease}", params)
+            return c.rowcount
+
+    def get_email_outbox(self, limit=200):
+        return self._read_sql("SELECT * FROM email_outbox ORDER BY id DESC LIMIT ?", params=(limit,), tables=("email_outbox",))
+
+    def get_email_status_counts(self):
+        return self._read_sql("SELECT status, count(*) AS n FROM email_outbox GROUP BY status", tables=("email_outbox",))
+
+# Semua method public tercatat di modules.perf (halaman ⏱ Performance)
+instrument_methods(DatabaseManager, "db")
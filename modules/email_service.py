@@ -1,27 +1,263 @@
+import os
+import time
+import logging
 import smtplib
+import threading
+from email.mime.application import MIMEApplication
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 
-def send_quotation_email_simulation(to_email, quote_id, status):
+SENDER_EMAIL = "admin@komatsu.co.id"
+logger = logging.getLogger(__name__)
+
+def send_quotation_email_simulation(to_email, quote_id, status="Approved", subject=None, body=None):
     """
-    Versi simulasi agar tidak error di komputer lokal tanpa SMTP Server
+    Versi simulasi agar tidak error di komputer lokal tanpa SMTP Server.
+    subject / body diisi (mis. dari email_outbox) -> dipakai apa adanya, termasuk digest tanpa quote_id
     """
     print(f"\n[EMAIL SERVER LOG] --------------------------------")
     print(f"Sending Email To: {to_email}")
-    print(f"Subject: Quotation {quote_id} - {status}")
-    print(f"Body: Your quotation has been approved. Please find attached.")
+    print(f"Subject: {subject or f'Quotation {quote_id} - {status}'}")
+    print(f"Body: {body or 'Your quotation has been approved. Please find attached.'}")
     print(f"----------------------------------------------------\n")
     return True, "Email Sent (Simulation)"
 
-# Gunakan fungsi ini jika sudah ada SMTP Server Asli
-def send_quotation_email_real(to_email, quote_id, pdf_path):
-    sender = "admin@komatsu.co.id"
-    password = "password"
+def send_quotation_email_real(to_email, quote_id, pdf_path, smtp_config=None):
+    """Kirim 1 email quotation langsung lewat SMTP (smtp_config / AMI_SMTP_*). Return (ok, pesan).
+
+    Untuk pengiriman dari app pakai db.enqueue_email + EmailDispatcher (retry & status delivery).
+    """
+    cfg = smtp_config or smtp_config_from_env()
+    if cfg is None:
+        return False, "SMTP belum dikonfigurasi (set AMI_SMTP_HOST)"
     try:
-        msg = MIMEMultipart()
-        msg['Subject'] = f"Quotation {quote_id}"
-        msg.attach(MIMEText("Dokumen terlampir."))
-        # Setup SMTP here...
+        msg = build_message(cfg.get("sender", SENDER_EMAIL), to_email, f"Quotation {quote_id}", "Dokumen terlampir.", pdf_path)
+        conn = smtp_connect(cfg)
+        try:
+            conn.send_message(msg)
+        finally:
+            conn.quit()
         return True, "Sent"
-    except Exception as e:
-        return False, str(e)
\ No newline at end of file
+    except (smtplib.SMTPException, OSError) as e:
+        return False, str(e)
+
+
+def iter_customer_digests(quotes, email_for):
+    """Generator email digest per customer dari DataFrame quotation Approved (1 email per customer).
+
+    email_for: fungsi customer_name -> alamat email. Body dibuat satu per satu saat di-iterate,
+    jadi ribuan quotation tidak perlu dirender sekaligus di memory.
+    """
+    for customer, group in quotes.sort_values(['customer_name', 'quote_id']).groupby('customer_name', sort=False):
+        lines = [f"{'Ref':<20}{'Part Number':<18}{'Price':>14}{'MOQ':>8}  Leadtime"]
+        lines += [f"{q:<20}{p:<18}{f'${price:,.2f}':>14}{moq:>8}  {lt} Days"
+                  for q, p, price, moq, lt in zip(group['quote_id'], group['part_number'], group['sales_price'],
+                                                  group['moq'], group['leadtime'])]
+        body = "\n".join([
+            f"Dear {customer},",
+            "",
+            f"We are pleased to submit our offer for {len(group)} item(s):",
+            "",
+            *lines,
+            "",
+            f"Total: ${group['sales_price'].sum():,.2f}",
+            "Please Create PO through the Customer Portal.",
+            "",
+            "Regards,",
+            "Komatsu AMI",
+        ])
+        yield {
+            "customer": customer,
+            "to_email": email_for(customer),
+            "subject": f"Quotation Summary - {customer} ({len(group)} items)",
+            "body": body,
+            "quote_ids": group['quote_id'].tolist(),
+        }
+
+
+def build_message(sender, to_email, subject, body, attachment_path=None):
+    msg = MIMEMultipart()
+    msg['From'] = sender
+    msg['To'] = to_email
+    msg['Subject'] = subject
+    msg.attach(MIMEText(body))
+    if attachment_path and os.path.exists(attachment_path):
+        with open(attachment_path, "rb") as f:
+            part = MIMEApplication(f.read(), Name=os.path.basename(attachment_path))
+        part['Content-Disposition'] = f'attachment; filename="{os.path.basename(attachment_path)}"'
+        msg.attach(part)
+    return msg
+
+
+def smtp_connect(cfg):
+    """Koneksi SMTP (STARTTLS + login jika dikonfigurasi) dari dict smtp_config_from_env"""
+    conn = smtplib.SMTP(cfg["host"], cfg["port"], timeout=30)
+    if cfg.get("starttls"):
+        conn.starttls()
+    if cfg.get("user"):
+        conn.login(cfg["user"], cfg["password"])
+    return conn
+
+
+def smtp_config_from_env():
+    """Konfigurasi SMTP dari environment (AMI_SMTP_*). Tanpa AMI_SMTP_HOST -> mode simulasi"""
+    host = os.environ.get("AMI_SMTP_HOST")
+    if not host:
+        return None
+    return {
+        "host": host,
+        "port": int(os.environ.get("AMI_SMTP_PORT", 587)),
+        "user": os.environ.get("AMI_SMTP_USER"),
+        "password": os.environ.get("AMI_SMTP_PASSWORD"),
+        "sender": os.environ.get("AMI_SMTP_SENDER", SENDER_EMAIL),
+        "starttls": os.environ.get("AMI_SMTP_TLS", "1") == "1",
+    }
+
+
+def _is_permanent_failure(e):
+    """Kode SMTP 5xx = gagal permanen (tidak di-retry); 4xx / error koneksi = sementara"""
+    if isinstance(e, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in e.recipients.values())
+    return isinstance(e, smtplib.SMTPResponseException) and e.smtp_code >= 500
+
+
+class EmailDispatcher:
+    """Worker background yang mengirim email dari tabel email_outbox.
+
+    Klik di UI cukup enqueue (db.enqueue_email) lalu wake(); pengiriman, retry dengan backoff
+    dan status delivery ditangani di sini. Tiap worker memakai ulang 1 koneksi SMTP
+    (ditutup setelah idle), jadi tidak connect/login ulang untuk setiap email.
+    smtp_config None = simulasi (print ke log), sama seperti send_quotation_email_simulation.
+    Email yang di-claim punya lease lease_seconds (claimed_at): hanya 'Sending' yang lease-nya habis
+    (worker / proses mati) yang di-requeue, jadi proses lain yang start bersamaan tidak mengirim ulang.
+    """
+    def __init__(self, db, smtp_config=None, workers=1, batch_size=20, max_attempts=5,
+                 backoff_seconds=5.0, poll_seconds=2.0, idle_seconds=30.0, lease_seconds=900.0):
+        self.db = db
+        self.smtp_config = smtp_config
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.poll_seconds = poll_seconds
+        self.idle_seconds = idle_seconds
+        self.lease_seconds = lease_seconds # > batch_size x timeout SMTP, supaya batch yang masih dikirim tidak kedaluwarsa
+        self._next_lease_check = 0.0
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads = []
+        self.stats = {"sent": 0, "retried": 0, "failed": 0, "connections": 0, "errors": 0}
+        self._stats_lock = threading.Lock()
+
+    def start(self):
+        if self._threads:
+            return self
+        self._requeue_expired() # Sisa proses sebelumnya yang mati di tengah kirim
+        for n in range(self.workers):
+            t = threading.Thread(target=self._run, name=f"email-dispatcher-{n}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        return self
+
+    def stop(self, timeout=10.0):
+        self._stop.set()
+        self._wake.set()
+        for t in self._threads:
+            t.join(timeout)
+        self._threads = []
+
+    def wake(self):
+        self._wake.set()
+
+    def _requeue_expired(self):
+        """Requeue 'Sending' yang lease-nya habis; dicek paling sering tiap lease_seconds / 4"""
+        now = time.monotonic()
+        if now < self._next_lease_check:
+            return
+        self._next_lease_check = now + self.lease_seconds / 4
+        requeued = self.db.requeue_emails(("Sending",), stale_seconds=self.lease_seconds)
+        if requeued:
+            logger.warning("Requeued %d email(s) whose 'Sending' lease expired", requeued)
+
+    def _count(self, key, n=1):
+        with self._stats_lock:
+            self.stats[key] += n
+
+    # --- Koneksi SMTP (dipakai ulang per worker) ---
+    def _connect(self):
+        conn = smtp_connect(self.smtp_config)
+        self._count("connections")
+        return conn
+
+    @staticmethod
+    def _close(conn):
+        if conn is None:
+            return
+        try:
+            conn.quit()
+        except (smtplib.SMTPException, OSError):
+            conn.close()
+
+    def _send(self, conn, email):
+        if self.smtp_config is None:
+            send_quotation_email_simulation(email['to_email'], email['quote_id'], subject=email['subject'], body=email['body'])
+            return conn
+        if conn is None:
+            conn = self._connect()
+        sender = self.smtp_config.get("sender", SENDER_EMAIL)
+        msg = build_message(sender, email['to_email'], email['subject'], email['body'], email['attachment_path'])
+        conn.send_message(msg)
+        return conn
+
+    def _record(self, sent_ids, failures):
+        """Catat hasil kirim ke email_outbox; list dikosongkan hanya untuk yang berhasil dicatat"""
+        if sent_ids:
+            self.db.mark_emails_sent(sent_ids)
+            self._count("sent", len(sent_ids))
+            sent_ids.clear()
+        while failures:
+            email_id, error, retry_at = failures[0]
+            self.db.mark_email_failed(email_id, error, retry_at=retry_at)
+            self._count("failed" if retry_at is None else "retried")
+            failures.pop(0)
+
+    def _run(self):
+        conn, last_used = None, time.monotonic()
+        sent_ids, failures = [], [] # Hasil kirim yang belum tercatat di DB (dicoba lagi jika DB error)
+        while not self._stop.is_set():
+            try:
+                self._record(sent_ids, failures)
+                batch = self.db.claim_emails(self.batch_size)
+                if not batch:
+                    self._requeue_expired()
+                    if conn is not None and time.monotonic() - last_used > self.idle_seconds:
+                        self._close(conn)
+                        conn = None
+                    self._wake.wait(self.poll_seconds)
+                    self._wake.clear()
+                    continue
+
+                for email in batch:
+                    try:
+                        conn = self._send(conn, email)
+                        sent_ids.append(email['id'])
+                    except Exception as e: # Worker tidak boleh mati karena 1 email
+                        if isinstance(e, smtplib.SMTPServerDisconnected) or (isinstance(e, OSError) and not isinstance(e, smtplib.SMTPException)):
+                            self._close(conn)
+                            conn = None # Koneksi putus -> buat baru untuk email berikutnya
+                        attempts = email['attempts'] + 1
+                        if _is_permanent_failure(e) or attempts >= self.max_attempts:
+                            failures.append((email['id'], e, None))
+                        else:
+                            failures.append((email['id'], e, time.time() + self.backoff_seconds * (2 ** (attempts - 1))))
+                self._record(sent_ids, failures)
+                last_used = time.monotonic()
+            except Exception: # Error DB (locked, disk, ...) tidak boleh mematikan thread worker
+                logger.exception("Email dispatcher iteration failed, retrying in %.1fs", self.poll_seconds)
+                self._count("errors")
+                self._stop.wait(self.poll_seconds)
+        try:
+            self._record(sent_ids, failures)
+        except Exception: # Yang tetap 'Sending' di-requeue setelah lease habis
+            logger.exception("Email dispatcher could not record %d result(s) on stop", len(sent_ids) + len(failures))
+        self._close(conn)
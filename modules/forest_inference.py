@@ -0,0 +1,80 @@
+import numpy as np
+
+
+class CompiledForest:
+    """RandomForestRegressor (sklearn) yang di-export ke array NumPy untuk inference cepat.
+
+    Semua node dari semua tree digabung dalam array datar (feature / threshold / child / value),
+    lalu di-traverse sekaligus untuk semua baris x semua tree (vectorized). Hasil identik bit per
+    bit dengan forest.predict(): X dibandingkan sebagai float32 seperti sklearn, dan rata-rata tree
+    dijumlahkan berurutan seperti sklearn.
+    """
+    def __init__(self, feature, threshold, left, right, missing_left, value, roots, max_depth):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.missing_left = missing_left
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+
+    @classmethod
+    def from_sklearn(cls, forest):
+        features, thresholds, lefts, rights, missing, values, roots = [], [], [], [], [], [], []
+        offset = 0
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            n = tree.node_count
+            node_ids = np.arange(offset, offset + n, dtype=np.int32)
+            is_leaf = tree.children_left == -1
+            # Leaf menunjuk ke dirinya sendiri -> traversal berhenti saat node tidak berpindah lagi
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left + offset).astype(np.int32))
+            rights.append(np.where(is_leaf, node_ids, tree.children_right + offset).astype(np.int32))
+            features.append(np.where(is_leaf, 0, tree.feature).astype(np.int32))
+            thresholds.append(_float32_floor(tree.threshold))
+            go_left = getattr(tree, "missing_go_to_left", np.zeros(n, dtype=np.uint8))
+            missing.append(np.asarray(go_left, dtype=bool))
+            values.append(tree.value[:, 0, 0].astype(np.float64))
+            roots.append(offset)
+            offset += n
+        return cls(np.concatenate(features), np.concatenate(thresholds), np.concatenate(lefts),
+                   np.concatenate(rights), np.concatenate(missing), np.concatenate(values),
+                   np.asarray(roots, dtype=np.int32), max(e.tree_.max_depth for e in forest.estimators_))
+
+    @property
+    def nbytes(self):
+        arrays = (self.feature, self.threshold, self.left, self.right, self.missing_left, self.value, self.roots)
+        return sum(a.nbytes for a in arrays)
+
+    def predict(self, X):
+        X = np.ascontiguousarray(X, dtype=np.float32) # sklearn juga memakai float32 untuk traversal tree
+        n_rows, n_trees = X.shape[0], len(self.roots)
+        flat_X = X.ravel()
+        # Posisi (baris, tree) diratakan; hanya yang belum sampai leaf yang diproses di langkah berikutnya
+        node = np.tile(self.roots, n_rows)
+        active = np.arange(n_rows * n_trees)
+        current = node.copy()
+        x_offset = np.repeat(np.arange(n_rows) * X.shape[1], n_trees)
+        while len(active):
+            x = flat_X[x_offset + self.feature[current]]
+            go_left = (x <= self.threshold[current]) | (np.isnan(x) & self.missing_left[current])
+            nxt = np.where(go_left, self.left[current], self.right[current])
+            node[active] = nxt
+            moving = nxt != current # Leaf menunjuk ke dirinya sendiri
+            active, current, x_offset = active[moving], nxt[moving], x_offset[moving]
+        leaf_values = self.value[node].reshape(n_rows, n_trees)
+        # Jumlahkan tree satu per satu (urutan sama dengan sklearn), bukan np.sum (pairwise)
+        out = np.zeros(len(X))
+        for t in range(leaf_values.shape[1]):
+            out += leaf_values[:, t]
+        out /= leaf_values.shape[1]
+        return out
+
+
+def _float32_floor(threshold):
+    """Float32 terbesar yang <= threshold: untuk x float32, x <= t32 sama persis dengan x <= threshold"""
+    t32 = threshold.astype(np.float32)
+    above = t32.astype(np.float64) > threshold
+    t32[above] = np.nextafter(t32[above], np.float32(-np.inf))
+    return t32
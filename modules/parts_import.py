@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+
+REQUIRED_COLUMNS = ['part_number', 'description', 'unit', 'stock_on_hand', 'item_type', 'cost_price']
+REGION_COLUMNS = ['price_bkc', 'price_prpd', 'price_kipl', 'price_ksc', 'price_kac']
+PART_COLUMNS = REQUIRED_COLUMNS + REGION_COLUMNS
+ITEM_TYPES = ("Local", "Import")
+
+
+def read_part_chunks(source, file_format="csv", chunksize=50_000):
+    """Baca file parts master per chunk (DataFrame) tanpa load seluruh file ke memory"""
+    if file_format == "csv":
+        yield from pd.read_csv(source, chunksize=chunksize, dtype={'part_number': str, 'description': str,
+                                                                   'unit': str, 'item_type': str})
+    elif file_format == "parquet":
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Import Parquet membutuhkan paket 'pyarrow' (pip install pyarrow)") from e
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        raise ValueError(f"Format file tidak didukung: {file_format}")
+
+
+def validate_part_chunk(chunk, seen, row_offset=0):
+    """Validasi 1 chunk. Return (DataFrame baris valid, list reject).
+
+    seen = set part_number yang sudah lolos di chunk sebelumnya (untuk deteksi duplikat di file).
+    Nomor baris di reject report dihitung dari baris data pertama = 1.
+    """
+    missing = [c for c in REQUIRED_COLUMNS if c not in chunk.columns]
+    if missing:
+        raise ValueError(f"Kolom wajib tidak ada: {', '.join(missing)}")
+
+    df = chunk.reset_index(drop=True)
+    row_no = pd.Series(np.arange(len(df)) + row_offset + 1)
+    part_number = df['part_number'].astype("string").str.strip()
+    stock = pd.to_numeric(df['stock_on_hand'], errors='coerce')
+    cost = pd.to_numeric(df['cost_price'], errors='coerce')
+
+    reason = pd.Series(pd.NA, index=df.index, dtype="object")
+    checks = [
+        (part_number.isna() | (part_number == ""), "Part Number kosong"),
+        (df['description'].isna(), "Description kosong"),
+        (~df['item_type'].isin(ITEM_TYPES), "Item Type harus Local / Import"),
+        (stock.isna() | (stock < 0) | (stock % 1 != 0), "Stock harus bilangan bulat >= 0"),
+        (cost.isna() | (cost < 0), "Cost Price harus angka >= 0"),
+    ]
+    # Harga regional boleh kosong (dipertahankan / di-generate), tapi yang diisi harus angka >= 0:
+    # nilai salah tidak boleh diam-diam diganti harga placeholder
+    region_prices = {}
+    for col in [c for c in REGION_COLUMNS if c in df.columns]:
+        price = region_prices[col] = pd.to_numeric(df[col], errors='coerce')
+        not_numeric = price.isna() & df[col].notna()
+        if not_numeric.any(): # Sel berisi spasi saja dihitung kosong
+            not_numeric[not_numeric] = df.loc[not_numeric, col].astype(str).str.strip() != ""
+        checks.append((not_numeric | (price < 0), f"{col} harus angka >= 0"))
+    for mask, msg in checks:
+        reason = reason.mask(reason.isna() & mask.fillna(True), msg)
+
+    in_previous_chunk = pd.Series([p in seen for p in part_number.tolist()], index=df.index, dtype=bool)
+    dup_in_file = part_number.duplicated(keep='first') | in_previous_chunk
+    reason = reason.mask(reason.isna() & dup_in_file, "Duplikat Part Number di file")
+
+    bad = reason.notna()
+    rejects = pd.DataFrame({'row': row_no[bad], 'part_number': part_number[bad], 'reason': reason[bad]}).to_dict('records')
+
+    valid = df.loc[~bad].copy()
+    valid['part_number'] = part_number[~bad]
+    valid['stock_on_hand'] = stock[~bad].astype(int)
+    valid['cost_price'] = cost[~bad].astype(float)
+    # Harga regional yang tidak diisi tetap NaN: part lama mempertahankan harga di DB,
+    # part baru diisi fill_region_prices oleh caller
+    for col in REGION_COLUMNS:
+        valid[col] = region_prices[col][~bad] if col in region_prices else np.nan
+    seen.update(valid['part_number'])
+    return valid[PART_COLUMNS], rejects
+
+
+def fill_region_prices(valid, rows):
+    """Isi harga regional yang kosong (NaN, bukan nilai invalid: itu sudah di-reject) pada baris rows (mask)
+    seperti add_part: 1.1x - 1.5x cost"""
+    valid = valid.copy()
+    for col in REGION_COLUMNS:
+        generated = (valid['cost_price'] * np.random.uniform(1.1, 1.5, len(valid))).round(2)
+        valid[col] = valid[col].mask(rows & valid[col].isna(), generated)
+    return valid
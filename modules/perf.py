@@ -0,0 +1,142 @@
+import time
+import cProfile
+import io
+import pstats
+import functools
+import inspect
+import threading
+from collections import deque
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+
+class PerfRecorder:
+    """Ring buffer waktu eksekusi (ms) + jumlah baris hasil per operasi, dipakai bersama semua session.
+
+    Buffer hanya menyimpan max_samples sampel terakhir (untuk p50/p95/p99); jumlah call & total waktu
+    dihitung terpisah sejak reset terakhir.
+    """
+    def __init__(self, max_samples=20_000):
+        self.max_samples = max_samples
+        self._samples = deque(maxlen=max_samples)
+        self._totals = {}
+        self._lock = threading.Lock()
+        self.enabled = True
+
+    def record(self, name, ms, rows=None):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._samples.append((name, ms, rows, time.time()))
+            count, total = self._totals.get(name, (0, 0.0))
+            self._totals[name] = (count + 1, total + ms)
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._totals.clear()
+
+    def samples(self):
+        with self._lock:
+            return pd.DataFrame(list(self._samples), columns=['name', 'ms', 'rows', 'ts'])
+
+    def stats(self, prefix=None):
+        """Ringkasan per operasi: calls, total_ms, p50/p95/p99/max (dari buffer) & rata-rata rows"""
+        samples = self.samples()
+        with self._lock:
+            totals = dict(self._totals)
+        if prefix:
+            samples = samples[samples['name'].str.startswith(prefix)]
+        rows = []
+        for name, group in samples.groupby('name', sort=False):
+            p50, p95, p99 = np.percentile(group['ms'].to_numpy(), [50, 95, 99])
+            count, total = totals.get(name, (len(group), group['ms'].sum()))
+            returned = group['rows'].dropna()
+            rows.append({"name": name, "calls": count, "total_ms": round(total, 1), "p50_ms": round(p50, 2),
+                         "p95_ms": round(p95, 2), "p99_ms": round(p99, 2), "max_ms": round(group['ms'].max(), 2),
+                         "avg_rows": round(returned.mean(), 1) if len(returned) else None})
+        columns = ['name', 'calls', 'total_ms', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms', 'avg_rows']
+        return pd.DataFrame(rows, columns=columns).sort_values('total_ms', ascending=False, ignore_index=True)
+
+recorder = PerfRecorder()
+
+def _row_count(result):
+    # DataFrame / list / array -> jumlah baris; Series = 1 record (mis. get_part_details); scalar, tuple & dict tidak dihitung
+    if isinstance(result, pd.Series):
+        return 1
+    if isinstance(result, (pd.DataFrame, list, np.ndarray)):
+        return len(result)
+    return None
+
+@contextmanager
+def span(name):
+    """Context manager: with span("page.Dashboard") as s: ...; s["rows"] = n (opsional)"""
+    info = {"rows": None}
+    start = time.perf_counter()
+    try:
+        yield info
+    finally:
+        recorder.record(name, (time.perf_counter() - start) * 1000, info["rows"])
+
+def timed(name):
+    """Decorator: catat durasi & jumlah baris hasil fungsi dengan nama operasi name"""
+    def decorator(fn):
+        if inspect.isgeneratorfunction(fn):
+            return _timed_generator(name, fn)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            result = fn(*args, **kwargs)
+            recorder.record(name, (time.perf_counter() - start) * 1000, _row_count(result))
+            return result
+        return wrapper
+    return decorator
+
+def _timed_generator(name, fn):
+    """Versi timed untuk generator (mis. iter_training_history): waktu = total di dalam generator selama
+    di-iterate (tanpa waktu consumer), rows = jumlah baris semua chunk; dicatat saat habis / di-close"""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        gen = fn(*args, **kwargs)
+        elapsed, rows = 0.0, None
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = next(gen)
+                except StopIteration:
+                    return
+                finally:
+                    elapsed += time.perf_counter() - start
+                count = _row_count(item)
+                if count is not None:
+                    rows = (rows or 0) + count
+                yield item
+        finally:
+            gen.close()
+            recorder.record(name, elapsed * 1000, rows)
+    return wrapper
+
+def instrument_methods(cls, prefix):
+    """Bungkus semua method public cls dengan timed(f"{prefix}.{method}") (1x saat module di-import)"""
+    for attr, value in list(vars(cls).items()):
+        if attr.startswith('_') or not callable(value) or isinstance(value, (staticmethod, classmethod, type)):
+            continue
+        setattr(cls, attr, timed(f"{prefix}.{attr}")(value))
+    return cls
+
+class RunProfiler:
+    """cProfile untuk 1 script run (toggle di halaman Performance); hasil = teks pstats top N"""
+    def __init__(self):
+        self._profile = cProfile.Profile()
+
+    def start(self):
+        self._profile.enable()
+        return self
+
+    def stop(self, top=40, sort="cumulative"):
+        self._profile.disable()
+        out = io.StringIO()
+        pstats.Stats(self._profile, stream=out).strip_dirs().sort_stats(sort).print_stats(top)
+        return out.getvalue()
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+from modules.perf import timed
+
+# Komponen biaya standar (dalam desimal terhadap Sales Price / Cost)
+SDC_RATE = 0.03
+OVERHEAD_RATE = 0.038
+FREIGHT_RATE = 0.03
+
+
+@timed("pricing.calculate_financials")
+def calculate_financials(cost_price, target_profit_percent=10.0):
+    sdc = cost_price * SDC_RATE
+    svc = cost_price + sdc
+    profit_decimal = target_profit_percent / 100
+    denominator = 1 - OVERHEAD_RATE - profit_decimal - FREIGHT_RATE
+    if denominator <= 0: sales_price = 0
+    else: sales_price = svc / denominator
+    op_profit_val = sales_price * profit_decimal
+    return {"SDC": round(sdc, 2), "SVC": round(svc, 2), "Sales Price": round(sales_price, 2), "Op Profit Val": round(op_profit_val, 2)}
+
+
+def _round2(values):
+    """Pembulatan 2 desimal yang identik dengan round() bawaan Python.
+
+    np.round tidak selalu sama dengan round() untuk nilai yang tepat di tengah
+    (mis. 2.675) dan untuk nilai sangat besar (values * 100 kehilangan presisi,
+    mis. denominator mendekati 0), jadi nilai tersebut dibulatkan ulang satu per satu.
+    """
+    out = np.round(values, 2)
+    scaled = values * 100
+    near_half = (np.abs(np.abs(scaled - np.trunc(scaled)) - 0.5) < 1e-6) | ~(np.abs(scaled) < 2.0 ** 52)
+    if near_half.any():
+        out[near_half] = [round(v, 2) for v in values[near_half].tolist()]
+    return out
+
+
+@timed("pricing.calculate_financials_bulk")
+def calculate_financials_bulk(cost_price, target_profit_percent=10.0):
+    """Versi kolom (vectorized) dari calculate_financials.
+
+    cost_price dan target_profit_percent boleh scalar, array, atau Series
+    (di-broadcast). Hasil berupa DataFrame dengan kolom yang sama seperti
+    dict dari calculate_financials: SDC, SVC, Sales Price, Op Profit Val.
+
+    Hasil identik dengan calculate_financials yang dipanggil dengan float Python
+    (cek: python -m benchmarks.check_pricing_parity). Catatan: jika calculate_financials
+    dipanggil dengan np.float64, round() memakai pembulatan NumPy sehingga nilai .xx5
+    bisa berbeda 0.01 dari versi bulk; ubah ke float() dulu (mis. Series.tolist()).
+    """
+    index = cost_price.index if isinstance(cost_price, pd.Series) else None
+    cost = np.atleast_1d(np.asarray(cost_price, dtype=float))
+    profit_decimal = np.asarray(target_profit_percent, dtype=float) / 100
+    cost, profit_decimal = np.broadcast_arrays(cost, profit_decimal)
+
+    sdc = cost * SDC_RATE
+    svc = cost + sdc
+    denominator = 1 - OVERHEAD_RATE - profit_decimal - FREIGHT_RATE
+    # Denominator <= 0 -> Sales Price 0 (sama seperti versi scalar)
+    sales_price = np.divide(svc, denominator, out=np.zeros_like(svc), where=denominator > 0)
+    op_profit_val = sales_price * profit_decimal
+
+    return pd.DataFrame({
+        "SDC": _round2(sdc),
+        "SVC": _round2(svc),
+        "Sales Price": _round2(sales_price),
+        "Op Profit Val": _round2(op_profit_val),
+    }, index=index)
@@ -0,0 +1,195 @@
+import os
+import json
+import hashlib
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# Naikkan jika layout PDF berubah, supaya cache lama tidak dipakai lagi
+RENDERER_VERSION = 1
+PDF_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "pdf_cache")
+# Cache LRU: maks jumlah PDF di disk; PDF yang dipakai < MIN_CACHE_AGE detik lalu (mis. lampiran email yang
+# masih di antrian) tidak di-evict
+MAX_CACHE_FILES = 2000
+MIN_CACHE_AGE = 3600
+
+QUOTE_FIELDS = ['quote_id', 'customer_name', 'part_number', 'sales_price', 'profit_percentage', 'cost_price',
+                'sdc', 'svc', 'moq', 'leadtime']
+BENCHMARK_FIELDS = [('KI (Std 10%)', 'ki_std_price'), ('BKC', 'price_bkc'), ('PRPD', 'price_prpd'),
+                    ('KIPL', 'price_kipl'), ('KSC', 'price_ksc'), ('KAC', 'price_kac'), ('Region Avg', 'region_mean')]
+
+
+def _plain(value):
+    """numpy / pandas scalar -> tipe Python biasa (supaya hash & json stabil)"""
+    if value is None:
+        return None
+    if hasattr(value, "item"):
+        value = value.item()
+    if isinstance(value, float) and value != value: # NaN
+        return None
+    return value
+
+
+def quote_record(row):
+    """Ambil field yang dipakai PDF dari 1 baris get_quotations_with_benchmarks (Series / dict)"""
+    keys = QUOTE_FIELDS + [col for _, col in BENCHMARK_FIELDS]
+    return {k: _plain(row.get(k)) for k in keys}
+
+
+def content_hash(record):
+    payload = json.dumps({"v": RENDERER_VERSION, "quote": record}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def pdf_cache_path(record, cache_dir=PDF_CACHE_DIR):
+    return os.path.join(cache_dir, f"{record['quote_id']}_{content_hash(record)}.pdf")
+
+
+# --- Minimal PDF writer (teks saja, tanpa dependency tambahan) ---
+def _pdf_text(s):
+    return str(s).replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _money(v):
+    return "-" if v is None else f"${v:,.2f}"
+
+
+def render_quotation_pdf(record):
+    """Render 1 quotation ke bytes PDF (A4, font Courier supaya kolom rata)"""
+    lines = [
+        ("F2", 16, 50, 790, "PT Komatsu Indonesia - AfterMarket Intelligence"),
+        ("F1", 10, 50, 772, "Parts Localization, Costing & Procurement"),
+        ("F2", 14, 50, 730, f"QUOTATION {record['quote_id']}"),
+        ("F1", 11, 50, 705, f"Customer      : {record['customer_name']}"),
+        ("F1", 11, 50, 688, f"Part Number   : {record['part_number']}"),
+        ("F2", 12, 50, 655, "Offer"),
+        ("F1", 11, 50, 635, f"Sales Price   : {_money(record['sales_price'])}"),
+        ("F1", 11, 50, 618, f"MOQ           : {record['moq']}"),
+        ("F1", 11, 50, 601, f"Leadtime      : {record['leadtime']} Days"),
+        ("F2", 12, 50, 568, "Cost Structure"),
+        ("F1", 11, 50, 548, f"Base Cost     : {_money(record['cost_price'])}"),
+        ("F1", 11, 50, 531, f"SDC           : {_money(record['sdc'])}"),
+        ("F1", 11, 50, 514, f"SVC           : {_money(record['svc'])}"),
+        ("F1", 11, 50, 497, f"Profit Margin : {record['profit_percentage']}%"),
+        ("F2", 12, 50, 464, "Regional Price Benchmark"),
+    ]
+    y = 444
+    for label, col in BENCHMARK_FIELDS:
+        lines.append(("F1", 11, 50, y, f"{label:<14}: {_money(record.get(col))}"))
+        y -= 17
+    lines.append(("F1", 10, 50, y - 20, "Please create PO through the Customer Portal. Regards, Komatsu AMI"))
+
+    stream = "\n".join(f"BT /{font} {size} Tf {x} {yy} Td ({_pdf_text(text)}) Tj ET"
+                       for font, size, x, yy, text in lines).encode("latin-1", "replace")
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Contents 4 0 R "
+        b"/Resources << /Font << /F1 5 0 R /F2 6 0 R >> >> >>",
+        b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Courier >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Courier-Bold >>",
+    ]
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for n, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % n + obj + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % off for off in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def _render_to_file(record, path):
+    data = render_quotation_pdf(record)
+    # Nama temp unik per panggilan (thread/proses mana pun) di folder yang sama supaya os.replace tetap atomic
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path) # atomic: reader tidak pernah melihat file setengah jadi
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return path
+
+
+def _touch(path):
+    """Tandai PDF cache baru dipakai (mtime = urutan LRU). False jika file tidak ada / sudah di-evict"""
+    try:
+        os.utime(path)
+        return True
+    except FileNotFoundError:
+        return False
+
+
+def prune_pdf_cache(cache_dir=PDF_CACHE_DIR, max_files=MAX_CACHE_FILES, min_age=MIN_CACHE_AGE):
+    """Evict PDF yang paling lama tidak dipakai sampai cache <= max_files, plus sisa .tmp proses yang mati.
+
+    Return jumlah file yang dihapus.
+    """
+    now = time.time()
+    pdfs, stale = [], []
+    with os.scandir(cache_dir) as entries:
+        for entry in entries:
+            try:
+                mtime = entry.stat().st_mtime
+            except FileNotFoundError: # Dihapus proses lain
+                continue
+            if entry.name.endswith(".pdf"):
+                pdfs.append((mtime, entry.path))
+            elif entry.name.endswith(".tmp") and now - mtime > min_age:
+                stale.append(entry.path)
+    pdfs.sort()
+    for mtime, path in pdfs[:max(0, len(pdfs) - max_files)]:
+        if now - mtime < min_age: # Sisanya lebih baru lagi
+            break
+        stale.append(path)
+    removed = 0
+    for path in stale:
+        try:
+            os.unlink(path)
+            removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
+
+
+def get_quotation_pdf(record, cache_dir=PDF_CACHE_DIR, max_files=MAX_CACHE_FILES):
+    """Path PDF quotation; hanya di-render jika belum ada di cache (quote_id + content hash)"""
+    path = pdf_cache_path(record, cache_dir)
+    if not _touch(path):
+        os.makedirs(cache_dir, exist_ok=True)
+        _render_to_file(record, path)
+        prune_pdf_cache(cache_dir, max_files)
+    return path
+
+
+def render_quotation_pdfs(records, cache_dir=PDF_CACHE_DIR, processes=None, min_parallel=2000, max_files=MAX_CACHE_FILES):
+    """Batch render banyak quotation; yang belum ada di cache dirender paralel (process pool).
+
+    Render 1 PDF hanya ~0.1 ms, jadi process pool baru dipakai jika yang perlu dirender
+    >= min_parallel dan CPU > 1 (di bawah itu ongkos start worker lebih mahal).
+    Return (dict quote_id -> path, stats {rendered, cached}).
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    paths, todo = {}, []
+    for record in records:
+        path = pdf_cache_path(record, cache_dir)
+        paths[record['quote_id']] = path
+        if not _touch(path):
+            todo.append((record, path))
+
+    workers = processes or os.cpu_count() or 1
+    if len(todo) >= min_parallel and workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(_render_to_file, [r for r, _ in todo], [p for _, p in todo],
+                          chunksize=max(1, len(todo) // (workers * 4))))
+    else:
+        for record, path in todo:
+            _render_to_file(record, path)
+    if todo:
+        prune_pdf_cache(cache_dir, max_files)
+    return paths, {"rendered": len(todo), "cached": len(paths) - len(todo)}
@@ -0,0 +1,343 @@
+"""Server HTTP/JSON (asyncio, tanpa dependency tambahan) di atas WorkflowService, untuk integrasi DMS.
+
+Endpoint (body & response JSON):
+    GET  /health
+    GET  /inquiries/<id>
+    POST /inquiries                     {"customer", "part_number", "qty"}         -> {"inquiry_id"}
+    POST /inquiries/<id>/cancel
+    POST /inquiries/validate            {"decisions": [[id, "costing"|"localization"|"reject"], ...]}
+    POST /inquiries/<id>/localization   {"supplier", "target_date", "notes"}
+    POST /localization/<project_id>/finish  {"inquiry_id"}
+    POST /inquiries/<id>/suggest                                                   -> {"moq", "leadtime"}
+    POST /inquiries/<id>/quotation      {"profit", "moq", "leadtime", "cost"?}     -> quotation
+    POST /quotations/approve            {"quote_ids": [...]}
+    POST /quotations/revise             {"quote_ids": [...]}
+    POST /inquiries/<id>/po             {"po_number"}
+    POST /batch                         {"requests": [{"method", "path", "body"}, ...]} -> {"responses": [...]}
+
+Request batching: POST /inquiries dan /suggest dari banyak koneksi yang datang dalam batch_window_ms
+digabung jadi 1 transaksi insert / 1 predict_many. Klien juga bisa mengirim banyak request sekaligus
+lewat /batch. Panggilan DB berjalan di thread pool supaya event loop tidak terblokir.
+
+Jalankan:  python -m modules.workflow_api [--port 8600] [--db komatsu_aftermarket.db]
+"""
+import argparse
+import asyncio
+import json
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from modules.workflow_service import NotFoundError, WorkflowError, WorkflowService
+
+REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           409: "Conflict", 413: "Payload Too Large", 500: "Internal Server Error"}
+MAX_BODY_BYTES = 1_000_000
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+class MicroBatcher:
+    """Kumpulkan item dari banyak request, jalankan batch_fn(list item) sekali per window / max_batch.
+
+    batch_fn berjalan di executor dan mengembalikan 1 hasil per item (Exception = gagal untuk item itu).
+    """
+    def __init__(self, batch_fn, executor, window_ms=2.0, max_batch=256):
+        self.batch_fn = batch_fn
+        self.executor = executor
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self._pending = []
+        self._timer = None
+        self.batches = 0
+        self.items = 0
+
+    async def submit(self, item):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            asyncio.ensure_future(self._run(batch))
+
+    async def _run(self, batch):
+        self.batches += 1
+        self.items += len(batch)
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(self.executor, self.batch_fn, [i for i, _ in batch])
+        except Exception as e:
+            results = [e] * len(batch)
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+class WorkflowAPIServer:
+    def __init__(self, service, host="127.0.0.1", port=8600, workers=8, batch_window_ms=2.0, max_batch=256):
+        self.service = service
+        self.host = host
+        self.port = port
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix="workflow-api")
+        # max_batch=1 -> batching dimatikan (tiap request 1 transaksi / 1 predict)
+        self.inquiry_batcher = MicroBatcher(lambda items: service.submit_inquiries(items, return_errors=True),
+                                            self.executor, batch_window_ms, max_batch)
+        self.suggest_batcher = MicroBatcher(lambda ids: service.suggest_procurement(ids, return_errors=True),
+                                            self.executor, batch_window_ms, max_batch)
+        self.routes = [
+            ("GET", r"/health", self._health),
+            ("GET", r"/inquiries/(\d+)", self._get_inquiry),
+            ("POST", r"/inquiries", self._submit_inquiry),
+            ("POST", r"/inquiries/validate", self._validate),
+            ("POST", r"/inquiries/(\d+)/cancel", self._cancel),
+            ("POST", r"/inquiries/(\d+)/localization", self._start_localization),
+            ("POST", r"/localization/(\d+)/finish", self._finish_localization),
+            ("POST", r"/inquiries/(\d+)/suggest", self._suggest),
+            ("POST", r"/inquiries/(\d+)/quotation", self._submit_quotation),
+            ("POST", r"/quotations/approve", self._approve),
+            ("POST", r"/quotations/revise", self._revise),
+            ("POST", r"/inquiries/(\d+)/po", self._create_po),
+            ("POST", r"/batch", self._batch),
+        ]
+        self.routes = [(m, re.compile(p + r"/?$"), h) for m, p, h in self.routes]
+        self._server = None
+        self._loop = None
+        self._thread = None
+        self._connections = set()
+        self.requests = 0
+
+    def _call(self, fn, *args):
+        return asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+
+    # --- Handlers: return (status, payload) ---
+    async def _health(self, body):
+        return 200, {"status": "ok", "requests": self.requests,
+                     "batches": {"inquiries": [self.inquiry_batcher.batches, self.inquiry_batcher.items],
+                                 "suggest": [self.suggest_batcher.batches, self.suggest_batcher.items]}}
+
+    async def _get_inquiry(self, body, inquiry_id):
+        return 200, await self._call(self.service.get_inquiry, int(inquiry_id))
+
+    async def _submit_inquiry(self, body):
+        item = (_field(body, "customer"), _field(body, "part_number"), _field(body, "qty"))
+        return 201, {"inquiry_id": await self.inquiry_batcher.submit(item)}
+
+    async def _validate(self, body):
+        decisions = [(int(i), d) for i, d in _field(body, "decisions")]
+        return 200, {"changed": await self._call(self.service.validate_inquiries, decisions)}
+
+    async def _cancel(self, body, inquiry_id):
+        await self._call(self.service.cancel_inquiry, int(inquiry_id))
+        return 200, {"inquiry_id": int(inquiry_id), "status": "Cancelled"}
+
+    async def _start_localization(self, body, inquiry_id):
+        project_id = await self._call(self.service.start_localization, int(inquiry_id), _field(body, "supplier"),
+                                      _field(body, "target_date"), body.get("notes", ""))
+        return 200, {"inquiry_id": int(inquiry_id), "project_id": project_id, "status": "In Development"}
+
+    async def _finish_localization(self, body, project_id):
+        await self._call(self.service.finish_localization, int(project_id), int(_field(body, "inquiry_id")))
+        return 200, {"project_id": int(project_id), "status": "Finished"}
+
+    async def _suggest(self, body, inquiry_id):
+        moq, leadtime = await self.suggest_batcher.submit(int(inquiry_id))
+        return 200, {"inquiry_id": int(inquiry_id), "moq": moq, "leadtime": leadtime}
+
+    async def _submit_quotation(self, body, inquiry_id):
+        quote = await self._call(lambda: self.service.submit_quotation(
+            int(inquiry_id), _field(body, "profit"), _field(body, "moq"), _field(body, "leadtime"), body.get("cost")))
+        return 201, quote
+
+    async def _approve(self, body):
+        return 200, {"changed": await self._call(self.service.approve_quotations, list(_field(body, "quote_ids")))}
+
+    async def _revise(self, body):
+        return 200, {"changed": await self._call(self.service.revise_quotations, list(_field(body, "quote_ids")))}
+
+    async def _create_po(self, body, inquiry_id):
+        await self._call(self.service.create_po, int(inquiry_id), _field(body, "po_number"))
+        return 200, {"inquiry_id": int(inquiry_id), "status": "PO Created"}
+
+    async def _batch(self, body):
+        """Banyak request dalam 1 round-trip; dijalankan bersamaan (POST /inquiries ikut micro-batch)"""
+        requests = _field(body, "requests")
+        if not isinstance(requests, list):
+            raise ApiError(400, "requests harus list")
+        responses = await asyncio.gather(*(self.dispatch(r.get("method", "POST"), r.get("path", ""), r.get("body") or {})
+                                           for r in requests))
+        return 200, {"responses": [{"status": s, "body": p} for s, p in responses]}
+
+    async def dispatch(self, method, path, body):
+        """Jalankan 1 request -> (status, payload). Error workflow dipetakan ke status HTTP"""
+        self.requests += 1
+        path_only = path.split("?", 1)[0]
+        allowed = False
+        for route_method, pattern, handler in self.routes:
+            match = pattern.match(path_only)
+            if not match:
+                continue
+            allowed = True
+            if route_method != method:
+                continue
+            try:
+                return await handler(body, *match.groups())
+            except ApiError as e:
+                return e.status, {"error": str(e)}
+            except NotFoundError as e:
+                return 404, {"error": str(e)}
+            except WorkflowError as e:
+                return 409, {"error": str(e)}
+            except (ValueError, TypeError, KeyError) as e:
+                return 400, {"error": str(e)}
+            except Exception as e:
+                return 500, {"error": f"{type(e).__name__}: {e}"}
+        return (405, {"error": f"{method} tidak didukung untuk {path_only}"}) if allowed else (404, {"error": f"Tidak ada endpoint {path_only}"})
+
+    # --- HTTP/1.1 (keep-alive, Content-Length) ---
+    @staticmethod
+    async def _respond(writer, status, payload, keep_alive):
+        data = json.dumps(payload, default=str).encode()
+        writer.write(f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\nContent-Type: application/json\r\n"
+                     f"Content-Length: {len(data)}\r\nConnection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + data)
+        await writer.drain()
+
+    async def _handle_connection(self, reader, writer):
+        self._connections.add(writer)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, path, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = headers.get("content-length", "0") or "0"
+                error = None
+                if not (length.isascii() and length.isdigit()):
+                    error = 400, {"error": f"Content-Length tidak valid: {length!r}"}
+                elif int(length) > MAX_BODY_BYTES:
+                    error = 413, {"error": f"Body terlalu besar (maks {MAX_BODY_BYTES} byte)"}
+                if error is not None:
+                    # Body tidak dibaca sama sekali -> sisa stream tidak bisa dipakai, koneksi ditutup
+                    await self._respond(writer, *error, keep_alive=False)
+                    break
+                length = int(length)
+                raw = await reader.readexactly(length) if length else b""
+                try:
+                    body = json.loads(raw) if raw else {}
+                    if not isinstance(body, dict):
+                        raise ValueError("Body harus JSON object")
+                except ValueError as e:
+                    status, payload = 400, {"error": f"JSON tidak valid: {e}"}
+                else:
+                    status, payload = await self.dispatch(method.upper(), path, body)
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._connections.discard(writer)
+            writer.close()
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1] # port=0 -> port acak dari OS
+        return self
+
+    async def serve_forever(self):
+        await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    def start_in_thread(self):
+        """Jalankan server di thread background (event loop sendiri); return setelah port siap"""
+        ready = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            self._loop.run_until_complete(self.start())
+            ready.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name="workflow-api", daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self
+
+    async def _shutdown(self):
+        self._server.close()
+        for writer in list(self._connections): # koneksi keep-alive: handler selesai sendiri setelah EOF
+            writer.close()
+        tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        if tasks:
+            await asyncio.wait(tasks, timeout=2)
+
+    def stop(self):
+        """Hentikan server dari start_in_thread: tutup listener & semua koneksi, lalu stop event loop"""
+        if self._loop is not None:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result(5)
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(5)
+            self._loop.close()
+            self._loop = None
+        self.executor.shutdown(wait=False)
+
+
+def _field(body, name):
+    if name not in body:
+        raise ApiError(400, f"Field '{name}' wajib diisi")
+    return body[name]
+
+
+def serving_model(db):
+    """Model yang sama dengan app.py: load_or_train + model history dari disk, di-retrain ModelTrainer di background.
+
+    Dengan begitu /suggest dan halaman Cost & Procurement memberi MOQ / leadtime yang sama.
+    """
+    from modules.ai_predictor import ModelTrainer, ProcurementAI
+    return ModelTrainer(db, ProcurementAI.load_or_train()).start().ai
+
+
+def main():
+    from modules.database_manager import DatabaseManager
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--db", default="komatsu_aftermarket.db")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--batch-window-ms", type=float, default=2.0)
+    parser.add_argument("--max-batch", type=int, default=256)
+    args = parser.parse_args()
+    db = DatabaseManager(args.db)
+    service = WorkflowService(db, ai_factory=lambda: serving_model(db))
+    service.ai # Load model sebelum menerima request (bukan di request /suggest pertama)
+    server = WorkflowAPIServer(service, args.host, args.port, args.workers, args.batch_window_ms, args.max_batch)
+    print(f"Workflow API on http://{args.host}:{args.port}")
+    asyncio.run(server.serve_forever())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+import threading
+
+from modules.pricing import calculate_financials
+
+# Keputusan validasi -> status inquiry berikutnya
+VALIDATION_DECISIONS = {"costing": "Ready for Costing", "localization": "Needs Localization", "reject": "Cancelled"}
+CLOSED_STATUSES = ("Cancelled", "PO Created", "Finished")
+COSTING_STATUSES = ("Ready for Costing", "Revise Required")
+
+class WorkflowError(ValueError):
+    """Transisi workflow tidak valid: status inquiry / quotation tidak sesuai langkahnya"""
+
+class NotFoundError(WorkflowError):
+    """Inquiry / part yang diminta tidak ada"""
+
+class WorkflowService:
+    """Workflow inquiry -> validation -> localization -> costing -> approval -> PO sebagai API Python biasa.
+
+    Dipakai oleh app.py (Streamlit) dan server HTTP (modules.workflow_api), jadi aturan transisi status
+    hanya ada di sini. Tiap transisi memakai UPDATE ... WHERE status = <status asal>, sehingga klik ganda
+    atau 2 session yang memproses inquiry yang sama tidak menghasilkan transisi ganda.
+    ai_factory (mis. get_procurement_ai) baru dipanggil saat prediksi pertama dibutuhkan.
+    """
+    def __init__(self, db, ai_factory=None):
+        self.db = db
+        self._ai_factory = ai_factory
+        self._ai = None
+        self._ai_lock = threading.Lock()
+
+    @property
+    def ai(self):
+        if self._ai is None:
+            with self._ai_lock: # Request bersamaan saat cold start tidak load / training model berkali-kali
+                if self._ai is None:
+                    if self._ai_factory is None:
+                        from modules.ai_predictor import ProcurementAI # sklearn hanya di-import jika dipakai
+                        self._ai_factory = ProcurementAI.load_or_train
+                    self._ai = self._ai_factory()
+        return self._ai
+
+    def get_inquiry(self, inquiry_id):
+        inquiry = self.db.get_inquiry(inquiry_id)
+        if inquiry is None:
+            raise NotFoundError(f"Inquiry #{inquiry_id} tidak ditemukan")
+        return inquiry
+
+    # --- Customer Portal ---
+    def submit_inquiry(self, customer, part_number, qty):
+        return self.submit_inquiries([(customer, part_number, qty)])[0]
+
+    def submit_inquiries(self, items, return_errors=False):
+        """Buat banyak inquiry Pending Validation dalam 1 transaksi. Return list id.
+
+        return_errors=True -> item invalid menghasilkan WorkflowError di posisinya (item lain tetap dibuat);
+        selain itu item invalid pertama di-raise dan tidak ada yang dibuat.
+        """
+        items = [(str(c or "").strip(), str(p or "").strip(), q) for c, p, q in items]
+        known = self.db.existing_part_numbers(p for _, p, _ in items)
+        results = []
+        for customer, part_number, qty in items:
+            if not customer:
+                error = WorkflowError("Customer wajib diisi")
+            elif part_number not in known:
+                error = NotFoundError(f"Part {part_number} tidak ada di parts master")
+            elif not isinstance(qty, int) or isinstance(qty, bool) or qty < 1:
+                error = WorkflowError("Qty harus bilangan bulat >= 1")
+            else:
+                error = None
+            if error is not None and not return_errors:
+                raise error
+            results.append(error)
+        valid = [(c, p, q, "Pending Validation") for (c, p, q), e in zip(items, results) if e is None]
+        ids = iter(self.db.add_inquiries_batch(valid))
+        return [next(ids) if e is None else e for e in results]
+
+    def cancel_inquiry(self, inquiry_id):
+        status = self.get_inquiry(inquiry_id)['status']
+        if status in CLOSED_STATUSES:
+            raise WorkflowError(f"Inquiry #{inquiry_id} sudah {status}, tidak bisa dibatalkan")
+        if not self.db.cancel_inquiry(inquiry_id, from_status=status):
+            current = self.get_inquiry(inquiry_id)['status']
+            raise WorkflowError(f"Inquiry #{inquiry_id} berstatus '{current}', bukan '{status}'")
+
+    def create_po(self, inquiry_id, po_number):
+        po_number = str(po_number or "").strip()
+        if not po_number:
+            raise WorkflowError("PO Number wajib diisi")
+        if not self.db.create_po(inquiry_id, po_number, from_status="Finished"):
+            status = self.get_inquiry(inquiry_id)['status']
+            raise WorkflowError(f"Inquiry #{inquiry_id} berstatus '{status}', PO hanya untuk quotation yang sudah Approved")
+
+    # --- Inquiry Validation ---
+    def validate_inquiries(self, decisions):
+        """decisions: iterable (inquiry_id, 'costing' | 'localization' | 'reject'). 1 transaksi.
+
+        Hanya inquiry yang masih Pending Validation yang berubah. Return jumlah inquiry yang berubah.
+        """
+        transitions = []
+        for inquiry_id, decision in decisions:
+            if decision not in VALIDATION_DECISIONS:
+                raise WorkflowError(f"Keputusan validasi tidak dikenal: {decision} (pilih {', '.join(VALIDATION_DECISIONS)})")
+            transitions.append((inquiry_id, VALIDATION_DECISIONS[decision]))
+        return self.db.update_inquiries_status_batch(transitions, from_status="Pending Validation")
+
+    @staticmethod
+    def default_decision(item_type):
+        """Aturan batch validation: part Local langsung costing, Import butuh localization"""
+        return "costing" if item_type == "Local" else "localization"
+
+    # --- Localization Development ---
+    def start_localization(self, inquiry_id, supplier, target_date, notes=""):
+        """Needs Localization -> In Development + project baru (1 transaksi). Return project_id"""
+        project_id = self.db.start_localization(inquiry_id, supplier, str(target_date), notes)
+        if project_id is None:
+            status = self.get_inquiry(inquiry_id)['status']
+            raise WorkflowError(f"Inquiry #{inquiry_id} berstatus '{status}', bukan 'Needs Localization'")
+        return project_id
+
+    def finish_localization(self, project_id, inquiry_id):
+        """Project On Progress -> Finished, inquiry In Development -> Ready for Costing (1 transaksi)"""
+        if not self.db.finish_localization(project_id, inquiry_id):
+            status = self.get_inquiry(inquiry_id)['status']
+            raise WorkflowError(f"Project #{project_id} bukan project On Progress untuk inquiry #{inquiry_id} "
+                                f"(status inquiry '{status}'), mungkin sudah diproses session lain")
+
+    # --- Cost & Procurement ---
+    def suggest_procurement(self, inquiry_ids, return_errors=False):
+        """Prediksi AI (MOQ, Leadtime) untuk banyak inquiry sekaligus (1 query inquiry + 1x predict_many)"""
+        inquiry_ids = list(inquiry_ids)
+        by_id = self.db.get_inquiries(inquiry_ids)
+        inquiries = [by_id.get(int(inquiry_id)) for inquiry_id in inquiry_ids]
+        missing = [inquiry_id for inquiry_id, i in zip(inquiry_ids, inquiries) if i is None]
+        if missing and not return_errors:
+            raise NotFoundError(f"Inquiry #{missing[0]} tidak ditemukan")
+        found = [i for i in inquiries if i is not None]
+        moqs, lts = self.ai.predict_many([i['cost_price'] or 0 for i in found], [i['item_type'] for i in found],
+                                         [i['stock_on_hand'] or 0 for i in found], [i['customer_name'] for i in found])
+        predictions = iter(zip(moqs.tolist(), lts.tolist()))
+        return [NotFoundError(f"Inquiry #{inquiry_id} tidak ditemukan") if i is None else next(predictions)
+                for inquiry_id, i in zip(inquiry_ids, inquiries)]
+
+    def submit_quotation(self, inquiry_id, profit, moq, leadtime, cost=None):
+        """Buat quotation Draft dari inquiry Ready for Costing / Revise Required -> Waiting Approval.
+
+        cost=None -> cost price dari parts master. quote_id dari sequence harian DB (Q-YYYYMMDD-NNNNNN).
+        Return dict quotation (seperti di tabel quotations).
+        """
+        inquiry = self.get_inquiry(inquiry_id)
+        if inquiry['status'] not in COSTING_STATUSES:
+            raise WorkflowError(f"Inquiry #{inquiry_id} berstatus '{inquiry['status']}', bukan tahap costing")
+        cost = float(inquiry['cost_price'] if cost is None else cost)
+        fin = calculate_financials(cost, float(profit))
+        quote = {
+            "inquiry_id": int(inquiry_id),
+            "customer": inquiry['customer_name'],
+            "part_number": inquiry['part_number'],
+            "sales_price": fin['Sales Price'],
+            "profit": float(profit),
+            "cost": cost,
+            "sdc": fin['SDC'],
+            "svc": fin['SVC'],
+            "moq": int(moq),
+            "leadtime": int(leadtime),
+            "status": "Draft"
+        }
+        quote_id = self.db.create_quotation(quote, from_status=inquiry['status'])
+        if quote_id is None:
+            raise WorkflowError(f"Inquiry #{inquiry_id} sudah diproses session lain")
+        return {"quote_id": quote_id, **quote}
+
+    # --- Superior Approval ---
+    def approve_quotations(self, quote_ids):
+        """Draft -> Approved, inquiry -> Finished. Return jumlah quotation yang berubah"""
+        return self.db.update_quotations_batch(quote_ids, "Approved", "Finished")
+
+    def revise_quotations(self, quote_ids):
+        """Draft -> Rejected, inquiry -> Revise Required (revision_count + 1)"""
+        return self.db.update_quotations_batch(quote_ids, "Rejected", "Revise Required", increment_revision=True)